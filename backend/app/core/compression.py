@@ -0,0 +1,190 @@
+"""
+Toneo - Response Compression
+Pure ASGI middleware negotiating brotli (when the `brotli` package is
+installed) or gzip for compressible responses above a size threshold.
+
+Streaming responses are compressed chunk by chunk with a flush after
+each one, so NDJSON/SSE clients still receive every chunk as it is
+produced. Strong ETags get an encoding suffix (`"abc-br"`): a compressed
+body is a different representation, and `etag_matches()` strips the
+suffix again when comparing If-None-Match.
+
+Every response that could be compressed (and every 304) carries
+`Vary: Accept-Encoding`, whether or not this one was: a shared cache must
+not hand a plain copy to a client that asked for gzip, or the reverse.
+"""
+import zlib
+from typing import Optional
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = (
+    b"application/json",
+    b"application/x-ndjson",
+    b"text/",
+)
+
+ENCODING_SUFFIXES = ("-br", "-gzip")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header (None = identity)."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Compressor:
+    """Incremental compressor with a common interface for br and gzip."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=settings.compression_brotli_quality)
+        else:
+            self._obj = zlib.compressobj(settings.compression_gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._obj.process(data)
+            return out + (self._obj.finish() if final else self._obj.flush())
+        out = self._obj.compress(data)
+        return out + self._obj.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """Compress eligible responses according to the client's Accept-Encoding."""
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.compression_min_size if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                encoding = choose_encoding(value.decode("latin-1"))
+                break
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-response state: holds the start message until the body decides."""
+
+    def __init__(self, send, encoding: Optional[str], minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            headers = message.get("headers", [])
+            compressible = _is_compressible(headers)
+            # A 304 stands in for the (compressible) response it revalidates
+            if compressible or message["status"] == 304:
+                message = {**message, "headers": _with_vary(headers)}
+            if not compressible or self.encoding is None:
+                self.passthrough = True
+                await self._send(message)
+            else:
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+            self.compressor = _Compressor(self.encoding)
+            await self._send({**start, "headers": _compressed_headers(start["headers"], self.encoding)})
+
+        await self._send({
+            "type": "http.response.body",
+            "body": self.compressor.compress(body, final=not more_body),
+            "more_body": more_body,
+        })
+
+
+def _is_compressible(headers) -> bool:
+    content_type = b""
+    for name, value in headers:
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _compressed_headers(headers, encoding: str) -> list:
+    result = []
+    for name, value in headers:
+        if name == b"content-length":
+            continue  # Unknown until the body is compressed; chunked instead
+        if name == b"etag" and value.endswith(b'"') and not value.startswith(b"W/"):
+            value = value[:-1] + f"-{encoding}".encode() + b'"'
+        result.append((name, value))
+    result.append((b"content-encoding", encoding.encode()))
+    return result
+
+
+def _with_vary(headers) -> list:
+    """`headers` plus Accept-Encoding in Vary (merged into an existing Vary)."""
+    result = []
+    found = False
+    for name, value in headers:
+        if name == b"vary":
+            found = True
+            if value.strip() != b"*" and b"accept-encoding" not in value.lower():
+                value += b", Accept-Encoding"
+        result.append((name, value))
+    if not found:
+        result.append((b"vary", b"Accept-Encoding"))
+    return result
+
+
+def strip_encoding_suffix(etag: str) -> str:
+    """`"abc-br"` -> `"abc"` (suffixes added by CompressionMiddleware)."""
+    for suffix in ENCODING_SUFFIXES:
+        if etag.endswith(suffix + '"'):
+            return etag[: -len(suffix) - 1] + '"'
+    return etag
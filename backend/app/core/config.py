@@ -4,6 +4,11 @@ Toneo Configuration
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
 from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+# backend/ directory: relative database paths resolve from here, not the cwd
+BACKEND_DIR = Path(__file__).parent.parent.parent
 
 
 class Settings(BaseSettings):
@@ -39,14 +44,53 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in v.split(",") if origin.strip()]
         return v
 
-    # Database
+    # Database (only the sqlite path is used; opened read-only, pooled per thread)
     database_url: str = "sqlite+aiosqlite:///./data/cedict.db"
+    # Seconds between checks for a swapped cedict.db (0 = only reload on SIGHUP)
+    dictionary_reload_interval: float = 5.0
+
+    @property
+    def database_path(self) -> Optional[Path]:
+        """Filesystem path of the SQLite database in `database_url`."""
+        scheme, sep, path = self.database_url.partition(":///")
+        if not sep or not scheme.startswith("sqlite") or not path:
+            return None
+        db_path = Path(path)
+        if not db_path.is_absolute():
+            db_path = BACKEND_DIR / db_path
+        return db_path
 
     # Azure TTS (optional)
     azure_speech_key: str = ""
     azure_speech_region: str = "eastus"
 
-    # Cache (optional)
+    # Metrics: per-stage latency histograms on /metrics (Prometheus format)
+    metrics_enabled: bool = False
+
+    # Largest document accepted by POST /api/analyze/stream (bytes)
+    stream_max_bytes: int = 5 * 1024 * 1024
+
+    # Incremental documents (/api/analyze/documents): longest document,
+    # total characters kept per process, and idle seconds before expiry
+    document_max_chars: int = 5000
+    document_store_max_chars: int = 500_000
+    document_ttl: float = 600.0
+
+    # Response compression: smallest body compressed (bytes) and effort levels
+    compression_min_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    # Admin endpoints (/api/admin/*) require X-Admin-Token; empty disables them
+    admin_token: str = ""
+
+    # Request profiling: share of requests sampled (0 = only on admin request),
+    # profiles kept in memory, and seconds between stack samples
+    profile_sample_rate: float = 0.0
+    profile_buffer_size: int = 20
+    profile_interval: float = 0.005
+
+    # Redis (optional): shared rate-limit buckets across workers and replicas
     redis_url: str = ""
 
     class Config:
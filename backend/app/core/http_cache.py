@@ -0,0 +1,64 @@
+"""
+Toneo - HTTP Caching
+Strong ETags and If-None-Match handling for responses that are a pure
+function of their input and the dictionary version.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Response
+
+from app.core.compression import strip_encoding_suffix
+
+
+# Bump when the response for the same input and dictionary changes
+# (new fields, different analysis), so clients drop stale copies
+RESPONSE_VERSION = "5"
+
+# Clients may store responses but must revalidate (cheap 304) before use
+CACHE_CONTROL = "public, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """Strong ETag over the response version and `parts`."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (RESPONSE_VERSION, *parts):
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches `etag`."""
+    return _matching_etag(if_none_match, etag) is not None
+
+
+def _matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """The entity tag in If-None-Match matching `etag`, as the client sent it."""
+    if not if_none_match:
+        return None
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]  # Weak comparison, as RFC 9110 requires here
+        if strip_encoding_suffix(candidate) == etag:
+            return candidate
+    return None
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str, if_none_match: Optional[str] = None) -> Response:
+    """
+    Empty 304 response carrying the validator.
+
+    Echoes the client's matching entity tag, so a copy stored as
+    `"abc-gzip"` is revalidated under that ETag and not the plain one.
+    """
+    return Response(
+        status_code=304, headers=cache_headers(_matching_etag(if_none_match, etag) or etag)
+    )
@@ -0,0 +1,191 @@
+"""
+Toneo - Metrics
+Per-stage latency histograms and counters, exported in Prometheus text format.
+
+Disabled by default (METRICS_ENABLED=false): `start_timer()` then returns a
+shared no-op timer and `inc()` returns immediately, so instrumented hot
+paths pay one flag check per call.
+"""
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+from app.core.config import settings
+
+
+# Latency buckets in seconds (100µs .. 5s)
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+_enabled: bool = settings.metrics_enabled
+
+
+def set_enabled(enabled: bool) -> None:
+    """Turn metrics collection on or off at runtime."""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    """Whether metrics are being collected."""
+    return _enabled
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label tuple."""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...],
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple[str, ...], value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items()]
+        for labels, counts, total, count in sorted(snapshot):
+            base = _format_labels(self.labelnames, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{base}{"," if base else ""}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter with one series per label tuple."""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple[str, ...], amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, labels: tuple[str, ...]) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for labels, value in snapshot:
+            lines.append(f"{self.name}{{{_format_labels(self.labelnames, labels)}}} {value}")
+        return lines
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    return ",".join(f'{n}="{v}"' for n, v in zip(names, values))
+
+
+# ============== Registry ==============
+
+STAGE_SECONDS = Histogram(
+    "toneo_stage_seconds",
+    "Time spent per pipeline stage within one request",
+    ("pipeline", "stage"),
+)
+DICTIONARY_LOOKUPS = Counter(
+    "toneo_dictionary_lookups_total",
+    "Dictionary lookups by pipeline and result (hit = found in CC-CEDICT)",
+    ("pipeline", "result"),
+)
+CACHE_REQUESTS = Counter(
+    "toneo_cache_requests_total",
+    "Cache lookups by cache and result",
+    ("cache", "result"),
+)
+
+
+def inc(counter: Counter, *labels: str, amount: float = 1) -> None:
+    """Increment a counter series (no-op when metrics are disabled)."""
+    if _enabled:
+        counter.inc(labels, amount)
+
+
+class StageTimer:
+    """
+    Splits one request into consecutive stages.
+
+    Each `lap(stage)` charges the time since the previous lap to `stage`;
+    stages hit several times (e.g. once per word) are summed, and each
+    stage is observed once per request on `finish()`.
+    """
+    __slots__ = ("pipeline", "_last", "_totals")
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self._totals: dict[str, float] = {}
+        self._last = perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = perf_counter()
+        self._totals[stage] = self._totals.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def finish(self) -> None:
+        for stage, seconds in self._totals.items():
+            STAGE_SECONDS.observe((self.pipeline, stage), seconds)
+        self._totals = {}
+
+
+class _NullTimer:
+    """Timer used while metrics are disabled."""
+    __slots__ = ()
+
+    def lap(self, stage: str) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+def start_timer(pipeline: str) -> StageTimer | _NullTimer:
+    """Start timing a request of `pipeline` (shared no-op when disabled)."""
+    return StageTimer(pipeline) if _enabled else NULL_TIMER
+
+
+def render_metrics() -> str:
+    """All metrics in Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for metric in (STAGE_SECONDS, DICTIONARY_LOOKUPS, CACHE_REQUESTS):
+        lines.extend(metric.render())
+
+    # Convenience gauge; Prometheus can also derive it from the counter
+    lines.append("# HELP toneo_dictionary_hit_ratio Share of dictionary lookups found in CC-CEDICT")
+    lines.append("# TYPE toneo_dictionary_hit_ratio gauge")
+    for pipeline in ("analyze", "dictionary"):
+        hits = DICTIONARY_LOOKUPS.get((pipeline, "hit"))
+        total = hits + DICTIONARY_LOOKUPS.get((pipeline, "miss"))
+        if total:
+            lines.append(f'toneo_dictionary_hit_ratio{{pipeline="{pipeline}"}} {hits / total:.6f}')
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,304 @@
+"""
+Toneo - Request Profiling
+Opt-in statistical profiler for diagnosing slow requests in production.
+
+A request is profiled when it is sampled (PROFILE_SAMPLE_RATE) or when it
+carries `X-Toneo-Profile: 1` together with a valid `X-Admin-Token`. While
+it runs, a sampler thread records the stacks of the threads serving it:
+the event loop thread, and each threadpool thread while it runs one of the
+request's sync endpoints (routes built with `ProfiledRoute`) or pulls its
+sync streaming body (`in_request_thread`). Other requests' threadpool work
+is left out; async work of other requests shares the event loop thread,
+so each profile records how many requests overlapped it. Only one request
+is profiled at a time; others pass through untouched.
+
+Profiles are kept in a bounded in-memory ring buffer and served as
+collapsed stacks (flamegraph.pl / speedscope format) by the admin router.
+"""
+import functools
+import inspect
+import random
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, TypeVar
+
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+
+
+# Stacks are kept only if they pass through this package
+APP_DIR = str(Path(__file__).parent.parent)
+
+PROFILE_HEADER = b"x-toneo-profile"
+ADMIN_TOKEN_HEADER = b"x-admin-token"
+
+# Ids of the threads serving the profiled request (None when not profiling).
+# Threadpool calls run in a copy of the request's context, so they see it.
+_request_threads: ContextVar[Optional[set[int]]] = ContextVar("profile_threads", default=None)
+
+T = TypeVar("T")
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Check `token` against ADMIN_TOKEN (always False when no token is configured)."""
+    expected = settings.admin_token
+    return bool(expected) and token is not None and secrets.compare_digest(token, expected)
+
+
+@dataclass
+class ProfileRecord:
+    """One profiled request."""
+    id: str
+    created_at: float
+    method: str
+    path: str
+    trigger: str  # "header" or "sample"
+    status: int = 0
+    duration_ms: float = 0.0
+    concurrent_requests: int = 0  # Most other requests in flight at once meanwhile
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+
+    def summary(self, top: int = 10) -> dict:
+        """JSON-friendly metadata plus the hottest leaf frames."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "id": self.id,
+            "created_at": self.created_at,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "status": self.status,
+            "duration_ms": round(self.duration_ms, 3),
+            "concurrent_requests": self.concurrent_requests,
+            "samples": self.samples,
+            "top_frames": [{"frame": f, "samples": n} for f, n in leaves.most_common(top)],
+        }
+
+    def collapsed(self) -> str:
+        """Collapsed-stack text: one `root;...;leaf count` line per stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Thread-safe ring buffer of the most recent profiles."""
+
+    def __init__(self, maxlen: int):
+        self._records: deque[ProfileRecord] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, record: ProfileRecord) -> None:
+        with self._lock:
+            self._records.append(record)
+
+    def list(self) -> list[ProfileRecord]:
+        """Profiles, newest first."""
+        with self._lock:
+            return list(reversed(self._records))
+
+    def get(self, profile_id: str) -> Optional[ProfileRecord]:
+        with self._lock:
+            for record in self._records:
+                if record.id == profile_id:
+                    return record
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+
+profile_store = ProfileStore(settings.profile_buffer_size)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(APP_DIR):
+        filename = "app" + filename[len(APP_DIR):]
+    else:
+        filename = Path(filename).name
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+@contextmanager
+def _serving_request() -> Iterator[None]:
+    """Have the sampler follow the calling thread for the block, if profiling."""
+    threads = _request_threads.get()
+    if threads is None:
+        yield
+        return
+    ident = threading.get_ident()
+    threads.add(ident)
+    try:
+        yield
+    finally:
+        threads.discard(ident)
+
+
+def in_request_thread(iterable: Iterable[T]) -> Iterator[T]:
+    """
+    Wrap a sync streaming body so the threadpool thread pulling each item
+    is profiled with the request (each item may come from another thread).
+    """
+    iterator = iter(iterable)
+    while True:
+        with _serving_request():
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose sync endpoints are profiled in the threadpool thread running them."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = self._in_request_thread(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def _in_request_thread(endpoint):
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            with _serving_request():
+                return endpoint(*args, **kwargs)
+        return wrapper
+
+
+class _Sampler(threading.Thread):
+    """Background thread sampling the stacks of the threads serving one request."""
+
+    def __init__(self, interval: float, threads: set[int]):
+        super().__init__(name="toneo-profiler", daemon=True)
+        self.interval = interval
+        self.threads = threads  # Updated by the request's threads while it runs
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.samples += 1
+            frames = sys._current_frames()
+            for thread_id in frozenset(self.threads):
+                frame = frames.get(thread_id)
+                labels = []
+                in_app = False
+                while frame is not None:
+                    in_app = in_app or frame.f_code.co_filename.startswith(APP_DIR)
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                # Idle moments (the event loop waiting in select) are skipped
+                if in_app:
+                    self.stacks[";".join(reversed(labels))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware that profiles sampled or explicitly requested requests.
+
+    Not installed at all unless PROFILE_SAMPLE_RATE > 0 or ADMIN_TOKEN is set.
+    """
+
+    def __init__(
+        self,
+        app,
+        store: ProfileStore = profile_store,
+        sample_rate: Optional[float] = None,
+        interval: Optional[float] = None,
+    ):
+        self.app = app
+        self.store = store
+        self.sample_rate = settings.profile_sample_rate if sample_rate is None else sample_rate
+        self.interval = settings.profile_interval if interval is None else interval
+        self.excluded_prefix = f"{settings.api_prefix}/admin"
+        self._busy = threading.Lock()
+        self._in_flight = 0
+        self._record: Optional[ProfileRecord] = None  # Request being profiled
+
+    def _trigger(self, scope) -> Optional[str]:
+        if scope["path"].startswith(self.excluded_prefix):
+            return None
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER) == b"1":
+            token = headers.get(ADMIN_TOKEN_HEADER)
+            if token is not None and is_admin_token(token.decode("latin-1")):
+                return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self._in_flight += 1
+        record = self._record
+        if record is not None:
+            record.concurrent_requests = max(record.concurrent_requests, self._in_flight - 1)
+        try:
+            trigger = self._trigger(scope)
+            if trigger is None or not self._busy.acquire(blocking=False):
+                await self.app(scope, receive, send)
+                return
+            try:
+                await self._profile(scope, receive, send, trigger)
+            finally:
+                self._busy.release()
+        finally:
+            self._in_flight -= 1
+
+    async def _profile(self, scope, receive, send, trigger: str) -> None:
+        record = ProfileRecord(
+            id=uuid.uuid4().hex[:12],
+            created_at=time.time(),
+            method=scope["method"],
+            path=scope["path"],
+            trigger=trigger,
+            concurrent_requests=self._in_flight - 1,
+        )
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                record.status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-toneo-profile-id", record.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        # The event loop thread, plus threadpool threads while they serve this request
+        threads = {threading.get_ident()}
+        token = _request_threads.set(threads)
+        sampler = _Sampler(self.interval, threads)
+        self._record = record
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            self._record = None
+            _request_threads.reset(token)
+            record.duration_ms = (time.perf_counter() - start) * 1000
+            record.samples = sampler.samples
+            record.stacks = sampler.stacks
+            self.store.add(record)
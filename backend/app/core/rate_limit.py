@@ -4,12 +4,26 @@ Rate limiting configuration for Toneo API.
 Security: Only trust forwarded headers when behind known proxies.
 Direct clients can spoof X-Forwarded-For, so we validate the immediate
 connection IP before trusting forwarded headers.
+
+Limits are token buckets kept in Redis when REDIS_URL is set (shared by
+all workers and replicas, updated by one atomic Lua script), otherwise
+in process memory.
 """
+import functools
+import inspect
 import ipaddress
+import math
 import os
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
 from functools import lru_cache
-from fastapi import Request
-from slowapi import Limiter
+from typing import Callable
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
 
 
 # Known proxy IP ranges that we trust to set forwarded headers
@@ -42,32 +56,61 @@ TRUSTED_PROXY_RANGES = [
 ]
 
 
-@lru_cache(maxsize=1)
-def _get_trusted_networks() -> list[ipaddress.IPv4Network | ipaddress.IPv6Network]:
-    """Parse and cache trusted proxy networks."""
-    networks = []
-    for cidr in TRUSTED_PROXY_RANGES:
+class _ProxyMatcher:
+    """
+    Trusted-proxy lookup over precomputed address ranges.
+
+    Networks are turned into merged, sorted (first, last) integer ranges
+    per IP version once, so a lookup is one bisect instead of a scan over
+    every network. Results are cached per client address.
+    """
+
+    def __init__(self, cidrs: list[str]):
+        ranges: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+        for cidr in cidrs:
+            try:
+                network = ipaddress.ip_network(cidr)
+            except ValueError:
+                continue
+            ranges[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+
+        self._starts: dict[int, list[int]] = {}
+        self._ends: dict[int, list[int]] = {}
+        for version, spans in ranges.items():
+            merged: list[list[int]] = []
+            for first, last in sorted(spans):
+                if merged and first <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], last)
+                else:
+                    merged.append([first, last])
+            self._starts[version] = [first for first, _ in merged]
+            self._ends[version] = [last for _, last in merged]
+
+        self.contains = lru_cache(maxsize=4096)(self._contains)
+
+    def _contains(self, ip: str) -> bool:
         try:
-            networks.append(ipaddress.ip_network(cidr))
+            addr = ipaddress.ip_address(ip)
         except ValueError:
-            pass
-    return networks
+            return False
+        if addr.version == 6 and addr.ipv4_mapped is not None:
+            addr = addr.ipv4_mapped
+        value = int(addr)
+        index = bisect_right(self._starts[addr.version], value) - 1
+        return index >= 0 and value <= self._ends[addr.version][index]
+
+
+_trusted_proxies = _ProxyMatcher(TRUSTED_PROXY_RANGES)
+
+# In debug mode, trust all (for local development). Read once at import.
+_TRUST_ALL_PROXIES = os.getenv("DEBUG", "false").lower() == "true"
 
 
 def _is_trusted_proxy(ip: str) -> bool:
     """Check if IP is from a trusted proxy."""
-    # In debug mode, trust all (for local development)
-    if os.getenv("DEBUG", "false").lower() == "true":
-        return True
-
-    try:
-        addr = ipaddress.ip_address(ip)
-        for network in _get_trusted_networks():
-            if addr in network:
-                return True
-    except ValueError:
-        pass
-    return False
+    return _TRUST_ALL_PROXIES or _trusted_proxies.contains(ip)
 
 
 def get_real_client_ip(request: Request) -> str:
@@ -112,9 +155,226 @@ def get_real_client_ip(request: Request) -> str:
     return direct_ip
 
 
+# ============== Token bucket limiter ==============
+
+class RateLimitExceeded(HTTPException):
+    """429 with a Retry-After hint."""
+
+    def __init__(self, limit: str, retry_after: float):
+        super().__init__(
+            status_code=429,
+            detail=f"Rate limit exceeded: {limit}. Please slow down.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate: str) -> tuple[int, float]:
+    """
+    "30/minute" -> (capacity 30, refill 0.5 tokens/second).
+
+    The bucket holds one period's worth of requests, so the long-run rate
+    matches the old fixed-window limits while bursts are smoothed.
+    """
+    count, _, period = rate.partition("/")
+    seconds = _PERIODS[period.strip().rstrip("s")]
+    capacity = int(count)
+    return capacity, capacity / seconds
+
+
+class LocalBucketStore:
+    """
+    In-process token buckets (stand-in when no REDIS_URL is configured).
+
+    Limits are per worker process with this store.
+    """
+
+    # Beyond this many keys the least recently used bucket is dropped (it has
+    # been idle the longest, so it is the most likely to be full again)
+    MAX_KEYS = 100_000
+
+    def __init__(self):
+        # key -> [tokens, last update], least recently used first
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> tuple[bool, float]:
+        """Take `cost` tokens. Returns (allowed, seconds until enough are available)."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.MAX_KEYS:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[key] = [float(capacity), now]
+            else:
+                self._buckets.move_to_end(key)
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return True, 0.0
+            bucket[0] = tokens
+            return False, (cost - tokens) / rate
+
+    async def take_async(self, key: str, capacity: int, rate: float, cost: int = 1) -> tuple[bool, float]:
+        return self.take(key, capacity, rate, cost)
+
+
+# Atomic token bucket: refill from elapsed time, take `cost` tokens, and expire
+# idle buckets. Uses the server clock so all workers agree on "now".
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker and replica through Redis."""
+
+    KEY_PREFIX = "toneo:ratelimit:"
+
+    def __init__(self, url: str):
+        import redis
+        import redis.asyncio
+
+        self._client = redis.Redis.from_url(url)
+        self._async_client = redis.asyncio.Redis.from_url(url)
+        self._script = self._client.register_script(TOKEN_BUCKET_LUA)
+        self._async_script = self._async_client.register_script(TOKEN_BUCKET_LUA)
+        self._error_logged = False
+
+    def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> tuple[bool, float]:
+        try:
+            allowed, retry_after = self._script(
+                keys=[self.KEY_PREFIX + key], args=[capacity, rate, cost]
+            )
+        except Exception as e:
+            return self._fail_open(e)
+        return bool(allowed), float(retry_after)
+
+    async def take_async(self, key: str, capacity: int, rate: float, cost: int = 1) -> tuple[bool, float]:
+        try:
+            allowed, retry_after = await self._async_script(
+                keys=[self.KEY_PREFIX + key], args=[capacity, rate, cost]
+            )
+        except Exception as e:
+            return self._fail_open(e)
+        return bool(allowed), float(retry_after)
+
+    def _fail_open(self, error: Exception) -> tuple[bool, float]:
+        # An unreachable Redis must not take the API down with it
+        if not self._error_logged:
+            self._error_logged = True
+            print(f"Warning: Rate limit store unavailable, allowing requests: {error}")
+        return True, 0.0
+
+
+def _make_store(redis_url: str):
+    if redis_url:
+        try:
+            return RedisBucketStore(redis_url)
+        except ImportError:
+            print("Warning: REDIS_URL is set but the redis package is not installed; "
+                  "using per-process rate limits")
+    return LocalBucketStore()
+
+
+class Limiter:
+    """
+    Per-route, per-client token bucket limits.
+
+    `@limiter.limit("30/minute")` goes below the route decorator of an
+    endpoint that takes a `request: Request` argument; sync endpoints stay
+    sync (they run in the threadpool) and async ones stay async.
+    """
+
+    def __init__(self, key_func: Callable[[Request], str], store=None):
+        self.key_func = key_func
+        self.store = store if store is not None else _make_store(settings.redis_url)
+        self.enabled = True
+
+    def limit(self, rate: str):
+        capacity, refill = parse_rate(rate)
+
+        def decorator(func):
+            scope = f"{func.__module__}.{func.__name__}"
+
+            def key_for(args, kwargs) -> str:
+                request = kwargs.get("request")
+                if request is None:
+                    request = next(a for a in args if isinstance(a, Request))
+                return f"{scope}:{self.key_func(request)}"
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if self.enabled:
+                        allowed, retry_after = await self.store.take_async(
+                            key_for(args, kwargs), capacity, refill
+                        )
+                        if not allowed:
+                            raise RateLimitExceeded(rate, retry_after)
+                    return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    allowed, retry_after = self.store.take(key_for(args, kwargs), capacity, refill)
+                    if not allowed:
+                        raise RateLimitExceeded(rate, retry_after)
+                return func(*args, **kwargs)
+            return wrapper
+
+        return decorator
+
+    def charge(self, request: Request, rate: str, cost: int, scope: str) -> None:
+        """
+        Take `cost` tokens from the client's `scope` bucket, for limits on
+        work rather than requests (e.g. characters analyzed).
+
+        Raises:
+            RateLimitExceeded: Not enough tokens left (nothing is taken)
+        """
+        if not self.enabled or cost <= 0:
+            return
+        capacity, refill = parse_rate(rate)
+        allowed, retry_after = self.store.take(
+            f"{scope}:{self.key_func(request)}", capacity, refill, min(cost, capacity)
+        )
+        if not allowed:
+            raise RateLimitExceeded(rate, retry_after)
+
+
 # Create limiter instance using real client IP
 limiter = Limiter(key_func=get_real_client_ip)
 
 # Rate limit constants
 TTS_RATE_LIMIT = "30/minute"  # 30 TTS requests per minute per IP
 ANALYZE_RATE_LIMIT = "60/minute"  # 60 analyze requests per minute per IP
+DOCUMENT_EDIT_RATE_LIMIT = "600/minute"  # Live typing sends one edit per (debounced) keystroke
+# Characters re-analyzed by document edits: the same volume as ANALYZE_RATE_LIMIT
+# requests of the longest /api/analyze text, so edits cannot bypass it
+DOCUMENT_ANALYZE_CHAR_LIMIT = "60000/minute"
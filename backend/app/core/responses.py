@@ -0,0 +1,32 @@
+"""
+Toneo - Responses
+Fast JSON response class for large payloads.
+
+FastAPI's default path re-validates a returned model against
+`response_model` and then walks it with `jsonable_encoder`; for a
+1000-character analysis that is several times the cost of serializing
+it. Routes that return `FastJSONResponse` skip both: pydantic models are
+serialized straight to bytes by pydantic-core, and plain data goes
+through orjson when it is installed.
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response serialized without re-validation or `jsonable_encoder`."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -2,30 +2,52 @@
 Toneo - Chinese Tone Learning App
 FastAPI Backend Entry Point
 """
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+import signal
 
+from app.core import metrics
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.core.rate_limit import limiter
-from app.routers import analyze, tts, dictionary
+from app.core.profiling import ProfilingMiddleware
+from app.routers import admin, analyze, documents, tts, dictionary
+from app.services.tone_analyzer import get_analyzer
 
 
-class DataSourceMiddleware(BaseHTTPMiddleware):
-    """Add X-Data-Source header to dictionary/analyze responses for CC-CEDICT attribution."""
+class DataSourceMiddleware:
+    """
+    Add X-Data-Source header to dictionary/analyze responses for CC-CEDICT attribution.
 
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        # Add attribution header for endpoints using CC-CEDICT data
-        if request.url.path.startswith(f"{settings.api_prefix}/analyze") or \
-           request.url.path.startswith(f"{settings.api_prefix}/dictionary"):
-            response.headers["X-Data-Source"] = "CC-CEDICT"
-            response.headers["X-Data-License"] = "CC BY-SA 4.0"
-        return response
+    Pure ASGI: only the `http.response.start` message of matching routes is
+    touched; bodies (including TTS audio) pass straight through without the
+    extra task and stream BaseHTTPMiddleware puts around every response.
+    """
+
+    HEADERS = [
+        (b"x-data-source", b"CC-CEDICT"),
+        (b"x-data-license", b"CC BY-SA 4.0"),
+    ]
+
+    def __init__(self, app):
+        self.app = app
+        # Endpoints using CC-CEDICT data
+        self.prefixes = tuple(
+            f"{settings.api_prefix}/{path}" for path in ("analyze", "dictionary", "drills", "vocab")
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_attribution(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", ()), *self.HEADERS]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_attribution)
 
 
 @asynccontextmanager
@@ -33,6 +55,13 @@ async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
     print("Starting Toneo API...")
+
+    # `kill -HUP <pid>` switches to a re-imported cedict.db without a restart
+    try:
+        signal.signal(signal.SIGHUP, lambda *_: get_analyzer().dictionary.request_reload())
+    except (AttributeError, ValueError):
+        pass  # No SIGHUP on this platform, or not running in the main thread
+
     yield
     # Shutdown
     print("Shutting down Toneo API...")
@@ -45,10 +74,6 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# Rate limiting
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -56,16 +81,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Data-Source", "X-Data-License"],
+    expose_headers=["X-Data-Source", "X-Data-License", "ETag"],
 )
 
+# gzip/brotli for JSON bodies above COMPRESSION_MIN_SIZE
+app.add_middleware(CompressionMiddleware)
+
 # Data source attribution
 app.add_middleware(DataSourceMiddleware)
 
+# Request profiling (opt-in: zero overhead unless configured)
+if settings.profile_sample_rate > 0 or settings.admin_token:
+    app.add_middleware(ProfilingMiddleware)
+
 # Routers
 app.include_router(analyze.router, prefix=settings.api_prefix, tags=["analyze"])
+app.include_router(documents.router, prefix=settings.api_prefix, tags=["analyze"])
 app.include_router(tts.router, prefix=settings.api_prefix, tags=["tts"])
 app.include_router(dictionary.router, prefix=settings.api_prefix, tags=["dictionary"])
+app.include_router(admin.router, prefix=settings.api_prefix, tags=["admin"])
 
 
 @app.get("/")
@@ -87,6 +121,20 @@ async def health():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (404 unless METRICS_ENABLED=true)."""
+    if not metrics.is_enabled():
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    return PlainTextResponse(
+        metrics.render_metrics(),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+# Development server. In production, use the pre-fork server with one worker
+# per instance (incremental documents live in worker memory, see README):
+#     python -m app.prefork --workers 1 --host 0.0.0.0 --port 8000
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
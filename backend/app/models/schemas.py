@@ -3,9 +3,34 @@ Toneo API Schemas
 Pydantic models for request/response validation.
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional, TypeVar
 from enum import Enum
 
+from app.core.config import settings
+
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_new = object.__new__
+_setattr = object.__setattr__
+
+
+def construct_trusted(model: type[ModelT], values: dict) -> ModelT:
+    """
+    Build a model instance from trusted internal data, skipping validation.
+
+    About twice as fast as `model(**values)` (and faster than pydantic's
+    own `model_construct`, which still loops over every field in Python).
+    `values` must hold every field, already of the declared type; use it
+    only for data the analyzer produced itself, never for user input.
+    """
+    obj = _new(model)
+    _setattr(obj, "__dict__", values)
+    _setattr(obj, "__pydantic_fields_set__", set(values))
+    _setattr(obj, "__pydantic_extra__", None)
+    _setattr(obj, "__pydantic_private__", None)
+    return obj
+
 
 class ConfidenceLevel(str, Enum):
     """Confidence level for tone analysis."""
@@ -36,6 +61,30 @@ class ToneType(int, Enum):
 class AnalyzeRequest(BaseModel):
     """Request to analyze Chinese text."""
     text: str = Field(..., min_length=1, max_length=1000, description="Chinese text to analyze")
+    phrase_sandhi: bool = Field(
+        default=False,
+        description="Also apply tone sandhi across word boundaries (sentence-level pass)",
+    )
+    format: Literal["words", "columnar"] = Field(
+        default="words",
+        description="Response layout: one object per word, or parallel arrays (smaller for long texts)",
+    )
+
+
+class DocumentCreateRequest(BaseModel):
+    """Start an incrementally analyzed document."""
+    text: str = Field(default="", max_length=settings.document_max_chars, description="Initial text (may be empty)")
+    phrase_sandhi: bool = Field(default=False, description="Apply sandhi across word boundaries")
+
+
+class DocumentEditRequest(BaseModel):
+    """One edit to a document. Offsets count Unicode code points, not UTF-16 units."""
+    revision: int = Field(..., ge=0, description="Revision the edit was made against")
+    offset: int = Field(..., ge=0, description="Start of the edit")
+    deleted: int = Field(default=0, ge=0, description="Characters removed at offset")
+    inserted: str = Field(
+        default="", max_length=settings.document_max_chars, description="Text inserted at offset"
+    )
 
 
 class TTSRequest(BaseModel):
@@ -55,6 +104,7 @@ class SyllableInfo(BaseModel):
     pinyin: str = Field(..., description="Pinyin with tone mark")
     pinyin_num: str = Field(..., description="Pinyin with tone number")
     tone: int = Field(..., ge=1, le=5, description="Tone number (1-5)")
+    sandhi_rule: Optional[str] = Field(None, description="Cross-word sandhi rule applied to this syllable")
 
 
 class WordTone(BaseModel):
@@ -71,6 +121,9 @@ class WordTone(BaseModel):
     sandhi_rule: Optional[str] = Field(None, description="Which sandhi rule was applied")
 
     # Metadata
+    offset: Optional[int] = Field(
+        None, description="Start of the word in the analyzed text (code points)"
+    )
     hsk_level: int = Field(default=0, description="HSK level (0=not in HSK)")
     frequency: Optional[float] = Field(None, description="Zipf frequency (0-8 scale, 6+=common)")
     source: SourceType = Field(..., description="Data source")
@@ -84,6 +137,51 @@ class AnalyzeResponse(BaseModel):
     words: list[WordTone] = Field(..., description="Analysis for each word")
 
 
+class AnalyzeColumnarResponse(BaseModel):
+    """Compact analysis: parallel arrays with one entry per word."""
+    text: str = Field(..., description="Original input text")
+    words: list[str] = Field(..., description="Characters of each word")
+    offsets: list[Optional[int]] = Field(..., description="Start of each word in the text (code points)")
+    pinyin: list[str] = Field(..., description="Pinyin with tone marks (space-separated syllables)")
+    tones: list[list[int]] = Field(..., description="Tones after sandhi")
+    original_tones: list[Optional[list[int]]] = Field(..., description="Tones before sandhi (null = unchanged)")
+    confidence: list[ConfidenceLevel] = Field(..., description="Confidence level")
+
+    @classmethod
+    def from_response(cls, response: AnalyzeResponse) -> "AnalyzeColumnarResponse":
+        """Transpose a word-by-word analysis."""
+        words = response.words
+        return construct_trusted(cls, {
+            "text": response.text,
+            "words": [w.characters for w in words],
+            "offsets": [w.offset for w in words],
+            "pinyin": [w.pinyin for w in words],
+            "tones": [w.tones for w in words],
+            "original_tones": [w.original_tones for w in words],
+            "confidence": [w.confidence for w in words],
+        })
+
+
+class DocumentResponse(BaseModel):
+    """Full analysis of an incremental document."""
+    document_id: str
+    revision: int
+    words: list[WordTone]
+
+
+class DocumentDiffResponse(BaseModel):
+    """
+    Word-list change after an edit: replace `deleted` words at `start` with
+    `words`, then add `shift` to the offsets of the words after them.
+    """
+    document_id: str
+    revision: int
+    start: int = Field(..., description="Index of the first replaced word")
+    deleted: int = Field(..., description="Number of previous words replaced")
+    words: list[WordTone] = Field(..., description="Words inserted at start")
+    shift: int = Field(..., description="Added to the offsets of the words after the replaced ones")
+
+
 class VoiceInfo(BaseModel):
     """Information about a TTS voice."""
     name: str
@@ -116,3 +214,53 @@ class DictionaryEntry(BaseModel):
     frequency_tier: str = Field(default="unknown", description="Frequency tier label")
     examples: list[str] = Field(default_factory=list, description="Example sentences")
     related: list[str] = Field(default_factory=list, description="Related words")
+
+
+class DictionarySearchResult(BaseModel):
+    """One entry found by searching definitions."""
+    simplified: str = Field(..., description="Simplified characters")
+    traditional: Optional[str] = Field(None, description="Traditional characters")
+    pinyin: str = Field(..., description="Pinyin with tone marks")
+    pinyin_num: str = Field(..., description="Pinyin with tone numbers")
+    tones: list[int] = Field(..., description="Tone numbers")
+    definitions: list[str] = Field(..., description="List of definitions")
+    hsk_level: int = Field(default=0, description="HSK level (0=not in HSK)")
+    frequency: Optional[float] = Field(None, description="Zipf frequency")
+
+
+class FuzzyPinyinResult(DictionarySearchResult):
+    """One entry found by fuzzy pinyin search."""
+    distance: float = Field(..., description="How far the typed pinyin is (0 = exact, 0.5 per confusion)")
+
+
+class FuzzyPinyinResponse(BaseModel):
+    """Fuzzy pinyin candidates, closest first."""
+    query: str
+    results: list[FuzzyPinyinResult]
+
+
+class DictionarySearchResponse(BaseModel):
+    """One page of English -> Chinese search results, best match first."""
+    query: str
+    offset: int
+    limit: int
+    results: list[DictionarySearchResult]
+    next_offset: Optional[int] = Field(None, description="Offset of the next page (null = last page)")
+
+
+class DrillResponse(BaseModel):
+    """Random words of one tone pattern, in drill order."""
+    pattern: str = Field(..., description="Tone pattern, e.g. 3-3 (5 = neutral tone)")
+    hsk_level: Optional[int] = Field(None, description="HSK level filter (null = any)")
+    seed: int = Field(..., description="Drill order; send it back with next_offset to continue")
+    offset: int
+    total: int = Field(..., description="Words matching the pattern and filters")
+    words: list[DictionarySearchResult]
+    next_offset: Optional[int] = Field(None, description="Offset of the next words (null = drill exhausted)")
+
+
+class VocabPageResponse(BaseModel):
+    """One page of an HSK vocabulary list."""
+    hsk_level: int
+    results: list[DictionarySearchResult]
+    next_cursor: Optional[str] = Field(None, description="Pass as `after` for the next page (null = last page)")
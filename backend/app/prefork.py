@@ -0,0 +1,193 @@
+"""
+Toneo - Pre-fork Server
+Runs the API in N worker processes forked from one warmed-up parent, so
+the NLP resources are loaded once and shared copy-on-write.
+
+`uvicorn --workers N` spawns fresh interpreters and every worker loads
+jieba's dictionary, pypinyin's phrase tables, wordfreq's Chinese list and
+its own SQLite state again. Here the parent loads all of them, moves every
+object allocated so far out of the garbage collector's reach
+(`gc.freeze()`, so collections in the workers never write to those pages)
+and only then forks. Workers keep only what they allocate afterwards as
+private memory.
+
+The parent binds the listening socket, restarts workers that die, and
+forwards SIGTERM/SIGINT (shutdown) and SIGHUP (dictionary reload) to them.
+POSIX only.
+
+Serving the API takes one worker per instance: incremental documents live
+in the memory of one worker and the workers share the listening socket,
+so a later edit could reach another worker. Several workers are only safe
+without incremental documents and with REDIS_URL set (shared rate limits).
+
+Usage (from backend/):
+    python -m app.prefork --workers 1 --host 0.0.0.0 --port 8000
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Optional
+
+import uvicorn
+
+
+# Analyzed once in the parent: loads jieba's and wordfreq's lazy tables and
+# goes through every code path of the analyzer (sandhi, neutral tone, ...)
+WARM_UP_TEXT = "你好，我们一起学习中文吧！一个不好的东西。妈妈说这些朋友都很了不起。"
+
+# A worker dying sooner than this after starting is restarted with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+
+def warm_up() -> None:
+    """Load every lazily initialized resource the workers would load on first use."""
+    import jieba
+    from app.services.tone_analyzer import get_analyzer
+
+    jieba.initialize()
+    analyzer = get_analyzer()
+    analyzer.analyze_text(WARM_UP_TEXT)
+    analyzer.analyze_text(WARM_UP_TEXT, phrase_sandhi=True)
+    # Version check only: connections opened here are not reused after fork
+    analyzer.dictionary.snapshot()
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Listening socket shared by all workers (the kernel spreads connections)."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Arbiter:
+    """Forks and supervises the worker processes."""
+
+    def __init__(self, app, sock: socket.socket, workers: int, log_level: str = "info"):
+        self.app = app
+        self.sock = sock
+        self.num_workers = workers
+        self.log_level = log_level
+        self.workers: dict[int, float] = {}  # pid -> start time
+        self.stopping = False
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException:
+                import traceback
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+        return pid
+
+    def _run_worker(self) -> None:
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, signal.SIG_DFL)
+        gc.enable()
+        config = uvicorn.Config(self.app, log_level=self.log_level, lifespan="on")
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def signal_workers(self, sig: int) -> None:
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def _handle_stop(self, signum, frame) -> None:
+        self.stopping = True
+        self.signal_workers(signal.SIGTERM)
+
+    def _handle_reload(self, signum, frame) -> None:
+        self.signal_workers(signal.SIGHUP)
+
+    def run(self) -> int:
+        """Fork the workers and supervise them until told to stop."""
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        for _ in range(self.num_workers):
+            self.spawn()
+        print(f"Toneo pre-fork server: {self.num_workers} workers on "
+              f"{self.sock.getsockname()[:2]} (parent {os.getpid()})")
+
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.workers.pop(pid, None)
+            if self.stopping or started is None:
+                continue
+            print(f"Worker {pid} exited ({os.waitstatus_to_exitcode(status)}), restarting")
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            if not self.stopping:
+                self.spawn()
+        return 0
+
+
+def serve(host: str, port: int, workers: int, log_level: str = "info",
+          sock: Optional[socket.socket] = None) -> int:
+    """
+    Warm up, freeze and fork `workers` uvicorn workers.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind
+        workers: Number of worker processes
+        log_level: uvicorn log level for the workers
+        sock: Already bound listening socket (host/port are then ignored)
+
+    Returns:
+        Process exit code
+    """
+    # Nothing allocated during warm-up should be collected (and so written
+    # to) before it is frozen
+    gc.disable()
+
+    from app.main import app
+    warm_up()
+
+    if sock is None:
+        sock = bind_socket(host, port)
+
+    gc.freeze()
+    return Arbiter(app, sock, workers, log_level).run()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Toneo API, pre-fork server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        print("The pre-fork server needs fork(); use `uvicorn app.main:app --workers N` instead.")
+        return 1
+    if args.workers > 1:
+        from app.core.config import settings
+        shared = "incremental documents" if settings.redis_url else "incremental documents or rate limits"
+        print(f"Warning: {args.workers} workers do not share {shared}; "
+              "only one worker per instance is supported (see README)")
+    return serve(args.host, args.port, args.workers, args.log_level)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
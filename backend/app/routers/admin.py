@@ -0,0 +1,44 @@
+"""
+Toneo - Admin Router
+Operator-only endpoints (request profiles).
+
+Security notes:
+- Every route requires the X-Admin-Token header to match ADMIN_TOKEN
+- With no ADMIN_TOKEN configured the routes answer 404, as if absent
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.profiling import is_admin_token, profile_store
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Reject requests without a valid admin token."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)], include_in_schema=False)
+
+
+@router.get("/admin/profiles")
+async def list_profiles():
+    """List captured request profiles, newest first."""
+    return {"profiles": [record.summary() for record in profile_store.list()]}
+
+
+@router.get("/admin/profiles/{profile_id}")
+async def download_profile(profile_id: str) -> PlainTextResponse:
+    """Download one profile as collapsed stacks (flamegraph.pl / speedscope)."""
+    record = profile_store.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return PlainTextResponse(
+        record.collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{record.id}.txt"'},
+    )
@@ -3,20 +3,33 @@ Toneo - Analyze Router
 Text analysis endpoints.
 """
 import logging
+from tempfile import SpooledTemporaryFile
+from typing import Iterator, Union
+
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
 
-from app.models.schemas import AnalyzeRequest, AnalyzeResponse
-from app.services.tone_analyzer import get_analyzer
+from app.core.config import settings
+from app.core.http_cache import cache_headers, etag_matches, make_etag, not_modified
+from app.core.profiling import ProfiledRoute, in_request_thread
+from app.core.responses import FastJSONResponse
+from app.models.schemas import AnalyzeColumnarResponse, AnalyzeRequest, AnalyzeResponse, WordTone
+from app.services.text_stream import CHUNK_SIZE, iter_sentence_spans, iter_text_chunks
+from app.services.tone_analyzer import ToneAnalyzer, get_analyzer
 from app.core.rate_limit import limiter, ANALYZE_RATE_LIMIT
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
-@router.post("/analyze", response_model=AnalyzeResponse)
+# Sync handler: FastAPI runs it in the threadpool, so CPU-bound analysis and
+# SQLite reads (per-thread connections) don't block the event loop
+@router.post("/analyze", response_model=Union[AnalyzeResponse, AnalyzeColumnarResponse])
 @limiter.limit(ANALYZE_RATE_LIMIT)
-async def analyze_text(request: Request, analyze_request: AnalyzeRequest) -> AnalyzeResponse:
+def analyze_text(request: Request, analyze_request: AnalyzeRequest) -> FastJSONResponse:
     """
     Analyze Chinese text and return tone information.
 
@@ -24,11 +37,33 @@ async def analyze_text(request: Request, analyze_request: AnalyzeRequest) -> Ana
     - Looks up tones in CC-CEDICT dictionary
     - Falls back to pypinyin if not in dictionary
     - Applies tone sandhi rules
+    - With `phrase_sandhi`, also applies sandhi across word boundaries
+    - With `format="columnar"`, returns parallel arrays instead of word objects
+
+    The response carries a strong ETag (input + options + dictionary
+    version); a repeat request with a matching If-None-Match gets 304.
     """
     try:
         analyzer = get_analyzer()
-        result = analyzer.analyze_text(analyze_request.text)
-        return result
+        etag = make_etag(
+            "analyze",
+            analyzer.dictionary_version,
+            analyze_request.format,
+            analyze_request.phrase_sandhi,
+            analyze_request.text,
+        )
+        if_none_match = request.headers.get("if-none-match")
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, if_none_match)
+
+        result = analyzer.analyze_text(
+            analyze_request.text,
+            phrase_sandhi=analyze_request.phrase_sandhi,
+        )
+        if analyze_request.format == "columnar":
+            result = AnalyzeColumnarResponse.from_response(result)
+        # The analyzer's models are already valid: skip response_model re-validation
+        return FastJSONResponse(result, headers=cache_headers(etag))
     except Exception as e:
         # Log truncated text preview (max 20 chars) to avoid logging user content
         text_preview = analyze_request.text[:20] + "..." if len(analyze_request.text) > 20 else analyze_request.text
@@ -37,3 +72,149 @@ async def analyze_text(request: Request, analyze_request: AnalyzeRequest) -> Ana
             status_code=500,
             detail="Analysis failed. Please try again or contact support."
         )
+
+
+# Uploaded documents stay in memory up to this size, then spill to a temp file
+STREAM_SPOOL_SIZE = 1024 * 1024
+
+# Room for multipart boundaries and part headers on top of the document
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Document too large. Maximum {settings.stream_max_bytes} bytes allowed.",
+    )
+
+
+async def _limited_body(request: Request, limit: int):
+    """Request body chunks, aborting with 413 as soon as more than `limit` bytes arrive."""
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise _too_large()
+        yield chunk
+
+
+async def _spool_document(request: Request) -> SpooledTemporaryFile:
+    """
+    Copy the document (raw UTF-8 body or multipart `file` field) to a spool.
+
+    The whole body is read before the response starts: the streaming
+    response may listen on `receive` for disconnects, so the request body
+    cannot be consumed while results are being sent.
+    """
+    multipart = request.headers.get("content-type", "").startswith("multipart/form-data")
+    # Whole body, so multipart uploads are capped while they are parsed
+    # (Starlette would otherwise spool any size to disk first)
+    body_limit = settings.stream_max_bytes + (MULTIPART_OVERHEAD if multipart else 0)
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > body_limit:
+        raise _too_large()
+
+    spool = SpooledTemporaryFile(max_size=STREAM_SPOOL_SIZE)
+    size = 0
+
+    def write(data: bytes) -> None:
+        nonlocal size
+        size += len(data)
+        if size > settings.stream_max_bytes:
+            raise _too_large()
+        spool.write(data)
+
+    try:
+        if multipart:
+            parser = MultiPartParser(
+                request.headers, _limited_body(request, body_limit), max_files=1, max_fields=10
+            )
+            try:
+                form = await parser.parse()
+            except MultiPartException as e:
+                raise HTTPException(status_code=400, detail=e.message)
+            try:
+                upload = form.get("file")
+                if not isinstance(upload, UploadFile):
+                    raise HTTPException(status_code=422, detail="Expected a 'file' upload field.")
+                while data := await upload.read(CHUNK_SIZE):
+                    write(data)
+            finally:
+                await form.close()
+        else:
+            async for data in _limited_body(request, body_limit):
+                write(data)
+    except BaseException:
+        spool.close()
+        raise
+
+    if size == 0:
+        spool.close()
+        raise HTTPException(status_code=422, detail="Empty document.")
+    spool.seek(0)
+    return spool
+
+
+def _stream_analysis(
+    spool: SpooledTemporaryFile,
+    analyzer: ToneAnalyzer,
+    phrase_sandhi: bool,
+    sse: bool,
+) -> Iterator[bytes]:
+    """
+    Analyze a spooled document sentence by sentence.
+
+    Sync generator: Starlette pulls each item in the threadpool, and only
+    pulls the next one after the previous chunk was sent, so a slow client
+    pauses the analysis instead of letting output pile up in memory.
+    Word offsets are moved from their sentence to the whole document.
+    """
+    serialize = WordTone.__pydantic_serializer__.to_json
+    prefix, suffix = (b"event: word\ndata: ", b"\n\n") if sse else (b"", b"\n")
+    count = 0
+    try:
+        for start, sentence in iter_sentence_spans(iter_text_chunks(spool)):
+            words = analyzer.analyze_text(sentence, phrase_sandhi=phrase_sandhi).words
+            if words:
+                count += len(words)
+                if start:
+                    words = [
+                        w.model_copy(update={"offset": start + w.offset}) if w.offset is not None else w
+                        for w in words
+                    ]
+                yield b"".join(prefix + serialize(w) + suffix for w in words)
+        if sse:
+            yield b'event: end\ndata: {"words": %d}\n\n' % count
+    except Exception:
+        logger.exception("Streaming analysis failed after %d words", count)
+        error = b'{"error": "Analysis failed. Please try again or contact support."}'
+        yield (b"event: error\ndata: " + error + b"\n\n") if sse else (error + b"\n")
+    finally:
+        spool.close()
+
+
+@router.post(
+    "/analyze/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}, "text/event-stream": {}}}},
+)
+@limiter.limit(ANALYZE_RATE_LIMIT)
+async def analyze_stream(request: Request, phrase_sandhi: bool = False) -> StreamingResponse:
+    """
+    Analyze a long document and stream word results as they are produced.
+
+    - Body: raw UTF-8 text, or multipart/form-data with a `file` field
+    - Up to STREAM_MAX_BYTES; no per-request character cap
+    - Split into sentences incrementally; each sentence is analyzed like
+      POST /analyze, so memory is bounded by one sentence
+    - Output: NDJSON (one WordTone per line), or Server-Sent Events
+      (`word` events, then `end`) when the client accepts text/event-stream
+    - A failure mid-stream ends with an `{"error": ...}` line / `error` event
+    """
+    spool = await _spool_document(request)
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    return StreamingResponse(
+        in_request_thread(_stream_analysis(spool, get_analyzer(), phrase_sandhi, sse)),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -2,17 +2,45 @@
 Toneo - Dictionary Router
 Dictionary lookup endpoints.
 """
-from fastapi import APIRouter, HTTPException
-from pypinyin import pinyin, Style
-from pypinyin.contrib.tone_convert import to_tone
-from wordfreq import zipf_frequency
+import logging
+from functools import lru_cache
+from typing import Annotated, Iterator, Literal, Optional
 
-from app.models.schemas import DictionaryEntry
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.core import metrics
+from app.core.http_cache import cache_headers, etag_matches, make_etag, not_modified
+from app.core.metrics import DICTIONARY_LOOKUPS
+from app.core.profiling import ProfiledRoute, in_request_thread
+from app.core.responses import FastJSONResponse
+from app.models.schemas import (
+    DictionaryEntry, DictionarySearchResponse, DictionarySearchResult, DrillResponse,
+    FuzzyPinyinResponse, FuzzyPinyinResult, VocabPageResponse, construct_trusted,
+)
+from app.services.dictionary_db import IndexUnavailable
+from app.services.dictionary_search import search_definitions
+from app.services.drills import PATTERN_RE, sample_drill
+from app.services.example_sentences import get_examples
+from app.services.fuzzy_pinyin import search_pinyin
 from app.services.tone_analyzer import get_analyzer
 from app.services.pinyin_utils import extract_tone_from_pinyin
+from app.services.vocab import (
+    EXPORT_BATCH_SIZE, CursorExpired, ExportInterrupted, InvalidCursor,
+    decode_cursor, encode_cursor, to_anki, to_csv, vocab_page,
+)
+
+
+logger = logging.getLogger(__name__)
 
+router = APIRouter(route_class=ProfiledRoute)
 
-router = APIRouter()
+# format -> (media type, file extension) of /vocab/export
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "anki": ("text/plain; charset=utf-8", "txt"),
+}
 
 
 def get_frequency_tier(zipf: float | None) -> str:
@@ -28,8 +56,301 @@ def get_frequency_tier(zipf: float | None) -> str:
     return "rare"
 
 
+@lru_cache(maxsize=4096)
+def _syllable_to_marks(syllable: str) -> str:
+    # Mandarin has ~1,500 toned syllables: exports convert each one once
+    from pypinyin.contrib.tone_convert import to_tone
+
+    return to_tone(syllable)
+
+
+def numbered_to_marks(pinyin_num: str) -> str:
+    """"zhong1 guo2" -> "zhōng guó" (syllables without a tone number kept as is)."""
+    return " ".join(
+        _syllable_to_marks(part) if part and part[-1].isdigit() else part
+        for part in pinyin_num.split()
+    )
+
+
+def _index_unavailable(what: str) -> HTTPException:
+    """503 for a dictionary imported without an optional index (or without FTS5)."""
+    return HTTPException(status_code=503, detail=f"{what} not available (re-run scripts/import_cedict.py)")
+
+
+def _search_result_fields(row) -> dict:
+    """DictionarySearchResult fields from an entries row (with frequency)."""
+    return {
+        "simplified": row["simplified"],
+        "traditional": row["traditional"],
+        "pinyin": numbered_to_marks(row["pinyin"]),
+        "pinyin_num": row["pinyin"],
+        "tones": [int(t) for t in (row["tones"] or "").split(",") if t.strip().isdigit()],
+        "definitions": [d.strip() for d in (row["definitions"] or "").split(";") if d.strip()],
+        "hsk_level": row["hsk_level"] or 0,
+        "frequency": row["frequency"] / 100 if row["frequency"] else None,
+    }
+
+
+# /dictionary/search and /dictionary/fuzzy are declared before
+# /dictionary/{word}, which would otherwise capture them
+@router.get("/dictionary/search", response_model=DictionarySearchResponse)
+def search_dictionary(
+    q: Annotated[str, Query(min_length=1, max_length=100, description="English words")],
+    limit: Annotated[int, Query(ge=1, le=50)] = 20,
+    offset: Annotated[int, Query(ge=0, le=1000)] = 0,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """
+    Find Chinese words by meaning (all words of `q` must appear in a definition).
+
+    Ranked by text relevance (BM25), boosted for common words and HSK
+    vocabulary. Paginate with `offset`: `next_offset` is null on the last page.
+    """
+    timer = metrics.start_timer("dictionary_search")
+    analyzer = get_analyzer()
+    db = analyzer._get_db()
+
+    if db is None:
+        raise HTTPException(status_code=503, detail="Dictionary database not available")
+
+    etag = make_etag("dictionary_search", analyzer.dictionary_version, q, limit, offset)
+    if etag_matches(if_none_match, etag):
+        timer.lap("not_modified")
+        timer.finish()
+        return not_modified(etag, if_none_match)
+
+    try:
+        rows, has_more = search_definitions(db, q, limit, offset)
+    except IndexUnavailable:
+        raise _index_unavailable("Dictionary search index")
+    timer.lap("db_query")
+
+    results = [DictionarySearchResult(**_search_result_fields(row)) for row in rows]
+    response = DictionarySearchResponse(
+        query=q,
+        offset=offset,
+        limit=limit,
+        results=results,
+        next_offset=offset + limit if has_more else None,
+    )
+    timer.lap("response_build")
+    timer.finish()
+    return FastJSONResponse(response, headers=cache_headers(etag))
+
+
+@router.get("/dictionary/fuzzy", response_model=FuzzyPinyinResponse)
+def fuzzy_pinyin(
+    q: Annotated[str, Query(min_length=1, max_length=100, description="Pinyin, tones optional")],
+    limit: Annotated[int, Query(ge=1, le=50)] = 10,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """
+    Find words from approximate pinyin ("zong guo", "ni3hao", "lv").
+
+    Tolerates missing tones and spaces and the usual learner confusions
+    (zh/z, ch/c, sh/s, an/ang, en/eng, in/ing, ü/u), plus one typo
+    ("ni hoa"); an unfinished query matches as a prefix. Closest spelling
+    first, then tones, then frequency.
+    """
+    timer = metrics.start_timer("dictionary_fuzzy")
+    analyzer = get_analyzer()
+    db = analyzer._get_db()
+
+    if db is None:
+        raise HTTPException(status_code=503, detail="Dictionary database not available")
+
+    etag = make_etag("dictionary_fuzzy", analyzer.dictionary_version, q, limit)
+    if etag_matches(if_none_match, etag):
+        timer.lap("not_modified")
+        timer.finish()
+        return not_modified(etag, if_none_match)
+
+    try:
+        matches = search_pinyin(db, q, limit)
+    except IndexUnavailable:
+        raise _index_unavailable("Fuzzy pinyin index")
+    timer.lap("db_query")
+
+    response = FuzzyPinyinResponse(
+        query=q,
+        results=[
+            FuzzyPinyinResult(**_search_result_fields(match.row), distance=match.distance)
+            for match in matches
+        ],
+    )
+    timer.lap("response_build")
+    timer.finish()
+    return FastJSONResponse(response, headers=cache_headers(etag))
+
+
+@router.get("/drills", response_model=DrillResponse)
+def tone_drill(
+    pattern: Annotated[str, Query(pattern=PATTERN_RE.pattern, description="Tones joined by '-', e.g. 3-3")],
+    hsk: Annotated[Optional[int], Query(ge=0, le=9, description="HSK level (0 = not in HSK)")] = None,
+    frequency: Annotated[
+        Optional[list[Literal["veryCommon", "common", "uncommon", "rare", "unknown"]]],
+        Query(description="Frequency tiers to include (repeatable)"),
+    ] = None,
+    n: Annotated[int, Query(ge=1, le=50)] = 20,
+    seed: Annotated[Optional[int], Query(ge=0, lt=2**31)] = None,
+    offset: Annotated[int, Query(ge=0)] = 0,
+):
+    """
+    Random words with a tone pattern, for drilling (e.g. all 3-3 words at HSK 2).
+
+    Tones are the dictionary tones, before sandhi. Words never repeat within
+    a drill: request more with the returned `seed` and `next_offset`.
+    """
+    timer = metrics.start_timer("drills")
+    db = get_analyzer()._get_db()
+
+    if db is None:
+        raise HTTPException(status_code=503, detail="Dictionary database not available")
+
+    try:
+        drill = sample_drill(db, pattern, n, hsk_level=hsk, bands=frequency, seed=seed, offset=offset)
+    except IndexUnavailable:
+        raise _index_unavailable("Tone drill buckets")
+    timer.lap("db_query")
+
+    end = drill.offset + len(drill.rows)
+    response = DrillResponse(
+        pattern=pattern,
+        hsk_level=hsk,
+        seed=drill.seed,
+        offset=drill.offset,
+        total=drill.total,
+        words=[DictionarySearchResult(**_search_result_fields(row)) for row in drill.rows],
+        next_offset=end if end < drill.total else None,
+    )
+    timer.lap("response_build")
+    timer.finish()
+    return FastJSONResponse(response)
+
+
+@router.get("/vocab", response_model=VocabPageResponse)
+def vocab_list(
+    hsk: Annotated[int, Query(ge=0, le=9, description="HSK level (0 = words outside HSK)")],
+    after: Annotated[Optional[str], Query(max_length=64, description="next_cursor of the previous page")] = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 100,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """
+    One page of an HSK vocabulary list, in dictionary order.
+
+    Pass `next_cursor` back as `after` for the next page (null = last page).
+    A cursor from before a dictionary update is rejected with 409: start over.
+    """
+    timer = metrics.start_timer("vocab")
+    analyzer = get_analyzer()
+    db = analyzer._get_db()
+
+    if db is None:
+        raise HTTPException(status_code=503, detail="Dictionary database not available")
+
+    version = analyzer.dictionary_version
+    etag = make_etag("vocab", version, hsk, after, limit)
+    if etag_matches(if_none_match, etag):
+        timer.lap("not_modified")
+        timer.finish()
+        return not_modified(etag, if_none_match)
+
+    try:
+        after_id = decode_cursor(after, version) if after else 0
+    except CursorExpired:
+        raise HTTPException(status_code=409, detail="Dictionary updated since this cursor was issued")
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    rows = vocab_page(db, hsk, after_id, limit + 1)
+    timer.lap("db_query")
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    response = VocabPageResponse(
+        hsk_level=hsk,
+        results=[DictionarySearchResult(**_search_result_fields(row)) for row in rows],
+        next_cursor=encode_cursor(version, rows[-1]["id"]) if has_more else None,
+    )
+    timer.lap("response_build")
+    timer.finish()
+    return FastJSONResponse(response, headers=cache_headers(etag))
+
+
+def _stream_vocab(analyzer, hsk: int, fmt: str) -> Iterator[bytes]:
+    """
+    Export a vocabulary list one batch at a time.
+
+    Sync generator pulled in the threadpool: every batch is read with the
+    connection of the thread it runs on, so memory stays at one batch.
+    If the dictionary is replaced mid-export (entry ids change), raises
+    ExportInterrupted: the chunked response is then aborted, so clients see
+    a failed download rather than a file that silently ends early.
+    """
+    serialize = DictionarySearchResult.__pydantic_serializer__.to_json
+    version = analyzer.dictionary_version
+    after_id = 0
+    first = True
+    while True:
+        db = analyzer._get_db()
+        if db is None or analyzer.dictionary_version != version:
+            logger.warning("Vocabulary export of HSK %d stopped: dictionary changed", hsk)
+            if fmt == "ndjson":
+                yield b'{"error": "Dictionary updated during export. Please export again."}\n'
+            raise ExportInterrupted(f"Dictionary changed during the HSK {hsk} export")
+        rows = vocab_page(db, hsk, after_id, EXPORT_BATCH_SIZE)
+        records = [_search_result_fields(row) for row in rows]
+        if fmt == "csv":
+            yield to_csv(records, header=first).encode("utf-8")
+        elif fmt == "anki":
+            yield to_anki(records, hsk, header=first).encode("utf-8")
+        elif records:
+            yield b"".join(
+                serialize(construct_trusted(DictionarySearchResult, record)) + b"\n"
+                for record in records
+            )
+        if len(rows) < EXPORT_BATCH_SIZE:
+            return
+        after_id = rows[-1]["id"]
+        first = False
+
+
+@router.get(
+    "/vocab/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media: {} for media, _ in EXPORT_FORMATS.values()}}},
+)
+def vocab_export(
+    hsk: Annotated[int, Query(ge=0, le=9, description="HSK level (0 = words outside HSK)")],
+    format: Annotated[Literal["csv", "ndjson", "anki"], Query()] = "csv",
+) -> StreamingResponse:
+    """
+    Download a whole HSK vocabulary list, streamed as it is read.
+
+    - csv: header row, then simplified, traditional, pinyin, pinyin_num,
+      tones (space separated), definitions ("; " separated), hsk_level
+    - ndjson: one dictionary search result per line
+    - anki: tab-separated notes for Anki's text import, tagged HSK<n>
+    """
+    analyzer = get_analyzer()
+    if analyzer._get_db() is None:
+        raise HTTPException(status_code=503, detail="Dictionary database not available")
+
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"hsk{hsk}.{extension}" if hsk else f"non-hsk.{extension}"
+    return StreamingResponse(
+        in_request_thread(_stream_vocab(analyzer, hsk, format)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# Sync handler: runs in the threadpool with that thread's pooled connection
 @router.get("/dictionary/{word}", response_model=DictionaryEntry)
-async def lookup_word(word: str) -> DictionaryEntry:
+def lookup_word(
+    word: str,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+) -> FastJSONResponse:
     """
     Look up a word in the dictionary.
 
@@ -39,13 +360,27 @@ async def lookup_word(word: str) -> DictionaryEntry:
     - All definitions
     - HSK level
     - Word frequency
+
+    Entries only change with the dictionary version, so responses carry a
+    strong ETag and a matching If-None-Match is answered with 304.
     """
+    timer = metrics.start_timer("dictionary")
     analyzer = get_analyzer()
     db = analyzer._get_db()
 
     if db is None:
         raise HTTPException(status_code=503, detail="Dictionary database not available")
 
+    etag = make_etag("dictionary", analyzer.dictionary_version, word)
+    if etag_matches(if_none_match, etag):
+        timer.lap("not_modified")
+        timer.finish()
+        return not_modified(etag, if_none_match)
+
+    # Heavy NLP modules load on first use, not when the app is imported
+    from pypinyin import pinyin, Style
+    from wordfreq import zipf_frequency
+
     # Query the database (search both simplified and traditional)
     cursor = db.execute(
         """SELECT simplified, traditional, pinyin, tones, definitions, hsk_level
@@ -53,8 +388,11 @@ async def lookup_word(word: str) -> DictionaryEntry:
         (word, word)
     )
     row = cursor.fetchone()
+    timer.lap("db_query")
 
     if row is None:
+        metrics.inc(DICTIONARY_LOOKUPS, "dictionary", "miss")
+
         # Fallback: generate pinyin directly from pypinyin (no segmentation)
         py_result = pinyin(word, style=Style.TONE, heteronym=False)
         py_num_result = pinyin(word, style=Style.TONE3, heteronym=False)
@@ -67,7 +405,7 @@ async def lookup_word(word: str) -> DictionaryEntry:
         tones = [extract_tone_from_pinyin(p) for p in pinyin_marks]
 
         freq = zipf_frequency(word, 'zh')
-        return DictionaryEntry(
+        fallback_entry = DictionaryEntry(
             simplified=word,
             traditional=None,
             pinyin=" ".join(pinyin_marks),
@@ -80,6 +418,11 @@ async def lookup_word(word: str) -> DictionaryEntry:
             examples=[],
             related=[],
         )
+        timer.lap("fallback")
+        timer.finish()
+        return FastJSONResponse(fallback_entry, headers=cache_headers(etag))
+
+    metrics.inc(DICTIONARY_LOOKUPS, "dictionary", "hit")
 
     # Parse data from database
     pinyin_raw = row["pinyin"]
@@ -87,14 +430,7 @@ async def lookup_word(word: str) -> DictionaryEntry:
     tones = [int(t) for t in tones_str.split(",") if t.strip().isdigit()]
 
     # Convert numbered pinyin to tone marks
-    pinyin_parts = pinyin_raw.split()
-    pinyin_marks = []
-    for part in pinyin_parts:
-        if part and part[-1].isdigit():
-            pinyin_marks.append(to_tone(part))
-        else:
-            pinyin_marks.append(part)
-    pinyin_display = " ".join(pinyin_marks)
+    pinyin_display = numbered_to_marks(pinyin_raw)
 
     # Parse definitions (separated by semicolons in DB)
     definitions_raw = row["definitions"] or ""
@@ -105,19 +441,26 @@ async def lookup_word(word: str) -> DictionaryEntry:
     freq = zipf_frequency(simplified, 'zh')
     freq_value = round(freq, 2) if freq > 0 else None
 
-    # Find related words (same first character of simplified form)
+    # Find related words (same first character of simplified form). A range
+    # rather than LIKE: SQLite only uses an index for LIKE with NOCASE
+    # collation, so LIKE scanned the whole table.
     related = []
     if len(simplified) >= 1:
+        first = simplified[0]
         cursor = db.execute(
             """SELECT DISTINCT simplified FROM entries
-               WHERE simplified LIKE ? AND simplified != ?
+               WHERE simplified >= ? AND simplified < ? AND simplified != ?
                ORDER BY hsk_level DESC, LENGTH(simplified)
                LIMIT 5""",
-            (simplified[0] + "%", simplified)
+            (first, chr(ord(first) + 1), simplified)
         )
         related = [r["simplified"] for r in cursor.fetchall()]
+    timer.lap("related")
+
+    examples = get_examples(db, simplified)
+    timer.lap("examples")
 
-    return DictionaryEntry(
+    entry = DictionaryEntry(
         simplified=row["simplified"],
         traditional=row["traditional"],
         pinyin=pinyin_display,
@@ -127,6 +470,9 @@ async def lookup_word(word: str) -> DictionaryEntry:
         hsk_level=row["hsk_level"] or 0,
         frequency=freq_value,
         frequency_tier=get_frequency_tier(freq_value),
-        examples=[],  # Could add example sentences in future
+        examples=examples,
         related=related,
     )
+    timer.lap("response_build")
+    timer.finish()
+    return FastJSONResponse(entry, headers=cache_headers(etag))
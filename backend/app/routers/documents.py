@@ -0,0 +1,108 @@
+"""
+Toneo - Documents Router
+Incremental re-analysis for live typing.
+
+The client creates a document, then sends each edit (offset, deleted,
+inserted) against the revision it last saw; the response says which
+words to replace, so only the touched sentences are re-analyzed.
+"""
+import functools
+import logging
+
+from fastapi import APIRouter, HTTPException, Request
+
+from app.core.profiling import ProfiledRoute
+from app.core.rate_limit import (
+    limiter,
+    ANALYZE_RATE_LIMIT,
+    DOCUMENT_ANALYZE_CHAR_LIMIT,
+    DOCUMENT_EDIT_RATE_LIMIT,
+)
+from app.core.responses import FastJSONResponse
+from app.models.schemas import (
+    DocumentCreateRequest,
+    DocumentDiffResponse,
+    DocumentEditRequest,
+    DocumentResponse,
+)
+from app.services.documents import DocumentNotFound, RevisionConflict, get_document_store
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+def _analysis_budget(request: Request):
+    """Charge analyzed characters to the client (429 once its budget is spent)."""
+    return functools.partial(
+        limiter.charge, request, DOCUMENT_ANALYZE_CHAR_LIMIT, scope="documents.analyzed_chars"
+    )
+
+
+@router.post("/analyze/documents", response_model=DocumentResponse, status_code=201)
+@limiter.limit(ANALYZE_RATE_LIMIT)
+def create_document(request: Request, create_request: DocumentCreateRequest) -> FastJSONResponse:
+    """Analyze the initial text and keep it for incremental edits."""
+    try:
+        doc = get_document_store().create(
+            create_request.text, create_request.phrase_sandhi, charge=_analysis_budget(request)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return FastJSONResponse(
+        DocumentResponse.model_construct(document_id=doc.id, revision=doc.revision, words=doc.flat_words()),
+        status_code=201,
+    )
+
+
+@router.get("/analyze/documents/{document_id}", response_model=DocumentResponse)
+def get_document(document_id: str) -> FastJSONResponse:
+    """Full current analysis (to resynchronize after a 409)."""
+    try:
+        doc = get_document_store().get(document_id)
+    except DocumentNotFound:
+        raise HTTPException(status_code=404, detail="Document not found or expired.")
+    with doc.lock:
+        response = DocumentResponse.model_construct(
+            document_id=doc.id, revision=doc.revision, words=doc.flat_words()
+        )
+    return FastJSONResponse(response)
+
+
+@router.post("/analyze/documents/{document_id}/edits", response_model=DocumentDiffResponse)
+@limiter.limit(DOCUMENT_EDIT_RATE_LIMIT)
+def edit_document(request: Request, document_id: str, edit: DocumentEditRequest) -> FastJSONResponse:
+    """
+    Apply one edit and return the word-list diff.
+
+    - 404: unknown or expired document (create a new one)
+    - 409: edit based on an outdated revision (GET the document to resync)
+    - 422: edit range outside the text, or document would be too long
+    - 429: too many edits, or too many characters re-analyzed
+    """
+    try:
+        diff = get_document_store().edit(
+            document_id, edit.revision, edit.offset, edit.deleted, edit.inserted,
+            charge=_analysis_budget(request),
+        )
+    except DocumentNotFound:
+        raise HTTPException(status_code=404, detail="Document not found or expired.")
+    except RevisionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return FastJSONResponse(DocumentDiffResponse.model_construct(
+        document_id=document_id,
+        revision=diff.revision,
+        start=diff.start,
+        deleted=diff.deleted,
+        words=diff.words,
+        shift=diff.shift,
+    ))
+
+
+@router.delete("/analyze/documents/{document_id}", status_code=204)
+def delete_document(document_id: str) -> None:
+    """Forget a document (e.g. when the input is closed)."""
+    get_document_store().delete(document_id)
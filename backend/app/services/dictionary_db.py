@@ -0,0 +1,273 @@
+"""
+Toneo - Dictionary Database
+Versioned, hot-reloadable handle on the CC-CEDICT SQLite database.
+
+The importer writes a new database next to the live one and swaps it in
+with an atomic rename, so a new dictionary shows up as a new inode.
+`DictionaryDB` notices the swap (file stat, throttled) or an explicit
+reload request (SIGHUP / `request_reload()`) and switches every caller to
+the new file between requests. Requests that already hold the old
+connection keep reading the old file until they finish.
+
+Connections are pooled per thread (sqlite3 objects are bound to the
+thread that created them) and opened read-only with read-heavy pragmas.
+A forked child (pre-fork server) starts with an empty pool: SQLite
+connections must not be used across fork().
+"""
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+from urllib.parse import quote
+
+
+# Applied to every pooled connection. The database is only ever replaced
+# wholesale by the importer, never written in place, so readers need no
+# journal at all: query_only guards against accidental writes, mmap lets
+# pages be shared with the OS cache, cache_size is per connection (KiB).
+READ_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -8192",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+# SQLite errors meaning the dictionary was imported without an optional
+# table or column (older importer), or SQLite was built without FTS5
+_MISSING_INDEX_ERRORS = ("no such table", "no such column", "no such module")
+
+
+class IndexUnavailable(RuntimeError):
+    """Dictionary lacks an optional index; re-running the importer adds it."""
+
+
+def is_missing_index(error: sqlite3.OperationalError) -> bool:
+    """Whether `error` means an optional table/column/module is missing."""
+    return str(error).startswith(_MISSING_INDEX_ERRORS)
+
+
+@contextmanager
+def requires_index(unavailable: type[IndexUnavailable]) -> Iterator[None]:
+    """Turn a missing-index OperationalError inside the block into `unavailable`."""
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if is_missing_index(e):
+            raise unavailable(str(e)) from e
+        raise
+
+
+@dataclass(frozen=True)
+class DictionarySnapshot:
+    """One immutable version of the dictionary."""
+    version: str
+    stat_key: tuple[int, int, int]
+    # Caches of data read from this version (see ToneAnalyzer). They die
+    # with the snapshot, so a request still on an older version can never
+    # fill the current version's caches.
+    caches: dict = field(default_factory=dict, compare=False, repr=False)
+
+
+def _stat_key(path: Path) -> Optional[tuple[int, int, int]]:
+    """Identity of the file on disk: (inode, mtime_ns, size)."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _read_version(conn: sqlite3.Connection, stat_key: tuple[int, int, int]) -> str:
+    """Read the version stamp written by the importer, falling back to file identity."""
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    except sqlite3.Error:
+        row = None
+    if row is not None and row[0]:
+        return str(row[0])
+    inode, mtime_ns, size = stat_key
+    return f"{mtime_ns}-{inode}-{size}"
+
+
+# Every live handle, so a forked child can drop inherited connections
+_instances: "weakref.WeakSet[DictionaryDB]" = weakref.WeakSet()
+
+# Connections inherited from the parent are kept referenced but never used
+# or closed in the child, so the parent's file state is left alone
+_inherited_connections: list = []
+
+
+def _after_fork_in_child() -> None:
+    for db in list(_instances):
+        db._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class DictionaryDB:
+    """
+    Hot-reloadable CC-CEDICT database handle.
+
+    Callers should fetch `snapshot()` (or `connection()`) once per request
+    and use it for every query of that request, so a reload never splits
+    one request across two dictionary versions.
+    """
+
+    def __init__(self, path: Optional[str], check_interval: float = 5.0):
+        """
+        Args:
+            path: Path to the SQLite database (None = no dictionary).
+            check_interval: Seconds between file checks (0 disables watching).
+        """
+        self.path = Path(path) if path else None
+        self.check_interval = check_interval
+
+        self._snapshot: Optional[DictionarySnapshot] = None
+        self._next_check = 0.0
+        self._reload_requested = False
+        self._missing_warned = False
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[str], None]] = []
+        self._local = threading.local()
+        _instances.add(self)
+
+    @property
+    def version(self) -> Optional[str]:
+        """Version stamp of the active dictionary (None if unavailable)."""
+        snap = self.snapshot()
+        return snap.version if snap else None
+
+    def on_reload(self, callback: Callable[[str], None]) -> None:
+        """Register a callback run with the new version after each switch."""
+        self._callbacks.append(callback)
+
+    def request_reload(self) -> None:
+        """Ask for a reload on next access (safe to call from a signal handler)."""
+        self._reload_requested = True
+
+    def snapshot(self) -> Optional[DictionarySnapshot]:
+        """Return the current dictionary snapshot, switching versions if needed."""
+        if self.path is None:
+            return None
+
+        snap = self._snapshot
+        if snap is not None and not self._reload_requested:
+            if self.check_interval <= 0 or time.monotonic() < self._next_check:
+                return snap
+
+        return self._refresh()
+
+    def connection(self) -> Optional[sqlite3.Connection]:
+        """Return this thread's read-only connection to the current version."""
+        return self.session()[1]
+
+    def session(self) -> tuple[Optional[DictionarySnapshot], Optional[sqlite3.Connection]]:
+        """
+        Return the current snapshot with this thread's connection to it.
+
+        Both are None without a usable dictionary. Keep the pair for the
+        whole request: the connection reads exactly the snapshot's version.
+        """
+        snap = self.snapshot()
+        if snap is None:
+            return None, None
+
+        local = self._local
+        if getattr(local, "snapshot", None) is snap:
+            return snap, local.conn
+
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            print(f"Warning: Could not open database {self.path}: {e}")
+            return None, None
+        if _read_version(conn, snap.stat_key) != snap.version:
+            # File swapped since the last check: switch now rather than
+            # serve new content under the old version stamp
+            self.request_reload()
+            snap = self._refresh()
+            if snap is None:
+                return None, None
+        local.snapshot, local.conn = snap, conn
+        return snap, conn
+
+    def reload(self) -> bool:
+        """Force a re-open of the database file. Returns True if the version changed."""
+        self._reload_requested = True
+        before = self._snapshot
+        after = self._refresh()
+        return after is not None and (before is None or after.version != before.version)
+
+    def _refresh(self) -> Optional[DictionarySnapshot]:
+        with self._lock:
+            forced = self._reload_requested
+            self._reload_requested = False
+            self._next_check = time.monotonic() + self.check_interval
+
+            current = self._snapshot
+            key = _stat_key(self.path)
+            if key is None:
+                if current is None and not self._missing_warned:
+                    self._missing_warned = True
+                    print(f"Warning: Database not found at {self.path}")
+                # Keep serving the last good version if the file vanished mid-swap
+                return current
+
+            if current is not None and not forced and key == current.stat_key:
+                return current
+
+            new_snap = self._open(key)
+            if new_snap is None:
+                return current
+            if current is not None and new_snap.version == current.version:
+                # Same content (e.g. touched file): just track the new identity
+                self._snapshot = DictionarySnapshot(current.version, key, current.caches)
+                return self._snapshot
+
+            # Atomic switch: old connections stay valid for whoever still holds
+            # them and are closed by garbage collection once the last request
+            # drops them (each thread opens a new one on its next call).
+            self._snapshot = new_snap
+
+        if current is not None:
+            print(f"Dictionary reloaded: {current.version} -> {new_snap.version}")
+        for callback in self._callbacks:
+            callback(new_snap.version)
+        return new_snap
+
+    def _reset_after_fork(self) -> None:
+        """Forget the parent's pooled connections and locks (child process only)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            _inherited_connections.append(conn)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a read-only connection tuned for lookups."""
+        uri = f"file:{quote(str(self.path.resolve()))}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True)
+        conn.row_factory = sqlite3.Row
+        for pragma in READ_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _open(self, key: tuple[int, int, int]) -> Optional[DictionarySnapshot]:
+        try:
+            conn = self._connect()
+            try:
+                version = _read_version(conn, key)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Warning: Could not open database {self.path}: {e}")
+            return None
+        return DictionarySnapshot(version=version, stat_key=key)
@@ -0,0 +1,97 @@
+"""
+Toneo - Dictionary Search
+English -> Chinese reverse lookup over CC-CEDICT definitions.
+
+Backed by the FTS5 index built by scripts/import_cedict.py
+(`definitions_fts`). Matches are ranked by BM25, boosted for frequent
+words (wordfreq Zipf, stored by the importer) and for HSK vocabulary,
+earlier levels more.
+"""
+import re
+import sqlite3
+from typing import Optional
+
+from app.services.dictionary_db import IndexUnavailable, requires_index
+
+
+# Longest query handled (terms beyond this are ignored)
+MAX_TERMS = 8
+
+# Matches ranked per query. The importer numbers entries from most to least
+# frequent and FTS5 returns matches in rowid order, so for a very common
+# term ("to", "surname") this keeps the most frequent words that match and
+# skips scoring tens of thousands of rare ones.
+MAX_CANDIDATES = 2000
+
+# Rank = bm25 * (1 + boosts). bm25 is negative (lower = better), so a
+# boost of 1.0 doubles a match's weight. Zipf 8 (the most common words)
+# scores FREQUENCY_WEIGHT * 8; HSK 1 scores HSK_WEIGHT * 0.9, HSK 9 * 0.1.
+FREQUENCY_WEIGHT = 0.25
+HSK_WEIGHT = 1.0
+
+_TERM_RE = re.compile(r"[^\W_]+")
+
+SEARCH_SQL = f"""
+    WITH matches AS (
+        SELECT rowid AS id, bm25(definitions_fts) AS score
+        FROM definitions_fts
+        WHERE definitions_fts MATCH ?
+        LIMIT {MAX_CANDIDATES}
+    )
+    SELECT e.simplified, e.traditional, e.pinyin, e.tones, e.definitions,
+           e.hsk_level, e.frequency
+    FROM matches m
+    JOIN entries e ON e.id = m.id
+    ORDER BY m.score * (
+        1.0
+        + {FREQUENCY_WEIGHT} * e.frequency / 100.0
+        + CASE WHEN e.hsk_level > 0 THEN {HSK_WEIGHT} * (10 - e.hsk_level) / 10.0 ELSE 0.0 END
+    ), e.id
+    LIMIT ? OFFSET ?
+"""
+
+
+class SearchUnavailable(IndexUnavailable):
+    """Dictionary imported without the definition index (or without FTS5)."""
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query matching every word.
+
+    Terms are quoted, so FTS5 operators and punctuation in user input are
+    never interpreted.
+
+    Returns:
+        The MATCH expression, or None if `query` has no searchable word
+    """
+    terms = _TERM_RE.findall(query.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def search_definitions(
+    db: sqlite3.Connection, query: str, limit: int, offset: int = 0
+) -> tuple[list[sqlite3.Row], bool]:
+    """
+    Entries whose definitions match `query`, best first.
+
+    Args:
+        db: Dictionary connection
+        query: English words (all must match)
+        limit: Page size
+        offset: Number of results to skip
+
+    Returns:
+        (rows of this page, whether more results follow)
+
+    Raises:
+        SearchUnavailable: The dictionary has no search index
+    """
+    match = build_match_query(query)
+    if match is None:
+        return [], False
+    with requires_index(SearchUnavailable):
+        rows = db.execute(SEARCH_SQL, (match, limit + 1, offset)).fetchall()
+    return rows[:limit], len(rows) > limit
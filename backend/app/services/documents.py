@@ -0,0 +1,295 @@
+"""
+Toneo - Incremental Documents
+Server-side documents for live re-analysis while the user types.
+
+A document is kept as its sentences, each with the words analyzed for
+it. An edit re-splits the new text (cheap), keeps every sentence in the
+unchanged prefix and suffix, re-analyzes only the sentences in between
+(reusing any sentence text already analyzed in this document), and
+reports the change as one splice of the word list.
+
+Words are analyzed (and cached) per sentence, with offsets relative to
+their sentence; they are moved to document offsets as they are sent, so
+a reused sentence only needs its new start. Words after the splice keep
+their analysis but move by the change in length (`WordDiff.shift`).
+
+State is per process, bounded by total characters (LRU eviction) and
+expires after DOCUMENT_TTL seconds without access. Clients treat 404 as
+"document gone" and create a new one.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.models.schemas import WordTone
+from app.services.text_stream import iter_sentence_spans
+from app.services.tone_analyzer import ToneAnalyzer, get_analyzer
+
+
+class DocumentNotFound(KeyError):
+    """Unknown or expired document id."""
+
+
+class RevisionConflict(ValueError):
+    """Edit made against an outdated revision."""
+
+
+@dataclass
+class Document:
+    """One live document."""
+    id: str
+    text: str
+    phrase_sandhi: bool
+    dictionary_version: Optional[str]
+    sentences: list[str]
+    starts: list[int]  # Offset of each sentence in `text`
+    words: list[list[WordTone]]  # Per sentence, offsets relative to the sentence
+    revision: int = 0
+    last_access: float = field(default_factory=time.monotonic)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def flat_words(self) -> list[WordTone]:
+        return _placed(self.starts, self.words)
+
+
+@dataclass(frozen=True)
+class WordDiff:
+    """
+    Replace `deleted` words starting at word index `start` with `words`,
+    then add `shift` to the offsets of the words after them.
+    """
+    revision: int
+    start: int
+    deleted: int
+    words: list[WordTone]
+    shift: int
+
+
+def split_sentences(text: str) -> tuple[list[str], list[int]]:
+    """Sentences of a whole text and their starts (same splitter as the streaming endpoint)."""
+    spans = list(iter_sentence_spans([text])) if text else []
+    return [s for _, s in spans], [start for start, _ in spans]
+
+
+def _placed(starts: list[int], words: list[list[WordTone]]) -> list[WordTone]:
+    """Per-sentence words with offsets moved to their sentence's start."""
+    return [
+        w.model_copy(update={"offset": start + w.offset}) if w.offset is not None else w
+        for start, sentence_words in zip(starts, words)
+        for w in sentence_words
+    ]
+
+
+class DocumentStore:
+    """LRU + TTL bounded map of live documents."""
+
+    def __init__(
+        self,
+        analyzer: Optional[ToneAnalyzer] = None,
+        ttl: Optional[float] = None,
+        max_chars: Optional[int] = None,
+    ):
+        self._analyzer = analyzer
+        self.ttl = settings.document_ttl if ttl is None else ttl
+        self.max_chars = settings.document_store_max_chars if max_chars is None else max_chars
+        self._documents: OrderedDict[str, Document] = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    @property
+    def analyzer(self) -> ToneAnalyzer:
+        return self._analyzer or get_analyzer()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def create(
+        self,
+        text: str,
+        phrase_sandhi: bool = False,
+        charge: Optional[Callable[[int], None]] = None,
+    ) -> Document:
+        """
+        Analyze `text` as a new document (ValueError if it is too long).
+
+        `charge`, if given, is called with the number of characters about to
+        be analyzed before any work is done, and may raise to refuse.
+        """
+        if len(text) > settings.document_max_chars:
+            raise ValueError(f"Document too long. Maximum {settings.document_max_chars} characters allowed.")
+        if charge is not None:
+            charge(len(text))
+        analyzer = self.analyzer
+        sentences, starts = split_sentences(text)
+        doc = Document(
+            id=secrets.token_urlsafe(12),
+            text=text,
+            phrase_sandhi=phrase_sandhi,
+            dictionary_version=analyzer.dictionary_version,
+            sentences=sentences,
+            starts=starts,
+            words=[self._analyze(analyzer, s, phrase_sandhi) for s in sentences],
+        )
+        with self._lock:
+            self._documents[doc.id] = doc
+            self._chars += len(text)
+            self._evict(time.monotonic())
+        return doc
+
+    def get(self, document_id: str) -> Document:
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            doc = self._documents.get(document_id)
+            if doc is None:
+                raise DocumentNotFound(document_id)
+            doc.last_access = now
+            self._documents.move_to_end(document_id)
+            return doc
+
+    def delete(self, document_id: str) -> None:
+        with self._lock:
+            doc = self._documents.pop(document_id, None)
+            if doc is not None:
+                self._chars -= len(doc.text)
+
+    def edit(
+        self,
+        document_id: str,
+        revision: int,
+        offset: int,
+        deleted: int,
+        inserted: str,
+        charge: Optional[Callable[[int], None]] = None,
+    ) -> WordDiff:
+        """
+        Apply one edit and re-analyze the sentences it touched.
+
+        Args:
+            document_id: Document to edit
+            revision: Revision the edit was made against
+            offset: Start of the edit (characters / code points)
+            deleted: Number of characters removed at `offset`
+            inserted: Text inserted at `offset`
+            charge: Called with the number of characters about to be
+                re-analyzed, before any analysis; may raise to refuse the
+                edit (the document is left unchanged)
+
+        Returns:
+            WordDiff turning the previous word list into the new one
+
+        Raises:
+            DocumentNotFound: Unknown or expired document
+            RevisionConflict: `revision` is not the current revision
+            ValueError: Edit range outside the text, or document too long
+        """
+        doc = self.get(document_id)
+        analyzer = self.analyzer
+        with doc.lock:
+            if revision != doc.revision:
+                raise RevisionConflict(f"Document is at revision {doc.revision}, edit was for {revision}")
+            if offset > len(doc.text) or offset + deleted > len(doc.text):
+                raise ValueError("Edit range is outside the document")
+            text = doc.text[:offset] + inserted + doc.text[offset + deleted:]
+            if len(text) > settings.document_max_chars:
+                raise ValueError(f"Document too long. Maximum {settings.document_max_chars} characters allowed.")
+
+            old_sentences, old_words = doc.sentences, doc.words
+            new_sentences, new_starts = split_sentences(text)
+            shift = len(text) - len(doc.text)
+
+            version = analyzer.dictionary_version
+            if version != doc.dictionary_version:
+                # New dictionary: nothing cached is trustworthy any more
+                prefix = suffix = 0
+                known = {}
+            else:
+                # Kept sentences must also keep their place: same start in
+                # the prefix, same distance from the end in the suffix
+                prefix = _common_prefix(
+                    list(zip(doc.starts, old_sentences)), list(zip(new_starts, new_sentences))
+                )
+                suffix = _common_suffix(
+                    [(start - len(doc.text), s) for start, s in zip(doc.starts, old_sentences)],
+                    [(start - len(text), s) for start, s in zip(new_starts, new_sentences)],
+                    prefix,
+                )
+                known = {s: w for s, w in zip(old_sentences[prefix:len(old_sentences) - suffix],
+                                               old_words[prefix:len(old_words) - suffix])}
+
+            middle = new_sentences[prefix:len(new_sentences) - suffix]
+            if charge is not None:
+                charge(sum(len(s) for s in middle if s not in known))
+            middle_words = [
+                known[s] if s in known else self._analyze(analyzer, s, doc.phrase_sandhi)
+                for s in middle
+            ]
+
+            start = sum(len(w) for w in old_words[:prefix])
+            removed = sum(len(w) for w in old_words[prefix:len(old_words) - suffix])
+
+            doc.words = old_words[:prefix] + middle_words + old_words[len(old_words) - suffix:]
+            doc.sentences = new_sentences
+            doc.starts = new_starts
+            doc.dictionary_version = version
+            doc.revision += 1
+            with self._lock:
+                # An evicted document was already subtracted at its old length
+                if self._documents.get(doc.id) is doc:
+                    self._chars += len(text) - len(doc.text)
+            doc.text = text
+
+            return WordDiff(
+                revision=doc.revision,
+                start=start,
+                deleted=removed,
+                words=_placed(new_starts[prefix:len(new_starts) - suffix], middle_words),
+                shift=shift,
+            )
+
+    @staticmethod
+    def _analyze(analyzer: ToneAnalyzer, sentence: str, phrase_sandhi: bool) -> list[WordTone]:
+        return analyzer.analyze_text(sentence, phrase_sandhi=phrase_sandhi).words
+
+    def _evict(self, now: float) -> None:
+        """Drop expired documents, then least recently used ones over budget (lock held)."""
+        documents = self._documents
+        while documents:
+            doc_id, doc = next(iter(documents.items()))
+            if now - doc.last_access < self.ttl and self._chars <= self.max_chars:
+                break
+            del documents[doc_id]
+            self._chars -= len(doc.text)
+
+
+def _common_prefix(a: list, b: list) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def _common_suffix(a: list, b: list, prefix: int) -> int:
+    """Length of the common tail, not overlapping the common prefix."""
+    n = 0
+    limit = min(len(a), len(b)) - prefix
+    while n < limit and a[-1 - n] == b[-1 - n]:
+        n += 1
+    return n
+
+
+_store: Optional[DocumentStore] = None
+
+
+def get_document_store() -> DocumentStore:
+    """Get or create the process-wide document store."""
+    global _store
+    if _store is None:
+        _store = DocumentStore()
+    return _store
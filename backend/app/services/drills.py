@@ -0,0 +1,180 @@
+"""
+Toneo - Tone Drills
+Random words of one tone pattern ("3-3", "4-2-5"...) for drilling.
+
+The importer (scripts/import_cedict.py, build_drill_buckets) files every
+all-hanzi entry into a bucket per tone pattern x HSK level x frequency
+band and numbers the words of each bucket 0..size-1 (`drill_words`,
+primary key = bucket + slot); `drill_buckets` holds the bucket sizes. A
+drill reads the sizes of the buckets it covers, picks slots and fetches
+each word by primary key: the cost depends on the number of words asked
+for, never on the size of the dictionary.
+
+Slots are drawn from a seeded permutation of the selected buckets, so a
+drill never repeats a word and a client can page through a whole bucket
+(same seed, growing offset) without seeing a word twice. The permutation
+is a small keyed Feistel network over the next power of two (even bit
+count), cycle-walked back into range: the i-th slot is computed directly,
+in a few rounds, without materializing the order.
+"""
+import bisect
+import random
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import Optional
+
+from app.services.dictionary_db import IndexUnavailable, requires_index
+
+
+# (label, lowest Zipf frequency), most common first; the labels match the
+# dictionary's frequency_tier. Words without a known frequency are "unknown".
+FREQUENCY_BANDS = (
+    ("veryCommon", 6.0),
+    ("common", 4.0),
+    ("uncommon", 2.0),
+    ("rare", 0.0),
+)
+UNKNOWN_BAND = "unknown"
+
+BAND_IDS = {label: i for i, (label, _) in enumerate(FREQUENCY_BANDS)}
+BAND_IDS[UNKNOWN_BAND] = len(FREQUENCY_BANDS)
+
+PATTERN_RE = re.compile(r"^[1-5](-[1-5]){0,3}$")
+
+_ENTRY_COLUMNS = "e.simplified, e.traditional, e.pinyin, e.tones, e.definitions, e.hsk_level, e.frequency"
+
+
+class DrillsUnavailable(IndexUnavailable):
+    """Dictionary imported without the drill buckets."""
+
+
+@dataclass(frozen=True)
+class Drill:
+    rows: list[sqlite3.Row]
+    total: int  # Words in the selected buckets
+    seed: int
+    offset: int
+
+
+def frequency_band(frequency: Optional[int]) -> int:
+    """Band id of an entries.frequency value (Zipf x 100, 0 = unknown)."""
+    if not frequency:
+        return BAND_IDS[UNKNOWN_BAND]
+    zipf = frequency / 100
+    for band, (_, lowest) in enumerate(FREQUENCY_BANDS):
+        if zipf >= lowest:
+            return band
+    return BAND_IDS["rare"]
+
+
+def tone_pattern(tones: str) -> str:
+    """entries.tones ("3,3") -> drill pattern ("3-3")."""
+    return tones.replace(",", "-")
+
+
+# Feistel rounds of the slot permutation (4 make a good shuffle of small domains)
+FEISTEL_ROUNDS = 4
+
+_MIX = 0x9E3779B97F4A7C15  # 2^64 / golden ratio
+_MASK64 = (1 << 64) - 1
+
+
+@dataclass(frozen=True)
+class _Permutation:
+    """Keyed bijection of range(total); `perm[i]` is the i-th slot."""
+    total: int
+    half_bits: int
+    keys: tuple[int, ...]
+
+    def _feistel(self, value: int) -> int:
+        mask = (1 << self.half_bits) - 1
+        left, right = value >> self.half_bits, value & mask
+        for key in self.keys:
+            mixed = ((right ^ key) * _MIX) & _MASK64
+            left, right = right, left ^ ((mixed ^ (mixed >> 29)) & mask)
+        return (left << self.half_bits) | right
+
+    def __getitem__(self, index: int) -> int:
+        # Cycle-walking: the Feistel domain is under 4x total, so a few steps at most on average
+        value = self._feistel(index)
+        while value >= self.total:
+            value = self._feistel(value)
+        return value
+
+
+def _permutation(seed: int, total: int) -> _Permutation:
+    """Seeded permutation of the `total` slots of a drill."""
+    rng = random.Random(seed)
+    half_bits = max(1, ((total - 1).bit_length() + 1) // 2)
+    return _Permutation(total, half_bits, tuple(rng.getrandbits(64) for _ in range(FEISTEL_ROUNDS)))
+
+
+def sample_drill(
+    db: sqlite3.Connection,
+    pattern: str,
+    n: int,
+    hsk_level: Optional[int] = None,
+    bands: Optional[list[str]] = None,
+    seed: Optional[int] = None,
+    offset: int = 0,
+) -> Drill:
+    """
+    Up to `n` distinct words with tone pattern `pattern`.
+
+    Args:
+        db: Dictionary connection
+        pattern: Dictionary tones joined by "-" (5 = neutral)
+        n: Number of words
+        hsk_level: Only words of this HSK level (0 = not in HSK); None = any
+        bands: Only these frequency bands (FREQUENCY_BANDS labels); None = any
+        seed: Permutation to draw from; None = a new random one
+        offset: Position in the permutation (offset + n continues a drill)
+
+    Raises:
+        DrillsUnavailable: The dictionary has no drill buckets
+    """
+    if seed is None:
+        seed = random.getrandbits(31)
+
+    sql = "SELECT hsk_level, band, size FROM drill_buckets WHERE pattern = ?"
+    params: list = [pattern]
+    if hsk_level is not None:
+        sql += " AND hsk_level = ?"
+        params.append(hsk_level)
+    if bands is not None:
+        sql += f" AND band IN ({','.join('?' * len(bands))})"
+        params.extend(BAND_IDS[label] for label in bands)
+    with requires_index(DrillsUnavailable):
+        buckets = db.execute(sql + " ORDER BY hsk_level, band", params).fetchall()
+
+    # Slots of the selected buckets laid end to end
+    ends = []
+    total = 0
+    for bucket in buckets:
+        total += bucket["size"]
+        ends.append(total)
+
+    picks = []
+    permutation = _permutation(seed, total)
+    for i in range(offset, min(offset + n, total)):
+        slot = permutation[i]
+        index = bisect.bisect_right(ends, slot)
+        bucket = buckets[index]
+        first = ends[index - 1] if index else 0
+        picks.append((len(picks), bucket["hsk_level"], bucket["band"], slot - first))
+
+    rows = []
+    if picks:
+        values = ",".join("(?, ?, ?, ?)" for _ in picks)
+        rows = db.execute(
+            f"""WITH picks(ord, hsk_level, band, slot) AS (VALUES {values})
+                SELECT {_ENTRY_COLUMNS}
+                FROM picks p
+                JOIN drill_words d ON d.pattern = ? AND d.hsk_level = p.hsk_level
+                    AND d.band = p.band AND d.slot = p.slot
+                JOIN entries e ON e.id = d.entry_id
+                ORDER BY p.ord""",
+            [value for pick in picks for value in pick] + [pattern],
+        ).fetchall()
+    return Drill(rows=rows, total=total, seed=seed, offset=offset)
@@ -0,0 +1,37 @@
+"""
+Toneo - Example Sentences
+Example sentences for dictionary entries.
+
+scripts/import_cedict.py (build_example_index) segments a local sentence
+corpus (Tatoeba TSV) once and keeps, for every dictionary word, the ids
+of its best few sentences: shortest and easiest first, difficulty being
+the highest HSK level of the words in the sentence. Looking up a word's
+examples is then one primary-key range read of `word_examples`.
+
+Sentences from Tatoeba (https://tatoeba.org), CC BY 2.0 FR.
+"""
+import sqlite3
+
+from app.services.dictionary_db import is_missing_index
+
+
+def get_examples(db: sqlite3.Connection, word: str) -> list[str]:
+    """
+    Example sentences for a simplified headword, best first.
+
+    Returns:
+        The sentences, or [] if the dictionary was imported without a corpus
+    """
+    try:
+        rows = db.execute(
+            """SELECT s.text FROM word_examples w
+               JOIN sentences s ON s.id = w.sentence_id
+               WHERE w.word = ?
+               ORDER BY w.rank""",
+            (word,),
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        if is_missing_index(e):
+            return []
+        raise
+    return [row[0] for row in rows]
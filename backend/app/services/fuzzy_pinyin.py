@@ -0,0 +1,185 @@
+"""
+Toneo - Fuzzy Pinyin Search
+Find dictionary entries from pinyin typed the way learners type it.
+
+The importer stores `entries.pinyin_key` (pinyin_utils.fuzzy_pinyin_key:
+toneless, unspaced, each syllable with zh/z, ch/c, sh/s, -ng/-n and ü/u
+folded), indexed together with frequency. A query is folded the same
+way (every reading of it, when unspaced input is ambiguous), so every
+spelling of the same confusion class is one indexed equality lookup.
+When that finds nothing, the query may be misspelled or still being
+typed: candidates are then the keys one edit away from it (insertion,
+deletion, substitution or swap of adjacent letters), looked up on the
+same index, plus a prefix range. Candidates are ranked by a
+confusion-weighted edit distance to their exact pinyin, tones (when the
+query has them) and frequency; misspelled candidates further than
+MAX_EDIT_DISTANCE are dropped.
+"""
+import sqlite3
+from dataclasses import dataclass
+
+from app.services.dictionary_db import IndexUnavailable, requires_index
+from app.services.pinyin_utils import fuzzy_pinyin_keys, pinyin_tones, plain_pinyin
+
+
+# Candidates read per lookup (most frequent first), before ranking
+MAX_CANDIDATES = 300
+
+# Edit costs: a folded confusion is cheaper than an unrelated typo
+CONFUSION_COST = 0.5
+TONE_MISMATCH_COST = 0.3
+# Extra distance for entries that only match the query as a prefix
+PREFIX_COST = 1.0
+# Furthest misspelled candidate kept (one typo plus a few confusions)
+MAX_EDIT_DISTANCE = 2.0
+
+# Longest key whose one-edit variants are looked up (about 50 per letter)
+MAX_EDIT_KEY_LENGTH = 24
+
+# Letters of folded keys (v is folded into u)
+_KEY_LETTERS = "abcdefghijklmnopqrstuwxyz"
+
+_ENTRY_COLUMNS = "id, simplified, traditional, pinyin, tones, definitions, hsk_level, frequency"
+
+
+class FuzzyIndexUnavailable(IndexUnavailable):
+    """Dictionary imported without `entries.pinyin_key`."""
+
+
+@dataclass(frozen=True)
+class FuzzyMatch:
+    row: sqlite3.Row
+    distance: float
+
+
+def _is_confusion(prev: str, char: str) -> bool:
+    """Inserting/deleting `char` after `prev` only toggles a folded confusion."""
+    return (char == "h" and prev in ("z", "c", "s")) or (char == "g" and prev == "n")
+
+
+def confusion_distance(typed: str, target: str) -> float:
+    """
+    Edit distance between two plain pinyin strings (plain_pinyin output).
+
+    Dropping/adding the h of zh/ch/sh or the g of -ng and swapping ü/u
+    cost CONFUSION_COST; any other edit, including swapping two adjacent
+    letters, costs 1.
+    """
+    before_previous: list[float] = []
+    previous = [0.0]
+    for j in range(1, len(target) + 1):
+        cost = CONFUSION_COST if _is_confusion(target[j - 2] if j > 1 else "", target[j - 1]) else 1.0
+        previous.append(previous[-1] + cost)
+
+    for i in range(1, len(typed) + 1):
+        a = typed[i - 1]
+        a_prev = typed[i - 2] if i > 1 else ""
+        delete = CONFUSION_COST if _is_confusion(a_prev, a) else 1.0
+        current = [previous[0] + delete]
+        for j in range(1, len(target) + 1):
+            b = target[j - 1]
+            b_prev = target[j - 2] if j > 1 else ""
+            if a == b:
+                substitute = 0.0
+            elif {a, b} == {"u", "v"}:
+                substitute = CONFUSION_COST
+            else:
+                substitute = 1.0
+            insert = CONFUSION_COST if _is_confusion(b_prev, b) else 1.0
+            best = min(
+                previous[j - 1] + substitute,
+                previous[j] + delete,
+                current[j - 1] + insert,
+            )
+            if a_prev == b and b_prev == a and a != b:
+                best = min(best, before_previous[j - 2] + 1.0)
+            current.append(best)
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+def one_edit_keys(key: str) -> set[str]:
+    """Keys one insertion, deletion, substitution or adjacent swap away from `key`."""
+    variants = set()
+    for i in range(len(key) + 1):
+        head, tail = key[:i], key[i:]
+        for c in _KEY_LETTERS:
+            variants.add(head + c + tail)
+            if tail:
+                variants.add(head + c + tail[1:])
+        if tail:
+            variants.add(head + tail[1:])
+        if len(tail) > 1:
+            variants.add(head + tail[1] + tail[0] + tail[2:])
+    variants.discard(key)
+    return variants
+
+
+def _rank(query: str, candidates: list[tuple[sqlite3.Row, bool]]) -> list[FuzzyMatch]:
+    """Rank (row, matched only as a prefix) candidates; one match per entry, best first."""
+    typed = plain_pinyin(query)
+    typed_tones = pinyin_tones(query)
+    best: dict[int, FuzzyMatch] = {}
+    for row, prefix in candidates:
+        target = plain_pinyin(row["pinyin"])
+        if prefix:
+            target = target[:len(typed)]
+        distance = confusion_distance(typed, target) + (PREFIX_COST if prefix else 0.0)
+        tones = [int(t) for t in (row["tones"] or "").split(",") if t.strip().isdigit()]
+        if typed_tones and len(typed_tones) == len(tones):
+            distance += TONE_MISMATCH_COST * sum(a != b for a, b in zip(typed_tones, tones))
+        match = best.get(row["id"])
+        if match is None or distance < match.distance:
+            best[row["id"]] = FuzzyMatch(row, distance)
+    matches = list(best.values())
+    matches.sort(key=lambda m: (m.distance, -(m.row["frequency"] or 0), len(m.row["simplified"])))
+    return matches
+
+
+def _lookup(db: sqlite3.Connection, keys: list[str]) -> list[sqlite3.Row]:
+    return db.execute(
+        f"SELECT {_ENTRY_COLUMNS} FROM entries WHERE pinyin_key IN ({','.join('?' * len(keys))}) "
+        "ORDER BY frequency DESC LIMIT ?",
+        (*keys, MAX_CANDIDATES),
+    ).fetchall()
+
+
+def search_pinyin(db: sqlite3.Connection, query: str, limit: int) -> list[FuzzyMatch]:
+    """
+    Entries whose pinyin is close to `query`, best first.
+
+    Args:
+        db: Dictionary connection
+        query: Pinyin with or without tones/spaces ("zong guo", "ni3hao", "lv")
+        limit: Number of results
+
+    Raises:
+        FuzzyIndexUnavailable: The dictionary has no pinyin_key column
+    """
+    keys = fuzzy_pinyin_keys(query)
+    if not keys:
+        return []
+    with requires_index(FuzzyIndexUnavailable):
+        rows = _lookup(db, keys)
+        if rows:
+            return _rank(query, [(row, False) for row in rows])[:limit]
+
+        # Misspelled: keys one edit away
+        variants = sorted({v for key in keys if len(key) <= MAX_EDIT_KEY_LENGTH for v in one_edit_keys(key)})
+        edited = _lookup(db, variants) if variants else []
+        # Still typing: keys are lowercase a-z, so "{" sorts after every
+        # continuation and the range stays on the index
+        prefixed = []
+        for key in keys:
+            prefixed.extend(db.execute(
+                f"SELECT {_ENTRY_COLUMNS} FROM entries WHERE pinyin_key > ? AND pinyin_key < ? "
+                "ORDER BY frequency DESC LIMIT ?",
+                (key, key + "{", MAX_CANDIDATES),
+            ).fetchall())
+    typed = plain_pinyin(query)
+    candidates = [
+        (row, False) for row in edited
+        if confusion_distance(typed, plain_pinyin(row["pinyin"])) <= MAX_EDIT_DISTANCE
+    ]
+    candidates += [(row, True) for row in prefixed]
+    return _rank(query, candidates)[:limit]
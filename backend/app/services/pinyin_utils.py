@@ -2,6 +2,8 @@
 Toneo - Pinyin Utilities
 Helper functions for pinyin tone conversion.
 """
+import re
+
 
 # Tone mark to number mapping
 TONE_MARKS = {
@@ -93,3 +95,147 @@ def change_pinyin_tone(pinyin_str: str, new_tone: int) -> str:
             return pinyin_str.replace(char, new_mark)
 
     return pinyin_str  # No tone mark found, return as-is
+
+
+# Standard Mandarin syllables, toneless, with ü written v
+PINYIN_SYLLABLES = frozenset("""
+a ai an ang ao ba bai ban bang bao bei ben beng bi bian biao bie bin bing bo bu
+ca cai can cang cao ce cei cen ceng cha chai chan chang chao che chen cheng chi
+chong chou chu chua chuai chuan chuang chui chun chuo ci cong cou cu cuan cui cun
+cuo da dai dan dang dao de dei den deng di dia dian diao die ding diu dong dou du
+duan dui dun duo e ei en eng er fa fan fang fei fen feng fo fou fu ga gai gan gang
+gao ge gei gen geng gong gou gu gua guai guan guang gui gun guo ha hai han hang hao
+he hei hen heng hong hou hu hua huai huan huang hui hun huo ji jia jian jiang jiao
+jie jin jing jiong jiu ju juan jue jun ka kai kan kang kao ke kei ken keng kong kou
+ku kua kuai kuan kuang kui kun kuo la lai lan lang lao le lei leng li lia lian liang
+liao lie lin ling liu lo long lou lu luan lun luo lv lve ma mai man mang mao me mei
+men meng mi mian miao mie min ming miu mo mou mu na nai nan nang nao ne nei nen neng
+ni nian niang niao nie nin ning niu nong nou nu nuan nuo nv nve o ou pa pai pan pang
+pao pei pen peng pi pian piao pie pin ping po pou pu qi qia qian qiang qiao qie qin
+qing qiong qiu qu quan que qun ran rang rao re ren reng ri rong rou ru rua ruan rui
+run ruo sa sai san sang sao se sen seng sha shai shan shang shao she shei shen sheng
+shi shou shu shua shuai shuan shuang shui shun shuo si song sou su suan sui sun suo
+ta tai tan tang tao te teng ti tian tiao tie ting tong tou tu tuan tui tun tuo wa
+wai wan wang wei wen weng wo wu xi xia xian xiang xiao xie xin xing xiong xiu xu
+xuan xue xun ya yan yang yao ye yi yin ying yo yong you yu yuan yue yun za zai zan
+zang zao ze zei zen zeng zha zhai zhan zhang zhao zhe zhei zhen zheng zhi zhong zhou
+zhu zhua zhuai zhuan zhuang zhui zhun zhuo zi zong zou zu zuan zui zun zuo
+""".split())
+
+# Longest syllable ("zhuang")
+_MAX_SYLLABLE = 6
+
+# Segmentations kept for ambiguous unspaced input ("changan", "xian")
+MAX_SEGMENTATIONS = 4
+
+# Learner confusions folded together by fold_syllable
+_INITIAL_FOLDS = (("zh", "z"), ("ch", "c"), ("sh", "s"))
+
+# Tone marks -> base letter, ü and the u: / v spellings -> v, digits dropped
+_PLAIN_TABLE = str.maketrans({
+    **{mark: ("v" if base == "ü" else base) for mark, (base, _) in TONE_MARKS.items()},
+    "ü": "v",
+})
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def plain_pinyin(text: str) -> str:
+    """
+    Toneless letters of a pinyin string, without separators.
+
+    "Nǐ hǎo", "ni3 hao3", "ni3hao" → "nihao"; "lu:4", "lǜ", "lv" → "lv"
+    """
+    return "".join(_WORD_RE.findall(_plain_text(text)))
+
+
+def _plain_text(text: str) -> str:
+    return text.lower().replace("u:", "v").translate(_PLAIN_TABLE)
+
+
+def _segmentations(word: str) -> list[list[str]]:
+    """
+    Best ways to cut an unspaced run of letters into syllables.
+
+    Fewest letters outside syllables first (typos), then fewest pieces;
+    ties ("chang an" / "chan gan") are all kept, up to MAX_SEGMENTATIONS.
+    """
+    # best[i] = (cost, segmentations of word[:i])
+    best: list[tuple[tuple[int, int], list[list[str]]]] = [((0, 0), [[]])]
+    for end in range(1, len(word) + 1):
+        candidates = {}
+        for start in range(max(0, end - _MAX_SYLLABLE), end):
+            (invalid, pieces), heads = best[start]
+            piece = word[start:end]
+            cost = (invalid + (0 if piece in PINYIN_SYLLABLES else len(piece)), pieces + 1)
+            candidates.setdefault(cost, []).extend(head + [piece] for head in heads)
+        cost = min(candidates)
+        best.append((cost, candidates[cost][:MAX_SEGMENTATIONS]))
+    return best[-1][1]
+
+
+def split_pinyin(text: str) -> list[list[str]]:
+    """
+    Syllables of a pinyin string, toneless (ü → v).
+
+    Spaces, apostrophes and tone digits separate syllables; unspaced runs
+    are cut into syllables, keeping every equally good reading (at most
+    MAX_SEGMENTATIONS). Pieces that are not syllables (typos) are kept.
+
+    "zhong1 guo2", "zhōngguó" → [["zhong", "guo"]];
+    "changan" → [["chang", "an"], ["chan", "gan"]]
+    """
+    readings: list[list[str]] = [[]]
+    for word in _WORD_RE.findall(_plain_text(text)):
+        readings = [
+            head + tail for head in readings for tail in _segmentations(word)
+        ][:MAX_SEGMENTATIONS]
+    return readings if readings[0] else []
+
+
+def fold_syllable(syllable: str) -> str:
+    """
+    Fold one syllable's common learner confusions.
+
+    zh/z, ch/c, sh/s, a final -ng/-n (an/ang, en/eng, in/ing) and ü/u.
+    """
+    for source, target in _INITIAL_FOLDS:
+        if syllable.startswith(source):
+            syllable = target + syllable[2:]
+            break
+    if syllable.endswith("ng") and len(syllable) > 2:
+        syllable = syllable[:-1]
+    return syllable.replace("v", "u")
+
+
+def fuzzy_pinyin_keys(text: str) -> list[str]:
+    """fuzzy_pinyin_key() of every reading of `text` (see split_pinyin)."""
+    keys = []
+    for syllables in split_pinyin(text):
+        key = "".join(fold_syllable(s) for s in syllables)
+        if key not in keys:
+            keys.append(key)
+    return keys
+
+
+def fuzzy_pinyin_key(text: str) -> str:
+    """
+    Lookup key that folds common learner confusions together.
+
+    Syllables are folded one by one (fold_syllable), then joined; tones
+    and spaces are ignored, so "zong guo", "zhong1guo2" and "zhōngguó"
+    share the key "zonguo", and "chan an" / "chang an" share "chanan".
+    """
+    keys = fuzzy_pinyin_keys(text)
+    return keys[0] if keys else ""
+
+
+def pinyin_tones(text: str) -> list[int]:
+    """Tones written in a pinyin string, as digits or marks, in order."""
+    tones = []
+    for c in text:
+        if c in "12345":
+            tones.append(int(c))
+        elif c in TONE_MARKS:
+            tones.append(TONE_MARKS[c][1])
+    return tones
@@ -0,0 +1,106 @@
+"""
+Toneo - Text Streaming
+Incremental decoding and sentence splitting for documents analyzed as a
+stream, so memory stays bounded by one sentence regardless of size.
+"""
+import codecs
+import re
+from typing import BinaryIO, Iterable, Iterator
+
+
+# Read size for spooled uploads
+CHUNK_SIZE = 64 * 1024
+
+# Longest sentence analyzed in one piece (same cap as AnalyzeRequest.text);
+# longer runs without punctuation are cut at a comma or, failing that, hard
+MAX_SENTENCE_CHARS = 1000
+
+# Sentence end (runs like "？！" or "..."), plus any closing quotes/brackets
+_BOUNDARY_RE = re.compile(r"[。！？!?；;\n…]+[”’」』）)\"']*")
+_SOFT_BREAKS = "，,、：: "
+
+
+def iter_text_chunks(file: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Decode a UTF-8 file chunk by chunk (multi-byte characters may straddle chunks)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    while True:
+        data = file.read(chunk_size)
+        if not data:
+            break
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _hard_split(text: str, max_chars: int) -> int:
+    """Where to cut an over-long sentence: after the last soft break, else at max_chars."""
+    window = text[:max_chars]
+    cut = max(window.rfind(c) for c in _SOFT_BREAKS) + 1
+    return cut if cut > 0 else max_chars
+
+
+def iter_sentences(chunks: Iterable[str], max_chars: int = MAX_SENTENCE_CHARS) -> Iterator[str]:
+    """
+    Split streamed text into sentences as the text arrives.
+
+    Sentences keep their punctuation; whitespace-only pieces are dropped.
+    A boundary at the very end of the buffer is held back until more text
+    arrives, since closing quotes may follow in the next chunk.
+
+    Args:
+        chunks: Text pieces in document order
+        max_chars: Longest sentence yielded
+
+    Yields:
+        Sentences, each at most `max_chars` characters
+    """
+    for _, sentence in iter_sentence_spans(chunks, max_chars):
+        yield sentence
+
+
+def iter_sentence_spans(
+    chunks: Iterable[str], max_chars: int = MAX_SENTENCE_CHARS
+) -> Iterator[tuple[int, str]]:
+    """
+    iter_sentences(), with where each sentence starts in the whole text.
+
+    Yields:
+        (start offset in code points, sentence)
+    """
+    buffer = ""
+    consumed = 0  # Characters of the text before `buffer`
+    for chunk in chunks:
+        buffer += chunk
+        start = 0
+        for match in _BOUNDARY_RE.finditer(buffer):
+            end = match.end()
+            if end == len(buffer):
+                break
+            while end - start > max_chars:
+                cut = start + _hard_split(buffer[start:end], max_chars)
+                yield from _non_blank(consumed + start, buffer[start:cut])
+                start = cut
+            yield from _non_blank(consumed + start, buffer[start:end])
+            start = end
+        buffer = buffer[start:]
+        consumed += start
+
+        while len(buffer) > max_chars:
+            cut = _hard_split(buffer, max_chars)
+            yield from _non_blank(consumed, buffer[:cut])
+            buffer = buffer[cut:]
+            consumed += cut
+
+    while buffer:
+        cut = _hard_split(buffer, max_chars) if len(buffer) > max_chars else len(buffer)
+        yield from _non_blank(consumed, buffer[:cut])
+        buffer = buffer[cut:]
+        consumed += cut
+
+
+def _non_blank(start: int, sentence: str) -> Iterator[tuple[int, str]]:
+    if sentence.strip():
+        yield start, sentence
@@ -8,26 +8,27 @@ Uses:
 - wordfreq for word frequency
 - CC-CEDICT (SQLite) for dictionary lookup
 """
-import jieba
-from pypinyin import pinyin, Style
-from pypinyin.contrib.tone_convert import to_tone
-from wordfreq import zipf_frequency
-from zhon.hanzi import characters as hanzi_chars, punctuation as hanzi_punct
+from zhon.hanzi import characters as hanzi_chars
 import sqlite3
 import re
-from pathlib import Path
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from functools import lru_cache
 
 # Pre-compiled regex for Chinese character detection (faster than 'in' checks)
 _HANZI_RE = re.compile(f'[{hanzi_chars}]')
+# Maximal runs of Chinese characters: the only spans that get segmented
+_HANZI_RUN_RE = re.compile(f'[{hanzi_chars}]+')
 
+from app.core import metrics
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS, DICTIONARY_LOOKUPS, NULL_TIMER
 from app.models.schemas import (
-    WordTone, SyllableInfo, AnalyzeResponse,
+    WordTone, SyllableInfo, AnalyzeResponse, construct_trusted,
     ConfidenceLevel, SourceType
 )
-from app.services.tone_sandhi import apply_tone_sandhi
+from app.services.dictionary_db import DictionaryDB
+from app.services.tone_sandhi import apply_tone_sandhi, apply_phrase_sandhi
 from app.services.pinyin_utils import (
     extract_tone_from_pinyin,
     pinyin_to_numbered,
@@ -35,6 +36,28 @@ from app.services.pinyin_utils import (
 )
 
 
+# jieba, pypinyin and wordfreq take ~0.4s to import and are only needed once
+# text is analyzed, so they are bound here on first use by load_nlp() (every
+# ToneAnalyzer calls it; app.prefork warms it up before forking)
+jieba = pinyin = Style = to_tone = zipf_frequency = None
+
+
+def load_nlp() -> None:
+    """Import the NLP libraries into this module (no-op once loaded)."""
+    global jieba, pinyin, Style, to_tone, zipf_frequency
+    if jieba is not None:
+        return
+    import jieba as jieba_module
+    from pypinyin import pinyin as pinyin_func, Style as PinyinStyle
+    from pypinyin.contrib.tone_convert import to_tone as to_tone_func
+    from wordfreq import zipf_frequency as zipf_func
+
+    jieba_module.setLogLevel(20)  # Suppress debug logs
+    pinyin, Style, to_tone, zipf_frequency = pinyin_func, PinyinStyle, to_tone_func, zipf_func
+    # Bound last: other threads only skip loading once everything is set
+    jieba = jieba_module
+
+
 @dataclass
 class DictEntry:
     """Dictionary entry from CC-CEDICT."""
@@ -46,6 +69,16 @@ class DictEntry:
     hsk_level: int
 
 
+@dataclass
+class ReadingCaches:
+    """Lookups read from one dictionary version (kept on its snapshot)."""
+    # word -> distinct readings
+    candidates: dict[str, tuple[DictEntry, ...]] = field(default_factory=dict)
+    traditional: dict[str, tuple[DictEntry, ...]] = field(default_factory=dict)
+    # str.translate table, traditional -> simplified code point
+    traditional_chars: Optional[dict[int, int]] = None
+
+
 class ToneAnalyzer:
     """
     Analyzes Chinese text and extracts tone information.
@@ -60,63 +93,184 @@ class ToneAnalyzer:
                      If None, uses pypinyin only (no dictionary lookup).
         """
         self.db_path = db_path
-        self._db_conn: Optional[sqlite3.Connection] = None
+        self.dictionary = DictionaryDB(
+            db_path, check_interval=settings.dictionary_reload_interval
+        )
+
+        load_nlp()
 
-        # Initialize jieba
-        jieba.setLogLevel(20)  # Suppress debug logs
+    @property
+    def dictionary_version(self) -> Optional[str]:
+        """Version stamp of the dictionary currently being served."""
+        return self.dictionary.version
 
     def _get_db(self) -> Optional[sqlite3.Connection]:
-        """Get database connection (lazy loading)."""
-        if self.db_path is None:
-            return None
-
-        if self._db_conn is None:
-            db_file = Path(self.db_path)
-            if db_file.exists():
-                self._db_conn = sqlite3.connect(str(db_file))
-                self._db_conn.row_factory = sqlite3.Row
-            else:
-                print(f"Warning: Database not found at {self.db_path}")
-                return None
+        """
+        Get this thread's read-only connection to the current dictionary.
 
-        return self._db_conn
+        Fetch it once per request: a hot reload swaps the connection
+        between calls, never in the middle of a caller's queries.
+        """
+        return self.dictionary.connection()
+
+    def _get_session(self) -> tuple[Optional[sqlite3.Connection], ReadingCaches]:
+        """
+        Get this thread's connection with the caches of its dictionary version.
+
+        Fetch both once per request and pass them along together: caches
+        live on the dictionary snapshot, so a request that started before a
+        reload only ever fills the old version's caches.
+        """
+        snap, db = self.dictionary.session()
+        if snap is None:
+            return db, ReadingCaches()
+        return db, snap.caches.setdefault("readings", ReadingCaches())
 
     def _lookup_dict(self, word: str) -> Optional[DictEntry]:
         """
-        Look up word in CC-CEDICT database.
+        Look up word in the current CC-CEDICT database.
 
         Args:
             word: Chinese word (simplified)
 
         Returns:
-            DictEntry if found, None otherwise
+            First DictEntry if found, None otherwise
+        """
+        candidates = self._lookup_candidates(word)
+        return candidates[0] if candidates else None
+
+    def _lookup_candidates(
+        self,
+        word: str,
+        session: Optional[tuple[Optional[sqlite3.Connection], ReadingCaches]] = None,
+        traditional: bool = False,
+    ) -> tuple[DictEntry, ...]:
+        """
+        All distinct CC-CEDICT readings for a word (cached per dictionary version).
+
+        Entries sharing a reading collapse into one, preferring a real
+        meaning over surname/variant-only entries.
+
+        Args:
+            word: Chinese word
+            session: (connection, caches) from `_get_session()` (defaults to the
+                current dictionary)
+            traditional: Match the traditional headword instead of the simplified one
         """
-        db = self._get_db()
+        db, caches = session or self._get_session()
+        cache = caches.traditional if traditional else caches.candidates
+        cached = cache.get(word)
+        if cached is not None:
+            metrics.inc(CACHE_REQUESTS, "candidates", "hit")
+            return cached
+        metrics.inc(CACHE_REQUESTS, "candidates", "miss")
+
         if db is None:
-            return None
+            return ()
 
         cursor = db.execute(
             "SELECT simplified, traditional, pinyin, tones, definitions, hsk_level "
-            "FROM entries WHERE simplified = ? LIMIT 1",
+            f"FROM entries WHERE {'traditional' if traditional else 'simplified'} = ?",
             (word,)
         )
-        row = cursor.fetchone()
-
-        if row is None:
-            return None
-
-        # Parse tones from comma-separated string
-        tones_str = row["tones"] or ""
-        tones = [int(t) for t in tones_str.split(",") if t.strip().isdigit()]
-
-        return DictEntry(
-            simplified=row["simplified"],
-            traditional=row["traditional"],
-            pinyin=row["pinyin"],
-            tones=tones,
-            definition=row["definitions"],
-            hsk_level=row["hsk_level"] or 0,
+
+        by_reading: dict[str, DictEntry] = {}
+        for row in cursor:
+            entry = _row_to_entry(row)
+            reading = _normalize_reading(entry.pinyin)
+            current = by_reading.get(reading)
+            if current is None or (_is_minor_sense(current) and not _is_minor_sense(entry)):
+                by_reading[reading] = entry
+        candidates = tuple(by_reading.values())
+
+        if len(cache) >= CANDIDATE_CACHE_SIZE:
+            cache.clear()
+        cache[word] = candidates
+        return candidates
+
+    def _get_traditional_chars(
+        self, session: tuple[Optional[sqlite3.Connection], ReadingCaches]
+    ) -> dict[int, int]:
+        """
+        Traditional -> simplified character table (loaded once per dictionary version).
+
+        Empty without a dictionary, or with one imported before the table
+        existed (which also lacks the traditional index, so traditional
+        lookups stay off).
+        """
+        db, caches = session
+        table = caches.traditional_chars
+        if table is None:
+            table = {}
+            if db is not None:
+                try:
+                    rows = db.execute("SELECT traditional, simplified FROM traditional_chars")
+                    table = {ord(t): ord(s) for t, s in rows}
+                except sqlite3.OperationalError:
+                    pass
+            caches.traditional_chars = table
+        return table
+
+    def _choose_reading(
+        self,
+        word: str,
+        candidates: tuple[DictEntry, ...],
+        prev_word: str,
+        next_word: str,
+        session: Optional[tuple[Optional[sqlite3.Connection], ReadingCaches]] = None,
+    ) -> tuple[DictEntry, ConfidenceLevel]:
+        """
+        Pick the reading of a polyphonic word from its context.
+
+        1. Single-character words: a neighbour bigram that is itself a
+           dictionary word (的确, 行走...) fixes the reading; if both
+           neighbours form words, the more frequent bigram wins.
+        2. Otherwise prefer readings with a real meaning over surname or
+           variant-only entries, and among those pypinyin's phrase-aware
+           reading of the word in its context (MEDIUM confidence). If that
+           reading is none of several plausible ones → LOW confidence.
+        """
+        if len(candidates) == 1:
+            return candidates[0], ConfidenceLevel.HIGH
+
+        by_reading = {_normalize_reading(c.pinyin): c for c in candidates}
+
+        # 1. Bigram context from the dictionary
+        if len(word) == 1:
+            best: Optional[tuple[float, DictEntry]] = None
+            contexts = []
+            if prev_word and _HANZI_RE.match(prev_word[-1]):
+                contexts.append((prev_word[-1] + word, 1))
+            if next_word and _HANZI_RE.match(next_word[0]):
+                contexts.append((word + next_word[0], 0))
+            for bigram, pos in contexts:
+                bigram_entries = self._lookup_candidates(bigram, session)
+                if len(bigram_entries) != 1:
+                    continue
+                syllables = bigram_entries[0].pinyin.split()
+                if len(syllables) != 2:
+                    continue
+                entry = by_reading.get(_normalize_reading(syllables[pos]))
+                if entry is None:
+                    continue
+                freq = _cached_zipf_frequency(bigram) or 0.0
+                if best is None or freq > best[0]:
+                    best = (freq, entry)
+            if best is not None:
+                return best[1], ConfidenceLevel.HIGH
+
+        # 2. Real meanings, ranked by pypinyin's reading in context
+        plausible = [c for c in candidates if not _is_minor_sense(c)] or list(candidates)
+        context_reading = _context_reading(
+            prev_word[-1:] if prev_word else "", word, next_word[:1] if next_word else ""
+        )
+        chosen = next(
+            (c for c in plausible if _normalize_reading(c.pinyin) == context_reading),
+            None,
         )
+        if chosen is not None or len(plausible) == 1:
+            return chosen or plausible[0], ConfidenceLevel.MEDIUM
+        return plausible[0], ConfidenceLevel.LOW
 
     def _get_pinyin_for_char(self, char: str) -> tuple[str, int]:
         """
@@ -134,86 +288,94 @@ class ToneAnalyzer:
 
         return char, 5  # Fallback
 
-    def _analyze_word_pypinyin(self, word: str) -> WordTone:
+    def _analyze_word_pypinyin(
+        self, word: str, timer=NULL_TIMER, offset: Optional[int] = None
+    ) -> WordTone:
         """
         Analyze a word using pypinyin (fallback when not in dictionary).
         """
-        chars = list(word)
         syllables = []
         tones = []
 
-        for char in chars:
+        # Phrase-aware readings for the whole word (None if it mixes scripts)
+        word_readings = _word_pinyin(word)
+
+        for i, char in enumerate(word):
             # Skip non-Chinese characters
             if not self._is_chinese_char(char):
-                syllables.append(SyllableInfo(
-                    char=char,
-                    pinyin=char,
-                    pinyin_num=char,
-                    tone=5,
-                ))
+                syllables.append(_syllable(char, char, char, 5))
                 tones.append(5)
                 continue
 
-            pinyin_mark, tone = self._get_pinyin_for_char(char)
+            if word_readings is not None:
+                pinyin_mark = word_readings[i]
+                tone = extract_tone_from_pinyin(pinyin_mark)
+            else:
+                pinyin_mark, tone = self._get_pinyin_for_char(char)
             pinyin_num = pinyin_to_numbered(pinyin_mark)
 
-            syllables.append(SyllableInfo(
-                char=char,
-                pinyin=pinyin_mark,
-                pinyin_num=pinyin_num,
-                tone=tone,
-            ))
+            syllables.append(_syllable(char, pinyin_mark, pinyin_num, tone))
             tones.append(tone)
 
+        timer.lap("fallback")
+
+        frequency = self._get_frequency(word)
+        timer.lap("frequency")
+
         # Apply tone sandhi
-        sandhi_result = apply_tone_sandhi(chars, tones)
+        sandhi_result = apply_tone_sandhi(word, tones)
 
         # Update tones and pinyin marks if sandhi was applied
         if sandhi_result.has_sandhi:
             for i, syl in enumerate(syllables):
                 if sandhi_result.modified_tones[i] != tones[i]:
-                    new_tone = sandhi_result.modified_tones[i]
-                    new_pinyin = change_pinyin_tone(syl.pinyin, new_tone)
-                    syllables[i] = SyllableInfo(
-                        char=syl.char,
-                        pinyin=new_pinyin,
-                        pinyin_num=syl.pinyin_num.rstrip('12345') + str(new_tone),
-                        tone=new_tone,
-                    )
+                    syllables[i] = _retone_syllable(syl, sandhi_result.modified_tones[i])
+        timer.lap("sandhi")
 
         # Build full pinyin string
         full_pinyin = " ".join(s.pinyin for s in syllables)
         full_pinyin_num = " ".join(s.pinyin_num for s in syllables)
 
-        return WordTone(
-            characters=word,
-            pinyin=full_pinyin,
-            pinyin_num=full_pinyin_num,
-            tones=sandhi_result.modified_tones,
-            syllables=syllables,
-            original_tones=tones if sandhi_result.has_sandhi else None,
-            has_sandhi=sandhi_result.has_sandhi,
-            sandhi_rule=sandhi_result.rule_applied,
-            hsk_level=0,
-            frequency=self._get_frequency(word),
-            source=SourceType.PYPINYIN,
-            confidence=ConfidenceLevel.MEDIUM,
-            definition=None,
-        )
-
-    def _analyze_word_dict(self, word: str, entry: DictEntry) -> WordTone:
+        return construct_trusted(WordTone, {
+            "characters": word,
+            "pinyin": full_pinyin,
+            "pinyin_num": full_pinyin_num,
+            "tones": sandhi_result.modified_tones,
+            "syllables": syllables,
+            "original_tones": tones if sandhi_result.has_sandhi else None,
+            "has_sandhi": sandhi_result.has_sandhi,
+            "sandhi_rule": sandhi_result.rule_applied,
+            "offset": offset,
+            "hsk_level": 0,
+            "frequency": frequency,
+            "source": SourceType.PYPINYIN,
+            # A lone polyphonic character has no phrase to disambiguate it
+            "confidence": (
+                ConfidenceLevel.LOW
+                if len(word) == 1 and _has_tone_ambiguity(word)
+                else ConfidenceLevel.MEDIUM
+            ),
+            "definition": None,
+        })
+
+    def _analyze_word_dict(
+        self,
+        word: str,
+        entry: DictEntry,
+        confidence: ConfidenceLevel = ConfidenceLevel.HIGH,
+        timer=NULL_TIMER,
+        offset: Optional[int] = None,
+    ) -> WordTone:
         """
         Analyze a word using dictionary data.
         """
-        chars = list(word)
-
         # Parse pinyin syllables from dictionary
         # CC-CEDICT format: "zhong1 guo2" (space-separated, numbered)
         pinyin_parts = entry.pinyin.split()
         syllables = []
         tones = entry.tones.copy() if entry.tones else []
 
-        for i, char in enumerate(chars):
+        for i, char in enumerate(word):
             if i < len(pinyin_parts):
                 py_num = pinyin_parts[i]
                 # Extract tone number
@@ -224,58 +386,48 @@ class ToneAnalyzer:
                 if i >= len(tones):
                     tones.append(tone)
 
-                syllables.append(SyllableInfo(
-                    char=char,
-                    pinyin=py_mark,
-                    pinyin_num=py_num,
-                    tone=tone,
-                ))
+                syllables.append(_syllable(char, py_mark, py_num, tone))
             else:
                 # Fallback to pypinyin for missing syllables
                 py_mark, tone = self._get_pinyin_for_char(char)
-                syllables.append(SyllableInfo(
-                    char=char,
-                    pinyin=py_mark,
-                    pinyin_num=pinyin_to_numbered(py_mark),
-                    tone=tone,
-                ))
+                syllables.append(_syllable(char, py_mark, pinyin_to_numbered(py_mark), tone))
                 tones.append(tone)
 
+        timer.lap("dict_build")
+
+        frequency = self._get_frequency(word)
+        timer.lap("frequency")
+
         # Apply tone sandhi
-        sandhi_result = apply_tone_sandhi(chars, tones)
+        sandhi_result = apply_tone_sandhi(word, tones)
 
         # Update tones and pinyin marks if sandhi was applied
         if sandhi_result.has_sandhi:
             for i, syl in enumerate(syllables):
                 if sandhi_result.modified_tones[i] != tones[i]:
-                    new_tone = sandhi_result.modified_tones[i]
-                    new_pinyin = change_pinyin_tone(syl.pinyin, new_tone)
-                    syllables[i] = SyllableInfo(
-                        char=syl.char,
-                        pinyin=new_pinyin,
-                        pinyin_num=syl.pinyin_num.rstrip('12345') + str(new_tone),
-                        tone=new_tone,
-                    )
+                    syllables[i] = _retone_syllable(syl, sandhi_result.modified_tones[i])
+        timer.lap("sandhi")
 
         # Build full pinyin strings
         full_pinyin = " ".join(s.pinyin for s in syllables)
         full_pinyin_num = " ".join(s.pinyin_num for s in syllables)
 
-        return WordTone(
-            characters=word,
-            pinyin=full_pinyin,
-            pinyin_num=full_pinyin_num,
-            tones=sandhi_result.modified_tones,
-            syllables=syllables,
-            original_tones=tones if sandhi_result.has_sandhi else None,
-            has_sandhi=sandhi_result.has_sandhi,
-            sandhi_rule=sandhi_result.rule_applied,
-            hsk_level=entry.hsk_level,
-            frequency=self._get_frequency(word),
-            source=SourceType.DICTIONARY,
-            confidence=ConfidenceLevel.HIGH,
-            definition=entry.definition,
-        )
+        return construct_trusted(WordTone, {
+            "characters": word,
+            "pinyin": full_pinyin,
+            "pinyin_num": full_pinyin_num,
+            "tones": sandhi_result.modified_tones,
+            "syllables": syllables,
+            "original_tones": tones if sandhi_result.has_sandhi else None,
+            "has_sandhi": sandhi_result.has_sandhi,
+            "sandhi_rule": sandhi_result.rule_applied,
+            "offset": offset,
+            "hsk_level": entry.hsk_level,
+            "frequency": frequency,
+            "source": SourceType.DICTIONARY,
+            "confidence": confidence,
+            "definition": entry.definition,
+        })
 
     def _is_chinese_char(self, char: str) -> bool:
         """Check if character is Chinese using zhon library."""
@@ -293,49 +445,206 @@ class ToneAnalyzer:
         return _cached_zipf_frequency(word)
 
 
-    def _contains_chinese(self, text: str) -> bool:
-        """Check if text contains any Chinese characters."""
-        return any(self._is_chinese_char(c) for c in text)
+    def _apply_phrase_sandhi(self, words: list[WordTone], phrase_ids: list[int]) -> None:
+        """
+        Apply cross-word sandhi to analyzed words in place.
 
+        Changed syllables carry the rule in `sandhi_rule`; the word keeps its
+        pre-sandhi tones in `original_tones`.
+        """
+        result = apply_phrase_sandhi(
+            [w.characters for w in words],
+            [w.tones for w in words],
+            phrase_ids,
+        )
 
-    def analyze_text(self, text: str) -> AnalyzeResponse:
+        for i in result.changed_words:
+            word = words[i]
+            new_tones = result.modified_tones[i]
+            rules = result.syllable_rules[i]
+            for j, rule in enumerate(rules):
+                if rule is not None:
+                    word.syllables[j] = _retone_syllable(word.syllables[j], new_tones[j], rule)
+
+            if word.original_tones is None:
+                word.original_tones = word.tones
+            word.tones = new_tones
+            word.has_sandhi = True
+            word_rules = [word.sandhi_rule] if word.sandhi_rule else []
+            for rule in dict.fromkeys(r for r in rules if r is not None):
+                word_rules.append(rule)
+            word.sandhi_rule = " + ".join(word_rules)
+            word.pinyin = " ".join(s.pinyin for s in word.syllables)
+            word.pinyin_num = " ".join(s.pinyin_num for s in word.syllables)
+
+    def analyze_text(self, text: str, phrase_sandhi: bool = False) -> AnalyzeResponse:
         """
         Analyze Chinese text and extract tone information.
 
         Args:
             text: Chinese text to analyze
+            phrase_sandhi: Also apply sandhi across word boundaries
 
         Returns:
             AnalyzeResponse with word-by-word analysis
         """
-        # Segment text using jieba
-        words = list(jieba.cut(text))
+        timer = metrics.start_timer("analyze")
+
+        # Pin one dictionary version (and its caches) for the whole request
+        session = self._get_session()
+
+        # One regex pass splits the text into Chinese runs and only those are
+        # segmented. Whatever separates two runs (punctuation, spaces, Latin
+        # text, digits) closes the prosodic phrase, so each run is a phrase.
+        # Traditional characters are converted one to one before segmenting
+        # (jieba's dictionary is simplified), so word lengths and offsets
+        # still match the input.
+        traditional_chars = self._get_traditional_chars(session)
+        runs = [
+            (m.start(), list(jieba.cut(
+                m.group().translate(traditional_chars) if traditional_chars else m.group()
+            )))
+            for m in _HANZI_RUN_RE.finditer(text)
+        ]
+        timer.lap("segmentation")
 
         analyzed_words = []
+        phrase_ids = []
+
+        for phrase_id, (offset, words) in enumerate(runs):
+            for index, simplified in enumerate(words):
+                word = text[offset:offset + len(simplified)]  # As typed
+
+                # Try dictionary lookup first (traditional headword for
+                # traditional input), disambiguating polyphones by context
+                candidates = ()
+                if word != simplified:
+                    candidates = self._lookup_candidates(word, session, traditional=True)
+                if not candidates:
+                    candidates = self._lookup_candidates(simplified, session)
+
+                if candidates:
+                    entry, confidence = self._choose_reading(
+                        simplified,
+                        candidates,
+                        prev_word=words[index - 1] if index > 0 else "",
+                        next_word=words[index + 1] if index + 1 < len(words) else "",
+                        session=session,
+                    )
+                    timer.lap("dict_lookup")
+                    metrics.inc(DICTIONARY_LOOKUPS, "analyze", "hit")
+                    word_tone = self._analyze_word_dict(word, entry, confidence, timer, offset)
+                else:
+                    timer.lap("dict_lookup")
+                    metrics.inc(DICTIONARY_LOOKUPS, "analyze", "miss")
+                    word_tone = self._analyze_word_pypinyin(word, timer, offset)
+
+                analyzed_words.append(word_tone)
+                phrase_ids.append(phrase_id)
+                offset += len(word)
+
+        if phrase_sandhi and len(analyzed_words) > 1:
+            self._apply_phrase_sandhi(analyzed_words, phrase_ids)
+            timer.lap("sandhi")
+
+        response = construct_trusted(AnalyzeResponse, {
+            "text": text,
+            "words": analyzed_words,
+        })
+        timer.lap("response_build")
+        timer.finish()
+        return response
+
+
+def _retone_syllable(syl: SyllableInfo, new_tone: int, rule: Optional[str] = None) -> SyllableInfo:
+    """Copy of a syllable with its tone (and tone mark/number) changed."""
+    return _syllable(
+        syl.char,
+        change_pinyin_tone(syl.pinyin, new_tone),
+        syl.pinyin_num.rstrip('12345') + str(new_tone),
+        new_tone,
+        rule,
+    )
+
+
+def _syllable(
+    char: str, pinyin_mark: str, pinyin_num: str, tone: int, sandhi_rule: Optional[str] = None
+) -> SyllableInfo:
+    """Unvalidated SyllableInfo (the analyzer builds hundreds per request)."""
+    return construct_trusted(SyllableInfo, {
+        "char": char,
+        "pinyin": pinyin_mark,
+        "pinyin_num": pinyin_num,
+        "tone": tone,
+        "sandhi_rule": sandhi_rule,
+    })
+
+
+# Max distinct words kept in the per-analyzer reading cache
+CANDIDATE_CACHE_SIZE = 50_000
+
+# Definitions that only name a surname or point at another character
+_MINOR_SENSE_RE = re.compile(
+    r"^(surname |(old |archaic |ancient |japanese |unofficial )?variant of |see |used in )",
+    re.IGNORECASE,
+)
 
-        for word in words:
-            # Skip empty or whitespace-only
-            if not word.strip():
-                continue
 
-            # Skip if no Chinese characters
-            if not self._contains_chinese(word):
-                continue
+def _row_to_entry(row: sqlite3.Row) -> DictEntry:
+    """Build a DictEntry from an `entries` row."""
+    # Parse tones from comma-separated string
+    tones_str = row["tones"] or ""
+    tones = [int(t) for t in tones_str.split(",") if t.strip().isdigit()]
 
-            # Try dictionary lookup first
-            entry = self._lookup_dict(word)
+    return DictEntry(
+        simplified=row["simplified"],
+        traditional=row["traditional"],
+        pinyin=row["pinyin"],
+        tones=tones,
+        definition=row["definitions"],
+        hsk_level=row["hsk_level"] or 0,
+    )
 
-            if entry is not None:
-                word_tone = self._analyze_word_dict(word, entry)
-            else:
-                word_tone = self._analyze_word_pypinyin(word)
 
-            analyzed_words.append(word_tone)
+def _normalize_reading(pinyin_num: str) -> str:
+    """Comparable form of numbered pinyin: lowercase, ü as v, no spaces."""
+    return pinyin_num.lower().replace("u:", "v").replace("ü", "v").replace(" ", "")
 
-        return AnalyzeResponse(
-            text=text,
-            words=analyzed_words,
-        )
+
+def _is_minor_sense(entry: DictEntry) -> bool:
+    """Whether every definition is a surname/variant/cross-reference."""
+    definitions = [d.strip() for d in (entry.definition or "").split(";") if d.strip()]
+    return bool(definitions) and all(_MINOR_SENSE_RE.match(d) for d in definitions)
+
+
+@lru_cache(maxsize=10000)
+def _context_reading(prev_char: str, word: str, next_char: str) -> str:
+    """pypinyin's phrase-aware reading of `word` between its neighbour characters."""
+    readings = pinyin(
+        prev_char + word + next_char, style=Style.TONE3, neutral_tone_with_five=True
+    )
+    if len(readings) != len(prev_char) + len(word) + len(next_char):
+        readings = pinyin(word, style=Style.TONE3, neutral_tone_with_five=True)
+        start = 0
+    else:
+        start = len(prev_char)
+    return _normalize_reading("".join(r[0] for r in readings[start:start + len(word)]))
+
+
+@lru_cache(maxsize=10000)
+def _word_pinyin(word: str) -> Optional[tuple[str, ...]]:
+    """pypinyin readings (tone marks) for an all-Chinese word, one per character."""
+    readings = pinyin(word, style=Style.TONE)
+    if len(readings) != len(word):
+        return None
+    return tuple(r[0] for r in readings)
+
+
+@lru_cache(maxsize=10000)
+def _has_tone_ambiguity(char: str) -> bool:
+    """Whether pypinyin knows readings of `char` with different tones."""
+    readings = pinyin(char, style=Style.TONE3, heteronym=True, neutral_tone_with_five=True)
+    return bool(readings) and len({r[-1] for r in readings[0]}) > 1
 
 
 # Cached frequency lookup (module-level for lru_cache to work)
@@ -354,11 +663,9 @@ def get_analyzer() -> ToneAnalyzer:
     """Get or create the ToneAnalyzer singleton."""
     global _analyzer
     if _analyzer is None:
-        # Try to find database
-        db_path = Path(__file__).parent.parent.parent / "data" / "cedict.db"
-        _analyzer = ToneAnalyzer(
-            db_path=str(db_path) if db_path.exists() else None
-        )
+        # The file may not exist yet: the handle picks it up once imported
+        db_path = settings.database_path
+        _analyzer = ToneAnalyzer(db_path=str(db_path) if db_path else None)
     return _analyzer
 
 
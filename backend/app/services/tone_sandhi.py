@@ -9,8 +9,12 @@ Rules implemented:
    - Before 4th tone → 2nd (一个 yī gè → yí gè)
    - Before 1st/2nd/3rd → 4th (一天 yī tiān → yì tiān)
 4. Reduplication: AA → A + neutral (妈妈 māmā → māma)
+5. Optional cross-word pass over a whole sentence (`apply_phrase_sandhi`)
+
+`apply_tone_sandhi` evaluates all rules in one right-to-left pass driven by
+a precomputed transition table; the per-rule functions define the rules.
 """
-from typing import Optional
+from typing import Optional, Sequence
 from dataclasses import dataclass
 
 
@@ -44,7 +48,7 @@ def apply_third_tone_sandhi(tones: list[int]) -> tuple[list[int], bool, Optional
     return modified, changed, "third_tone_sandhi" if changed else None
 
 
-def apply_bu_sandhi(chars: list[str], tones: list[int]) -> tuple[list[int], bool, Optional[str]]:
+def apply_bu_sandhi(chars: Sequence[str], tones: list[int]) -> tuple[list[int], bool, Optional[str]]:
     """
     Apply 不 (bù) tone sandhi.
     不 becomes 2nd tone before 4th tone.
@@ -65,7 +69,7 @@ def apply_bu_sandhi(chars: list[str], tones: list[int]) -> tuple[list[int], bool
     return modified, changed, "bu_sandhi" if changed else None
 
 
-def apply_yi_sandhi(chars: list[str], tones: list[int]) -> tuple[list[int], bool, Optional[str]]:
+def apply_yi_sandhi(chars: Sequence[str], tones: list[int]) -> tuple[list[int], bool, Optional[str]]:
     """
     Apply 一 (yī) tone sandhi.
     - Before 4th tone: 一 → 2nd (一个 yī gè → yí gè)
@@ -94,7 +98,7 @@ def apply_yi_sandhi(chars: list[str], tones: list[int]) -> tuple[list[int], bool
     return modified, changed, "yi_sandhi" if changed else None
 
 
-def apply_reduplication_sandhi(chars: list[str], tones: list[int]) -> tuple[list[int], bool, Optional[str]]:
+def apply_reduplication_sandhi(chars: Sequence[str], tones: list[int]) -> tuple[list[int], bool, Optional[str]]:
     """
     Apply reduplication tone sandhi.
     In AA pattern, second syllable often becomes neutral.
@@ -113,19 +117,12 @@ def apply_reduplication_sandhi(chars: list[str], tones: list[int]) -> tuple[list
     return modified, True, "reduplication_sandhi"
 
 
-def apply_tone_sandhi(
-    chars: list[str],
-    tones: list[int],
-) -> SandhiResult:
+def _apply_rules_sequentially(chars: Sequence[str], tones: list[int]) -> SandhiResult:
     """
-    Apply all relevant tone sandhi rules.
+    Reference implementation: run each rule function as its own pass.
 
-    Args:
-        chars: List of Chinese characters
-        tones: List of tones (1-5) for each character
-
-    Returns:
-        SandhiResult with original and modified tones
+    This is the original multi-pass composition, kept as the specification
+    that `apply_tone_sandhi` must match (see tests and benchmarks).
     """
     if len(chars) != len(tones):
         raise ValueError("chars and tones must have same length")
@@ -165,6 +162,278 @@ def apply_tone_sandhi(
     )
 
 
+# ============== Single-pass engine ==============
+#
+# The rule functions above run as cascaded passes: 不 sees the input tones,
+# 一 sees the output of 不, and 3+3 sees the output of 一. Each stage only
+# looks one syllable ahead, so walking right to left and carrying the next
+# syllable's tone at every stage is enough to evaluate all three at once.
+# `_step` is that per-syllable transition; `_STEP_TABLE` precomputes it for
+# every (char class, tone, next-syllable state), packed into one integer
+# index, so the hot loop is a single list lookup per syllable.
+
+# Character classes
+_OTHER, _BU, _YI = 0, 1, 2
+_CHAR_CLASS = {"不": _BU, "一": _YI}
+
+# Rule flags, in the order the rules are reported
+_RULE_BU, _RULE_YI, _RULE_THIRD = 1, 2, 4
+_RULE_NAMES = (
+    (_RULE_BU, "bu_sandhi"),
+    (_RULE_YI, "yi_sandhi"),
+    (_RULE_THIRD, "third_tone_sandhi"),
+)
+_RULE_LABELS = [
+    [name for flag, name in _RULE_NAMES if flags & flag] for flags in range(8)
+]
+
+# "No next syllable" marker in the carried state
+_END = 0
+
+# Index layout: char class | tone | next tone | next after 不 | next after 一,
+# 3 bits each for tones (1-5 plus _END)
+_TONE_BITS = 3
+_STATE_SIZE = 1 << (3 * _TONE_BITS)
+_TONE_STRIDE = _STATE_SIZE
+_CLASS_STRIDE = _STATE_SIZE << _TONE_BITS
+_CLASS_BASE = {char: cls * _CLASS_STRIDE for char, cls in _CHAR_CLASS.items()}
+
+
+def _pack_state(next_tone: int, next_bu: int, next_yi: int) -> int:
+    return (next_tone << (2 * _TONE_BITS)) | (next_bu << _TONE_BITS) | next_yi
+
+
+def _step(
+    char_class: int, tone: int, next_tone: int, next_bu: int, next_yi: int
+) -> tuple[int, int, int, int]:
+    """
+    Evaluate all stages for one syllable.
+
+    Args:
+        char_class: _BU, _YI or _OTHER
+        tone: Input tone of this syllable
+        next_tone, next_bu, next_yi: Next syllable's tone after stage 0
+            (input), 1 (不) and 2 (一), or _END for the last syllable
+
+    Returns:
+        (tone after 不 stage, tone after 一 stage, final tone, rule flags)
+    """
+    flags = 0
+
+    bu = tone
+    if char_class == _BU and tone == 4 and next_tone == 4:
+        bu = 2
+        flags |= _RULE_BU
+
+    yi = bu
+    if char_class == _YI and bu == 1 and next_bu != _END:
+        if next_bu == 4:
+            yi = 2
+            flags |= _RULE_YI
+        elif next_bu in (1, 2, 3):
+            yi = 4
+            flags |= _RULE_YI
+
+    final = yi
+    if yi == 3 and next_yi == 3:
+        final = 2
+        flags |= _RULE_THIRD
+
+    return bu, yi, final, flags
+
+
+def _compile_step_table() -> list[Optional[tuple[int, int, int]]]:
+    """
+    Precompute `_step` for every valid packed index.
+
+    Each slot holds (final tone, rule flags, packed state for the previous
+    syllable); unused slots are None.
+    """
+    tones = (1, 2, 3, 4, 5)
+    next_tones = (_END,) + tones
+    table: list[Optional[tuple[int, int, int]]] = [None] * (3 * _CLASS_STRIDE)
+    for char_class in (_OTHER, _BU, _YI):
+        for tone in tones:
+            for next_tone in next_tones:
+                for next_bu in next_tones:
+                    for next_yi in next_tones:
+                        bu, yi, final, flags = _step(char_class, tone, next_tone, next_bu, next_yi)
+                        index = (
+                            char_class * _CLASS_STRIDE
+                            + tone * _TONE_STRIDE
+                            + _pack_state(next_tone, next_bu, next_yi)
+                        )
+                        table[index] = (final, flags, _pack_state(tone, bu, yi))
+    return table
+
+
+_STEP_TABLE = _compile_step_table()
+
+
+def _slow_step(char: str, tone: int, state: int) -> tuple[int, int, int]:
+    """Table miss (tone outside 1-5): evaluate the rules directly."""
+    mask = (1 << _TONE_BITS) - 1
+    next_tone = state >> (2 * _TONE_BITS)
+    next_bu = (state >> _TONE_BITS) & mask
+    next_yi = state & mask
+    bu, yi, final, flags = _step(_CHAR_CLASS.get(char, _OTHER), tone, next_tone, next_bu, next_yi)
+    # Out-of-range tones never match a rule, so carry them as _END
+    in_range = 1 <= tone <= 5
+    return final, flags, _pack_state(tone if in_range else _END, bu if in_range else _END, yi if in_range else _END)
+
+
+def apply_tone_sandhi(
+    chars: Sequence[str],
+    tones: list[int],
+) -> SandhiResult:
+    """
+    Apply all relevant tone sandhi rules in a single pass.
+
+    Args:
+        chars: Chinese characters (a word string or a list of characters)
+        tones: List of tones (1-5) for each character
+
+    Returns:
+        SandhiResult with original and modified tones
+    """
+    n = len(tones)
+    if len(chars) != n:
+        raise ValueError("chars and tones must have same length")
+
+    if n < 2:
+        # Every rule needs a following syllable
+        return SandhiResult(original_tones=list(tones), modified_tones=list(tones), has_sandhi=False)
+
+    modified = [0] * n
+    flags = 0
+    state = _pack_state(_END, _END, _END)
+    table = _STEP_TABLE
+    class_base = _CLASS_BASE.get
+
+    for i in range(n - 1, -1, -1):
+        tone = tones[i]
+        if 1 <= tone <= 5:
+            modified[i], step_flags, state = table[class_base(chars[i], 0) + tone * _TONE_STRIDE + state]
+        else:
+            modified[i], step_flags, state = _slow_step(chars[i], tone, state)
+        flags |= step_flags
+
+    rules_applied = _RULE_LABELS[flags]
+
+    # Reduplication (AA → A + neutral) only applies to two-syllable words
+    if n == 2 and chars[0] == chars[1]:
+        modified[1] = 5
+        rules_applied = rules_applied + ["reduplication_sandhi"]
+
+    return SandhiResult(
+        original_tones=list(tones),
+        modified_tones=modified,
+        has_sandhi=bool(rules_applied),
+        rule_applied=" + ".join(rules_applied) if rules_applied else None,
+    )
+
+
+# ============== Phrase-level (cross-word) sandhi ==============
+#
+# The rules above run inside one jieba token. Across tokens, sandhi depends
+# on prosodic grouping rather than word boundaries:
+#   - a standalone 不/一 changes tone before the next word (不 | 去 → bú qù)
+#   - consecutive monosyllabic words pair into two-syllable feet, and 3+3
+#     applies inside a foot first (我也 | 很好 → wó yě hén hǎo)
+#   - then 3+3 applies across feet, right to left, against the tone the next
+#     foot actually ends up with (小 | 老虎 → xiǎo láohǔ)
+# Punctuation and non-Chinese text end a prosodic phrase; nothing crosses it.
+
+CROSS_WORD_BU = "cross_word_bu_sandhi"
+CROSS_WORD_YI = "cross_word_yi_sandhi"
+CROSS_WORD_THIRD = "cross_word_third_tone_sandhi"
+
+
+@dataclass
+class PhraseSandhiResult:
+    """Result of sentence-level sandhi over a token stream."""
+    modified_tones: list[list[int]]
+    syllable_rules: list[list[Optional[str]]]  # Rule per syllable, None if unchanged
+    changed_words: list[int]                   # Indices of words with any change
+
+
+def apply_phrase_sandhi(
+    words: Sequence[str],
+    tones: Sequence[list[int]],
+    phrase_ids: Sequence[int],
+) -> PhraseSandhiResult:
+    """
+    Apply cross-word tone sandhi over a sentence in linear time.
+
+    Args:
+        words: Tokens in order (each already analyzed on its own)
+        tones: Per-token tones after word-internal sandhi
+        phrase_ids: Prosodic phrase of each token (tokens only interact
+            with neighbours that share the same id)
+
+    Returns:
+        PhraseSandhiResult with per-token tones and per-syllable rules
+    """
+    n = len(words)
+    if not (len(tones) == len(phrase_ids) == n):
+        raise ValueError("words, tones and phrase_ids must have same length")
+
+    modified = [list(t) for t in tones]
+    rules: list[list[Optional[str]]] = [[None] * len(t) for t in tones]
+    changed = [False] * n
+
+    def linked(i: int) -> bool:
+        """Whether token i and i+1 are adjacent in the same phrase."""
+        return phrase_ids[i] == phrase_ids[i + 1] and bool(modified[i]) and bool(modified[i + 1])
+
+    def set_tone(i: int, pos: int, tone: int, rule: str) -> None:
+        modified[i][pos] = tone
+        rules[i][pos] = rule
+        changed[i] = True
+
+    # 1. Standalone 不/一 before the next word (right to left, like the
+    #    word-level rules, so 一 sees a preceding change of the next token)
+    for i in range(n - 2, -1, -1):
+        if not linked(i):
+            continue
+        word = words[i]
+        next_tone = modified[i + 1][0]
+        if word == "不" and modified[i][0] == 4 and next_tone == 4:
+            set_tone(i, 0, 2, CROSS_WORD_BU)
+        elif word == "一" and modified[i][0] == 1:
+            if next_tone == 4:
+                set_tone(i, 0, 2, CROSS_WORD_YI)
+            elif next_tone in (1, 2, 3):
+                set_tone(i, 0, 4, CROSS_WORD_YI)
+
+    # 2. Prosodic feet: pair consecutive monosyllabic words left to right.
+    #    foot_end[i] is True when token i closes its foot.
+    foot_end = [True] * n
+    i = 0
+    while i < n - 1:
+        if len(modified[i]) == 1 and len(modified[i + 1]) == 1 and linked(i):
+            foot_end[i] = False
+            i += 2
+        else:
+            i += 1
+
+    # 3a. 3+3 inside two-syllable feet
+    for i in range(n - 1):
+        if not foot_end[i] and modified[i][0] == 3 and modified[i + 1][0] == 3:
+            set_tone(i, 0, 2, CROSS_WORD_THIRD)
+
+    # 3b. 3+3 across feet, right to left
+    for i in range(n - 2, -1, -1):
+        if foot_end[i] and linked(i) and modified[i][-1] == 3 and modified[i + 1][0] == 3:
+            set_tone(i, len(modified[i]) - 1, 2, CROSS_WORD_THIRD)
+
+    return PhraseSandhiResult(
+        modified_tones=modified,
+        syllable_rules=rules,
+        changed_words=[i for i in range(n) if changed[i]],
+    )
+
+
 # Quick test
 if __name__ == "__main__":
     # Test cases
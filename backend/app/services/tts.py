@@ -7,7 +7,9 @@ import os
 from pathlib import Path
 from typing import Optional
 
+from app.core import metrics
 from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
 
 
 # Azure voice name mapping
@@ -60,17 +62,45 @@ async def synthesize_speech(
     if not is_tts_available():
         return None
 
+    timer = metrics.start_timer("tts")
+
     # Check cache first
     cache_path = get_cache_path(text, voice, rate, pitch)
     if cache_path.exists():
-        return cache_path.read_bytes()
-
-    # Ensure cache directory exists
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        audio_data = cache_path.read_bytes()
+        timer.lap("cache_check")
+        timer.finish()
+        metrics.inc(CACHE_REQUESTS, "tts", "hit")
+        return audio_data
+    timer.lap("cache_check")
+    metrics.inc(CACHE_REQUESTS, "tts", "miss")
 
     # Get Azure voice name
     azure_voice = VOICE_MAP.get(voice, VOICE_MAP["female1"])
 
+    # Build SSML for fine control
+    ssml = build_ssml(text, azure_voice, rate, pitch, volume)
+
+    audio_data = _synthesize_azure(ssml)
+    timer.lap("upstream")
+
+    if audio_data:
+        # Cache the result
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path.write_bytes(audio_data)
+        timer.lap("write")
+
+    timer.finish()
+    return audio_data
+
+
+def _synthesize_azure(ssml: str) -> Optional[bytes]:
+    """
+    Call Azure TTS for an SSML document.
+
+    Returns:
+        MP3 audio bytes or None if synthesis fails
+    """
     try:
         import azure.cognitiveservices.speech as speechsdk
 
@@ -83,9 +113,6 @@ async def synthesize_speech(
             speechsdk.SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3
         )
 
-        # Build SSML for fine control
-        ssml = build_ssml(text, azure_voice, rate, pitch, volume)
-
         # Create synthesizer (no audio output, we want bytes)
         synthesizer = speechsdk.SpeechSynthesizer(
             speech_config=speech_config,
@@ -96,12 +123,7 @@ async def synthesize_speech(
         result = synthesizer.speak_ssml_async(ssml).get()
 
         if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            audio_data = result.audio_data
-
-            # Cache the result
-            cache_path.write_bytes(audio_data)
-
-            return audio_data
+            return result.audio_data
 
         elif result.reason == speechsdk.ResultReason.Canceled:
             cancellation = result.cancellation_details
@@ -117,6 +139,8 @@ async def synthesize_speech(
         print(f"TTS error: {e}")
         return None
 
+    return None
+
 
 def build_ssml(
     text: str,
@@ -0,0 +1,120 @@
+"""
+Toneo - Vocabulary Lists
+HSK word lists read page by page, for browsing and for exports.
+
+Pages use keyset pagination on idx_hsk: the index holds (hsk_level,
+rowid), so "level N after entry id X" is one index seek followed by a
+sequential read, however deep into the list the page is (OFFSET would
+re-read every skipped row). Exports stream the same pages one after
+another and so never hold more than one page in memory.
+
+Entry ids are only stable within one dictionary version, so cursors
+carry a tag of the version they were issued for.
+"""
+import csv
+import hashlib
+import io
+import sqlite3
+from typing import Iterable
+
+
+# Rows read per query while exporting
+EXPORT_BATCH_SIZE = 500
+
+VOCAB_SQL = """
+    SELECT id, simplified, traditional, pinyin, tones, definitions, hsk_level, frequency
+    FROM entries
+    WHERE hsk_level = ? AND id > ?
+    ORDER BY id
+    LIMIT ?
+"""
+
+CSV_COLUMNS = ("simplified", "traditional", "pinyin", "pinyin_num", "tones", "definitions", "hsk_level")
+
+
+class InvalidCursor(ValueError):
+    """Cursor that was not issued by this API."""
+
+
+class CursorExpired(InvalidCursor):
+    """Cursor issued for a previous dictionary version."""
+
+
+class ExportInterrupted(RuntimeError):
+    """Dictionary replaced while an export was being read."""
+
+
+def _version_tag(version: str) -> str:
+    return hashlib.blake2b(str(version).encode("utf-8"), digest_size=4).hexdigest()
+
+
+def encode_cursor(version: str, last_id: int) -> str:
+    """Opaque cursor for the page after entry `last_id`."""
+    return f"{last_id}.{_version_tag(version)}"
+
+
+def decode_cursor(cursor: str, version: str) -> int:
+    """
+    Entry id a cursor continues after.
+
+    Raises:
+        InvalidCursor: Malformed cursor
+        CursorExpired: The dictionary changed since the cursor was issued
+    """
+    last_id, _, tag = cursor.partition(".")
+    if not last_id.isdigit() or not tag:
+        raise InvalidCursor(cursor)
+    if tag != _version_tag(version):
+        raise CursorExpired(cursor)
+    return int(last_id)
+
+
+def vocab_page(db: sqlite3.Connection, hsk_level: int, after_id: int, limit: int) -> list[sqlite3.Row]:
+    """Entries of one HSK level with id > `after_id`, in id order."""
+    return db.execute(VOCAB_SQL, (hsk_level, after_id, limit)).fetchall()
+
+
+def to_csv(records: Iterable[dict], header: bool = False) -> str:
+    """CSV lines for DictionarySearchResult-like dicts (CSV_COLUMNS)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    for record in records:
+        writer.writerow((
+            record["simplified"],
+            record["traditional"] or "",
+            record["pinyin"],
+            record["pinyin_num"],
+            " ".join(str(t) for t in record["tones"]),
+            "; ".join(record["definitions"]),
+            record["hsk_level"],
+        ))
+    return buffer.getvalue()
+
+
+def _anki_field(value: str) -> str:
+    return value.replace("\t", " ").replace("\n", " ")
+
+
+def to_anki(records: Iterable[dict], hsk_level: int, header: bool = False) -> str:
+    """
+    Anki plain-text import lines (tab separated, one note per line).
+
+    Fields: simplified, traditional, pinyin, definitions, tags. The header
+    lines tell Anki (2.1.54+) the separator and the tags column.
+    """
+    lines = []
+    if header:
+        lines.append("#separator:tab\n#html:false\n#tags column:5\n")
+    tag = f"HSK{hsk_level}" if hsk_level else "non-HSK"
+    for record in records:
+        fields = (
+            record["simplified"],
+            record["traditional"] or "",
+            record["pinyin"],
+            "; ".join(record["definitions"]),
+            tag,
+        )
+        lines.append("\t".join(_anki_field(field) for field in fields) + "\n")
+    return "".join(lines)
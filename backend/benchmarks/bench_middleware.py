@@ -0,0 +1,132 @@
+"""
+Toneo - Middleware Benchmark
+Per-request overhead and memory of the CC-CEDICT attribution middleware:
+the previous BaseHTTPMiddleware version against the pure ASGI one.
+
+Requests are driven straight through the ASGI interface (no sockets), so
+the numbers are the middleware cost plus a trivial endpoint.
+
+Usage (from backend/):
+    python -m benchmarks.bench_middleware [--requests 20000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import settings
+from app.main import DataSourceMiddleware
+
+
+AUDIO = bytes(range(256)) * 256  # 64 KiB, a few seconds of MP3
+
+
+class BaseHTTPDataSourceMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation this benchmark replaced."""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if request.url.path.startswith(f"{settings.api_prefix}/analyze") or \
+           request.url.path.startswith(f"{settings.api_prefix}/dictionary"):
+            response.headers["X-Data-Source"] = "CC-CEDICT"
+            response.headers["X-Data-License"] = "CC BY-SA 4.0"
+        return response
+
+
+def make_app(middleware=None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/dictionary/{word}")
+    async def dictionary(word: str):
+        return JSONResponse({"word": word, "tones": [3, 3]})
+
+    @app.get("/api/tts")
+    async def tts():
+        return Response(AUDIO, media_type="audio/mpeg")
+
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+def make_scope(path: str) -> dict:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+
+
+async def drive(app, path: str, n: int) -> None:
+    scope = make_scope(path)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(n):
+        await app(scope, receive, send)
+
+
+def measure(app, path: str, n: int, repeat: int) -> tuple[float, float]:
+    """(best µs per request, bytes allocated per request)."""
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(drive(app, path, 200))  # Warm up (builds the middleware stack)
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            loop.run_until_complete(drive(app, path, n))
+            best = min(best, time.perf_counter() - start)
+
+        sample = min(n, 2000)
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        loop.run_until_complete(drive(app, path, sample))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        loop.close()
+    # Peak over the run approximates the per-request working set
+    return best / n * 1e6, float(peak - before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attribution middleware benchmark")
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    variants = {
+        "none": make_app(),
+        "BaseHTTPMiddleware": make_app(BaseHTTPDataSourceMiddleware),
+        "pure ASGI": make_app(DataSourceMiddleware),
+    }
+    paths = {
+        "dictionary (headers added)": "/api/dictionary/学习",
+        "tts 64 KiB (passthrough)": "/api/tts",
+    }
+
+    for label, path in paths.items():
+        print(f"{label}:")
+        baseline = None
+        for name, app in variants.items():
+            per_request, peak = measure(app, path, args.requests, args.repeat)
+            if baseline is None:
+                baseline = per_request
+                overhead = ""
+            else:
+                overhead = f"  (+{per_request - baseline:6.1f} µs over none)"
+            print(f"  {name:20s} {per_request:8.1f} µs/request  peak {peak / 1024:8.1f} KiB{overhead}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Toneo - Pre-fork Memory Benchmark
+Per-worker memory of the pre-fork server (app.prefork) against
+`uvicorn --workers N`, after every worker has served analyze and
+dictionary requests.
+
+Reported per worker, from /proc/<pid>/smaps_rollup (Linux only):
+- USS: pages only this process maps (what a new worker really costs)
+- PSS: shared pages split evenly between the processes sharing them
+- RSS: everything resident, shared pages counted in full
+
+Usage (from backend/):
+    python -m benchmarks.bench_prefork [--workers 4] [--requests 400]
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+from benchmarks.corpus import TEXTS
+from benchmarks.fixtures import build_fixture_db
+from benchmarks.loadtest import free_port
+
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def read_memory(pid: int) -> dict[str, int]:
+    """USS/PSS/RSS of one process in KiB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            parts = rest.split()
+            if len(parts) == 2 and parts[1] == "kB":
+                fields[name] = int(parts[0])
+    return {
+        "uss_kb": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "pss_kb": fields.get("Pss", 0),
+        "rss_kb": fields.get("Rss", 0),
+    }
+
+
+def child_pids(pid: int) -> list[int]:
+    """Direct children of `pid`."""
+    pids = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            pids.extend(int(p) for p in f.read().split())
+    return pids
+
+
+def worker_pids(server_pid: int) -> list[int]:
+    """Worker processes of a server (skipping multiprocessing's helpers)."""
+    workers = []
+    for pid in child_pids(server_pid):
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            cmdline = f.read()
+        if b"resource_tracker" not in cmdline:
+            workers.append(pid)
+    return workers
+
+
+def drive(base_url: str, requests: int) -> None:
+    """Send enough analyze/dictionary traffic that every worker loads everything."""
+    texts = list(TEXTS.values())
+
+    def one(i: int) -> None:
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            client.post("/api/analyze", json={"text": texts[i % len(texts)][:1000]})
+            client.get("/api/dictionary/学习")
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(one, range(requests)))
+
+
+def measure(command: list[str], port: int, env: dict, workers: int, requests: int) -> dict:
+    proc = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 120
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"Server exited during startup: {command}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server did not become ready: {command}")
+            try:
+                if httpx.get(f"{base_url}/health", timeout=1).status_code == 200 \
+                        and len(worker_pids(proc.pid)) >= workers:
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+
+        start = time.perf_counter()
+        drive(base_url, requests)
+        elapsed = time.perf_counter() - start
+
+        per_worker = [read_memory(pid) for pid in worker_pids(proc.pid)]
+        parent = read_memory(proc.pid)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+
+    total_pss = parent["pss_kb"] + sum(w["pss_kb"] for w in per_worker)
+    return {
+        "workers": per_worker,
+        "parent": parent,
+        "total_pss_kb": total_pss,
+        "mean_uss_kb": sum(w["uss_kb"] for w in per_worker) / len(per_worker),
+        "drive_s": elapsed,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Per-worker memory: pre-fork vs uvicorn --workers")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=400, help="Requests sent before measuring")
+    parser.add_argument("--output", type=Path, help="Write JSON report here")
+    args = parser.parse_args()
+
+    if not Path("/proc/self/smaps_rollup").exists():
+        print("Needs Linux /proc/<pid>/smaps_rollup")
+        return 1
+
+    workdir = Path(tempfile.mkdtemp(prefix="toneo-prefork-"))
+    db_path = build_fixture_db(workdir / "cedict.db")
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path.resolve()}", "DEBUG": "false"}
+
+    modes = {
+        "uvicorn --workers": lambda port: [
+            sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+            "--workers", str(args.workers), "--log-level", "warning",
+        ],
+        "prefork": lambda port: [
+            sys.executable, "-m", "app.prefork", "--port", str(port),
+            "--workers", str(args.workers), "--log-level", "warning",
+        ],
+    }
+
+    report = {}
+    for name, command in modes.items():
+        port = free_port()
+        report[name] = measure(command(port), port, env, args.workers, args.requests)
+
+    print(f"\n{args.workers} workers, {args.requests} analyze+dictionary requests each run")
+    print(f"  {'mode':18s} {'USS/worker':>11s} {'PSS/worker':>11s} {'RSS/worker':>11s} {'total PSS':>10s}")
+    for name, r in report.items():
+        n = len(r["workers"])
+        pss = sum(w["pss_kb"] for w in r["workers"]) / n
+        rss = sum(w["rss_kb"] for w in r["workers"]) / n
+        print(f"  {name:18s} {r['mean_uss_kb'] / 1024:9.1f}MB {pss / 1024:9.1f}MB "
+              f"{rss / 1024:9.1f}MB {r['total_pss_kb'] / 1024:8.1f}MB")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nReport written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Toneo - Tone Sandhi Benchmark
+Compares the single-pass sandhi engine with the sequential rule passes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_tone_sandhi [--words 200000] [--repeat 5]
+"""
+import argparse
+import random
+import time
+
+from app.services.tone_sandhi import _apply_rules_sequentially, apply_tone_sandhi
+
+
+# Characters weighted so 不/一 and third tones show up as in real text
+CHARS = "不一你好我很是的了中国人学习说话老师朋友"
+WEIGHTS = [8, 8] + [1] * (len(CHARS) - 2)
+WORD_LENGTHS = [1, 2, 2, 2, 3, 4]
+
+
+def make_corpus(n_words: int, seed: int = 42) -> list[tuple[str, list[int]]]:
+    """Build a reproducible corpus of (word, tones) pairs."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n_words):
+        length = rng.choice(WORD_LENGTHS)
+        word = "".join(rng.choices(CHARS, weights=WEIGHTS, k=length))
+        tones = [rng.randint(1, 5) for _ in range(length)]
+        corpus.append((word, tones))
+    return corpus
+
+
+def time_engine(fn, corpus, repeat: int) -> float:
+    """Best-of-`repeat` wall time in seconds for one pass over the corpus."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for word, tones in corpus:
+            fn(word, tones)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.words)
+    syllables = sum(len(tones) for _, tones in corpus)
+
+    # Sanity check before timing anything
+    for word, tones in corpus[:10_000]:
+        assert apply_tone_sandhi(word, tones) == _apply_rules_sequentially(list(word), tones)
+
+    sequential = time_engine(lambda w, t: _apply_rules_sequentially(list(w), t), corpus, args.repeat)
+    single_pass = time_engine(apply_tone_sandhi, corpus, args.repeat)
+
+    print(f"Corpus: {len(corpus):,} words, {syllables:,} syllables")
+    for name, seconds in (("sequential", sequential), ("single-pass", single_pass)):
+        print(f"  {name:12s} {seconds * 1000:8.1f} ms  {len(corpus) / seconds / 1000:8.0f} kwords/s")
+    print(f"  speedup      {sequential / single_pass:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
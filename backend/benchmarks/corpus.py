@@ -0,0 +1,47 @@
+"""
+Toneo - Benchmark Corpus
+Fixed Chinese texts used by every benchmark, so results compare across commits.
+"""
+
+SHORT = "你好，我很好。"
+
+MEDIUM = (
+    "我每天早上七点起床，先喝一杯咖啡，然后坐地铁去公司上班。"
+    "我们公司在市中心，离我家不太远，一般半个小时就到了。"
+    "中午我常常和同事一起去附近的小饭馆吃饭，那里的饺子又便宜又好吃。"
+)
+
+_PARAGRAPHS = [
+    "学习汉语的时候，声调是很多外国学生觉得最难的部分。普通话有四个声调和一个轻声，"
+    "同一个音节用不同的声调说出来，意思可能完全不一样。比如“妈”、“麻”、“马”、“骂”，"
+    "拼音都是ma，可是声调不同，意思也就不同了。所以老师常常说，学好声调是说好汉语的第一步。",
+
+    "除了单个字的声调以外，还要注意变调。两个第三声连在一起的时候，前一个字要读成第二声，"
+    "像“你好”、“可以”、“水果”都是这样。“不”在第四声前面要变成第二声，比如“不是”、“不要”、"
+    "“不对”。“一”的变调更复杂一点：在第四声前面读第二声，在第一、二、三声前面读第四声，"
+    "单独念或者在词的最后时还是读第一声。",
+
+    "我有一个朋友叫李明，他去年开始在北京的一所大学学习中文。刚来的时候，他几乎听不懂别人说的话，"
+    "买东西也只能用手比划。后来他每天晚上都跟着录音练习发音，还经常去公园跟老人聊天。"
+    "半年以后，他不但能自己去银行办事，还能用汉语给我们讲笑话了。他说，最有用的办法就是多听多说，"
+    "不要怕说错。",
+
+    "上个周末，我们几个同学一起去长城玩儿。那天天气特别好，阳光很暖和，可是山上的风有点儿大。"
+    "我们早上六点就出发了，坐了两个多小时的车才到。长城比我想象的还要长，也比我想象的难爬。"
+    "爬到最高的地方以后，大家都累得说不出话来，但是看到远处的山和云，又觉得一切都很值得。"
+    "下山的时候，我们在路边的小店买了水和水果，还跟老板学了几句北京话。",
+
+    "现在越来越多的人用手机学习语言。有的应用可以把句子读出来，有的可以给每个字标上拼音和声调，"
+    "还有的可以录下你的发音，再跟标准发音比较。这些工具虽然很方便，但是也不能完全代替老师和"
+    "真实的交流。语言毕竟是用来沟通的，只有在真正的对话里，我们才能知道自己说得对不对、"
+    "别人能不能听懂。",
+]
+
+# Exactly 1000 characters, the AnalyzeRequest maximum
+LONG = "".join(_PARAGRAPHS * 2)[:1000]
+
+TEXTS = {
+    "short": SHORT,
+    "medium": MEDIUM,
+    "long": LONG,
+}
@@ -0,0 +1,116 @@
+"""
+Toneo - Benchmark Fixtures
+Synthetic CC-CEDICT database built with the importer's own schema.
+
+Every word of the benchmark corpus gets an entry (so lookups hit like they
+would against the real dictionary), padded with deterministic filler rows
+to a realistic table size (CC-CEDICT has ~120k entries).
+"""
+import importlib.util
+import random
+import re
+import sqlite3
+from pathlib import Path
+
+import jieba
+from pypinyin import Style, pinyin
+
+from benchmarks.corpus import TEXTS
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "scripts"
+
+# Number of entries in the fixture DB, corpus words included
+FIXTURE_SIZE = 120_000
+
+
+def load_importer():
+    """Import scripts/import_cedict.py as a module (it is not a package)."""
+    spec = importlib.util.spec_from_file_location("import_cedict", SCRIPTS_DIR / "import_cedict.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _entry(word: str, rng: random.Random) -> tuple:
+    readings = [r[0] for r in pinyin(word, style=Style.TONE3, neutral_tone_with_five=True)]
+    if len(readings) != len(word):
+        return None
+    tones = [r[-1] if r[-1].isdigit() else "5" for r in readings]
+    return (
+        word,
+        word,
+        " ".join(readings),
+        ",".join(tones),
+        f"synthetic definition of {word}; second sense",
+        rng.choice([0, 0, 0, 1, 2, 3, 4, 5, 6]),
+        0,
+    )
+
+
+def write_sentence_corpus(path: Path) -> Path:
+    """The benchmark corpus split into sentences, as a Tatoeba TSV export."""
+    with open(path, "w", encoding="utf-8") as f:
+        sentence_id = 0
+        for text in TEXTS.values():
+            for sentence in re.findall(r"[^。！？\n]+[。！？]?", text):
+                if sentence.strip():
+                    sentence_id += 1
+                    f.write(f"{sentence_id}\tcmn\t{sentence.strip()}\n")
+    return path
+
+
+def build_fixture_db(path: Path, size: int = FIXTURE_SIZE, seed: int = 1234) -> Path:
+    """
+    Create the synthetic dictionary at `path` (overwriting it).
+
+    Returns:
+        The path, for chaining
+    """
+    importer = load_importer()
+    rng = random.Random(seed)
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+
+    conn = importer.create_database(path)
+
+    rows = []
+    seen = set()
+    for text in TEXTS.values():
+        for word in jieba.cut(text):
+            if word not in seen and all("一" <= c <= "龥" for c in word):
+                seen.add(word)
+                entry = _entry(word, rng)
+                if entry:
+                    rows.append(entry)
+
+    while len(rows) < size:
+        word = "".join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(rng.choice((2, 2, 3, 4))))
+        if word in seen:
+            continue
+        seen.add(word)
+        tones = [str(rng.randint(1, 5)) for _ in word]
+        rows.append((
+            word,
+            word,
+            " ".join(f"xx{t}" for t in tones),
+            ",".join(tones),
+            f"filler {len(rows)}",
+            0,
+            0,
+        ))
+
+    conn.executemany(
+        """INSERT INTO entries
+           (simplified, traditional, pinyin, tones, definitions, hsk_level, frequency)
+           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (f"fixture-{seed}",))
+    conn.commit()
+    importer.build_pinyin_index(conn)
+    importer.build_example_index(conn, write_sentence_corpus(path.with_suffix(".sentences.tsv")))
+    importer.build_drill_buckets(conn)
+    importer.build_search_index(conn)
+    conn.close()
+    return path
@@ -0,0 +1,224 @@
+"""
+Toneo - HTTP Load Test
+Replays a mixed analyze/dictionary/TTS workload against a running API at a
+fixed request rate and reports latency percentiles, throughput and error
+rates per route.
+
+The generator is open-loop: requests are sent on schedule whether or not
+earlier ones have finished, and latency is measured from the scheduled
+send time. A slow server therefore shows up as growing latency, not as
+a silently lower request rate.
+
+Usage (from backend/):
+    python -m benchmarks.loadtest --rps 50 --duration 30
+    python -m benchmarks.loadtest --rps 200 --mix analyze=1 --output load.json
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000   # existing server
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from benchmarks.corpus import TEXTS
+
+
+DICTIONARY_WORDS = ["学习", "你好", "中文", "声调", "朋友", "银行", "长城", "龘龘龘"]
+TTS_TEXTS = ["你好", "谢谢", "再见", "我很好", "不客气"]
+
+DEFAULT_MIX = {"analyze": 6, "dictionary": 3, "tts": 1}
+
+
+def make_request(route: str, rng: random.Random) -> tuple[str, str, Optional[dict]]:
+    """Pick (method, path, json body) for one request of `route`."""
+    if route == "analyze":
+        text = rng.choice([TEXTS["short"], TEXTS["short"], TEXTS["medium"], TEXTS["long"]])
+        return "POST", "/api/analyze", {"text": text}
+    if route == "dictionary":
+        return "GET", f"/api/dictionary/{rng.choice(DICTIONARY_WORDS)}", None
+    if route == "tts":
+        # Mostly repeated phrases (cache hits), sometimes a new one (upstream call)
+        text = rng.choice(TTS_TEXTS) if rng.random() < 0.8 else f"第{rng.randint(1, 10**6)}句"
+        return "POST", "/api/tts", {"text": text}
+    if route == "health":
+        return "GET", "/health", None
+    raise ValueError(f"Unknown route: {route}")
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[k]
+
+
+async def run_load(
+    base_url: str,
+    rps: float,
+    duration: float,
+    mix: dict[str, float],
+    max_in_flight: int,
+    seed: int,
+) -> dict:
+    rng = random.Random(seed)
+    routes, weights = zip(*mix.items())
+    total = int(rps * duration)
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    dropped = 0
+    in_flight = asyncio.Semaphore(max_in_flight)
+
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+
+        async def fire(route: str, method: str, path: str, body: Optional[dict], scheduled: float):
+            try:
+                response = await client.request(method, path, json=body)
+                elapsed = time.perf_counter() - scheduled
+                if response.status_code >= 400:
+                    errors[route][str(response.status_code)] += 1
+                else:
+                    latencies[route].append(elapsed)
+            except httpx.HTTPError as e:
+                errors[route][type(e).__name__] += 1
+            finally:
+                in_flight.release()
+
+        tasks = []
+        start = time.perf_counter()
+        for i in range(total):
+            scheduled = start + i / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            route = rng.choices(routes, weights)[0]
+            if in_flight.locked():
+                # Client-side limit reached: count it instead of queueing forever
+                dropped += 1
+                errors[route]["dropped"] += 1
+                continue
+            await in_flight.acquire()
+            method, path, body = make_request(route, rng)
+            tasks.append(asyncio.create_task(fire(route, method, path, body, scheduled)))
+
+        await asyncio.gather(*tasks)
+        wall = time.perf_counter() - start
+
+    report = {"rps_target": rps, "duration_s": wall, "requests": total, "dropped": dropped, "routes": {}}
+    for route in routes:
+        values = sorted(latencies[route])
+        failed = sum(errors[route].values())
+        sent = len(values) + failed
+        report["routes"][route] = {
+            "requests": sent,
+            "ok": len(values),
+            "throughput_rps": len(values) / wall if wall else 0.0,
+            "error_rate": failed / sent if sent else 0.0,
+            "errors": dict(errors[route]),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": (values[-1] * 1000) if values else 0.0,
+        }
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"\nTarget {report['rps_target']:.0f} req/s over {report['duration_s']:.1f}s "
+          f"({report['requests']} requests, {report['dropped']} dropped client-side)")
+    print(f"  {'route':12s} {'ok':>7s} {'rps':>8s} {'err%':>6s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'max':>9s}")
+    for route, r in report["routes"].items():
+        print(f"  {route:12s} {r['ok']:7d} {r['throughput_rps']:8.1f} {r['error_rate'] * 100:6.2f}"
+              f" {r['p50_ms']:8.1f}ms {r['p95_ms']:8.1f}ms {r['p99_ms']:8.1f}ms {r['max_ms']:8.1f}ms")
+        if r["errors"]:
+            print(f"  {'':12s} errors: {r['errors']}")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, extra_args: list[str]) -> subprocess.Popen:
+    """Launch benchmarks.loadtest_server and wait until /health answers."""
+    backend_dir = Path(__file__).parent.parent
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.loadtest_server", "--port", str(port), *extra_args],
+        cwd=backend_dir,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("Load test server exited during startup")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("Load test server did not become ready")
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        route, _, weight = part.partition("=")
+        mix[route.strip()] = float(weight or 1)
+    return mix
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Toneo HTTP load test")
+    parser.add_argument("--url", help="Target an already running server instead of starting one")
+    parser.add_argument("--rps", type=float, default=50)
+    parser.add_argument("--duration", type=float, default=20, help="Seconds")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Route weights, e.g. analyze=6,dictionary=3,tts=1,health=0")
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--tts-latency", type=float, default=0.15, help="Stub Azure latency (s)")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep rate limiting on in the server")
+    parser.add_argument("--output", type=Path, help="Write JSON report here")
+    args = parser.parse_args()
+
+    proc = None
+    base_url = args.url
+    if base_url is None:
+        port = free_port()
+        server_args = ["--tts-latency", str(args.tts_latency)]
+        if args.rate_limit:
+            server_args.append("--rate-limit")
+        proc = start_server(port, server_args)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        report = asyncio.run(run_load(
+            base_url, args.rps, args.duration, args.mix, args.max_in_flight, args.seed
+        ))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nReport written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
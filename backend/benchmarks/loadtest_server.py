@@ -0,0 +1,58 @@
+"""
+Toneo - Load Test Server
+Runs app.main:app under uvicorn with external services replaced by stubs.
+
+- Dictionary: the synthetic fixture DB (or --db)
+- Azure TTS: a stub that blocks for --tts-latency seconds, like the real
+  SDK's `.get()` does, then returns fixed audio bytes
+- Rate limiting: disabled unless --rate-limit (to measure its overhead)
+
+Started by benchmarks.loadtest; can also be run by hand:
+    python -m benchmarks.loadtest_server --port 8765
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Toneo API with stubbed externals")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", type=Path, help="Dictionary DB (default: build the fixture)")
+    parser.add_argument("--tts-latency", type=float, default=0.15, help="Stub Azure latency (s)")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep rate limiting on")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="toneo-loadtest-"))
+    db_path = args.db
+    if db_path is None:
+        from benchmarks.fixtures import build_fixture_db
+        db_path = build_fixture_db(workdir / "cedict.db")
+
+    # Settings are read at import time, so configure the environment first
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(db_path).resolve()}"
+    os.environ["AZURE_SPEECH_KEY"] = "loadtest"
+
+    import uvicorn
+    from app.core.rate_limit import limiter
+    from app.main import app
+    from app.services import tts
+
+    stub_audio = bytes(range(256)) * 64
+
+    def fake_azure(ssml: str) -> bytes:
+        time.sleep(args.tts_latency)
+        return stub_audio
+
+    tts._synthesize_azure = fake_azure
+    tts.CACHE_DIR = workdir / "tts_cache"
+    limiter.enabled = args.rate_limit
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
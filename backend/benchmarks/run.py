@@ -0,0 +1,423 @@
+"""
+Toneo - Benchmark Runner
+Times the analysis, sandhi, pinyin, dictionary and TTS pipelines on a fixed
+corpus and a synthetic CC-CEDICT database, and writes JSON results that
+can be compared between commits.
+
+Usage (from backend/):
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --output after.json --compare before.json
+    python -m benchmarks.run --filter analyze/ --rounds 3
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable, Optional
+
+from benchmarks.corpus import TEXTS
+from benchmarks.fixtures import build_fixture_db
+
+
+# name -> setup(context) returning the callable to time
+BENCHMARKS: dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark setup function under `name`."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class Context:
+    """Shared state for benchmark setups (fixture DB, temp dir, cleanups)."""
+
+    def __init__(self, workdir: Path, stack: ExitStack):
+        self.workdir = workdir
+        self.stack = stack
+        self._db_path: Optional[Path] = None
+        self._analyzer = None
+
+    @property
+    def db_path(self) -> Path:
+        if self._db_path is None:
+            self._db_path = build_fixture_db(self.workdir / "cedict.db")
+        return self._db_path
+
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            from app.services.tone_analyzer import ToneAnalyzer
+            self._analyzer = ToneAnalyzer(db_path=str(self.db_path))
+        return self._analyzer
+
+    def patch(self, obj, attr: str, value) -> None:
+        """Set obj.attr for the rest of the run, restoring it afterwards."""
+        original = getattr(obj, attr)
+        setattr(obj, attr, value)
+        self.stack.callback(setattr, obj, attr, original)
+
+
+def clear_analysis_caches(analyzer) -> None:
+    """Drop every warm cache the analysis path relies on."""
+    from app.services import tone_analyzer
+
+    analyzer._get_session()[1].candidates.clear()
+    tone_analyzer._cached_zipf_frequency.cache_clear()
+    tone_analyzer._context_reading.cache_clear()
+    tone_analyzer._word_pinyin.cache_clear()
+    tone_analyzer._has_tone_ambiguity.cache_clear()
+
+
+# ============== Analysis ==============
+
+def _analyze(label: str):
+    @benchmark(f"analyze/{label}")
+    def setup(ctx: Context):
+        analyzer, text = ctx.analyzer, TEXTS[label]
+        return lambda: analyzer.analyze_text(text)
+
+
+for _label in TEXTS:
+    _analyze(_label)
+
+
+@benchmark("analyze/long_phrase_sandhi")
+def _(ctx: Context):
+    analyzer, text = ctx.analyzer, TEXTS["long"]
+    return lambda: analyzer.analyze_text(text, phrase_sandhi=True)
+
+
+@benchmark("analyze/long_cold_caches")
+def _(ctx: Context):
+    analyzer, text = ctx.analyzer, TEXTS["long"]
+
+    def run():
+        clear_analysis_caches(analyzer)
+        analyzer.analyze_text(text)
+    return run
+
+
+@benchmark("analyze/long_no_dictionary")
+def _(ctx: Context):
+    from app.services.tone_analyzer import ToneAnalyzer
+    analyzer, text = ToneAnalyzer(db_path=None), TEXTS["long"]
+    return lambda: analyzer.analyze_text(text)
+
+
+# ============== Serialization ==============
+
+@benchmark("serialize/analyze_long_default")
+def _(ctx: Context):
+    from fastapi.responses import JSONResponse
+    result = ctx.analyzer.analyze_text(TEXTS["long"])
+    # FastAPI's response_model path: dump to JSON-able python, then json.dumps
+    return lambda: JSONResponse(result.model_dump(mode="json")).body
+
+
+@benchmark("serialize/analyze_long_fast")
+def _(ctx: Context):
+    from app.core.responses import FastJSONResponse
+    result = ctx.analyzer.analyze_text(TEXTS["long"])
+    return lambda: FastJSONResponse(result).body
+
+
+@benchmark("serialize/analyze_long_columnar")
+def _(ctx: Context):
+    from app.core.responses import FastJSONResponse
+    from app.models.schemas import AnalyzeColumnarResponse
+    result = ctx.analyzer.analyze_text(TEXTS["long"])
+    return lambda: FastJSONResponse(AnalyzeColumnarResponse.from_response(result)).body
+
+
+# ============== Sandhi and pinyin utils ==============
+
+def _corpus_words(ctx: Context) -> list[tuple[str, list[int]]]:
+    """(word, citation tones) for every Chinese token of the long text."""
+    result = ctx.analyzer.analyze_text(TEXTS["long"])
+    return [(w.characters, w.original_tones or w.tones) for w in result.words]
+
+
+@benchmark("sandhi/apply_tone_sandhi")
+def _(ctx: Context):
+    from app.services.tone_sandhi import apply_tone_sandhi
+    words = _corpus_words(ctx)
+
+    def run():
+        for word, tones in words:
+            apply_tone_sandhi(word, tones)
+    return run
+
+
+@benchmark("sandhi/apply_phrase_sandhi")
+def _(ctx: Context):
+    from app.services.tone_sandhi import apply_phrase_sandhi
+    words = _corpus_words(ctx)
+    chars = [w for w, _ in words]
+    tones = [t for _, t in words]
+    phrase_ids = [i // 8 for i in range(len(words))]
+    return lambda: apply_phrase_sandhi(chars, tones, phrase_ids)
+
+
+def _syllables(ctx: Context) -> list[str]:
+    result = ctx.analyzer.analyze_text(TEXTS["long"])
+    return [s.pinyin for w in result.words for s in w.syllables]
+
+
+@benchmark("pinyin/extract_tone_from_pinyin")
+def _(ctx: Context):
+    from app.services.pinyin_utils import extract_tone_from_pinyin
+    syllables = _syllables(ctx)
+    return lambda: [extract_tone_from_pinyin(s) for s in syllables]
+
+
+@benchmark("pinyin/pinyin_to_numbered")
+def _(ctx: Context):
+    from app.services.pinyin_utils import pinyin_to_numbered
+    syllables = _syllables(ctx)
+    return lambda: [pinyin_to_numbered(s) for s in syllables]
+
+
+@benchmark("pinyin/change_pinyin_tone")
+def _(ctx: Context):
+    from app.services.pinyin_utils import change_pinyin_tone
+    syllables = _syllables(ctx)
+    return lambda: [change_pinyin_tone(s, 2) for s in syllables]
+
+
+# ============== Dictionary ==============
+
+def _lookup(label: str, word: str):
+    @benchmark(f"dictionary/{label}")
+    def setup(ctx: Context):
+        from app.routers import dictionary as dictionary_router
+        analyzer = ctx.analyzer
+        ctx.patch(dictionary_router, "get_analyzer", lambda: analyzer)
+        return lambda: dictionary_router.lookup_word(word)
+
+
+_lookup("lookup_hit", "学习")
+_lookup("lookup_miss", "龘龘龘")
+
+
+def _search(label: str, query: str):
+    @benchmark(f"dictionary/{label}")
+    def setup(ctx: Context):
+        from app.routers import dictionary as dictionary_router
+        analyzer = ctx.analyzer
+        ctx.patch(dictionary_router, "get_analyzer", lambda: analyzer)
+        return lambda: dictionary_router.search_dictionary(query)
+
+
+_search("search_selective", "definition second")  # Corpus words only
+_search("search_all_rows", "filler")  # Matches every filler row (worst case)
+
+
+def _fuzzy(label: str, query: str):
+    @benchmark(f"dictionary/{label}")
+    def setup(ctx: Context):
+        from app.routers import dictionary as dictionary_router
+        analyzer = ctx.analyzer
+        ctx.patch(dictionary_router, "get_analyzer", lambda: analyzer)
+        return lambda: dictionary_router.fuzzy_pinyin(query)
+
+
+_fuzzy("fuzzy_confused", "xve xi")  # 学习 (xue2 xi2) typed with ü for u
+_fuzzy("fuzzy_prefix_all_rows", "xx")  # Prefix of every filler key (worst case)
+
+
+def _drill(label: str, pattern: str, hsk: Optional[int]):
+    @benchmark(f"dictionary/{label}")
+    def setup(ctx: Context):
+        from app.routers import dictionary as dictionary_router
+        analyzer = ctx.analyzer
+        ctx.patch(dictionary_router, "get_analyzer", lambda: analyzer)
+        return lambda: dictionary_router.tone_drill(pattern, hsk=hsk, n=20)
+
+
+_drill("drill_hsk", "3-3", 2)
+_drill("drill_all_levels", "4-2", None)  # Biggest buckets (filler words)
+
+
+@benchmark("dictionary/vocab_page_deep")
+def _(ctx: Context):
+    from app.routers import dictionary as dictionary_router
+    from app.services.vocab import encode_cursor
+    analyzer = ctx.analyzer
+    ctx.patch(dictionary_router, "get_analyzer", lambda: analyzer)
+    # Last page of the biggest list (words outside HSK)
+    last_id = analyzer._get_db().execute("SELECT MAX(id) FROM entries WHERE hsk_level = 0").fetchone()[0]
+    cursor = encode_cursor(analyzer.dictionary_version, last_id - 150)
+    return lambda: dictionary_router.vocab_list(0, after=cursor, limit=100)
+
+
+# ============== Rate limiting ==============
+
+def _client_ips(n: int = 1000) -> list[str]:
+    import random
+    rng = random.Random(5)
+    return [f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+            for _ in range(n)]
+
+
+@benchmark("rate_limit/trusted_proxy_1000_ips")
+def _(ctx: Context):
+    from app.core.rate_limit import _is_trusted_proxy
+    ips = _client_ips()
+    return lambda: [_is_trusted_proxy(ip) for ip in ips]
+
+
+@benchmark("rate_limit/take_local_1000_keys")
+def _(ctx: Context):
+    from app.core.rate_limit import LocalBucketStore
+    store, keys = LocalBucketStore(), _client_ips()
+    return lambda: [store.take(key, 60, 1.0) for key in keys]
+
+
+# ============== TTS ==============
+
+FAKE_AUDIO = bytes(range(256)) * 64  # 16 KiB, about one second of MP3
+
+
+def _patch_tts(ctx: Context):
+    from app.core.config import settings
+    from app.services import tts
+
+    ctx.patch(settings, "azure_speech_key", "benchmark")
+    ctx.patch(tts, "CACHE_DIR", ctx.workdir / "tts_cache")
+    ctx.patch(tts, "_synthesize_azure", lambda ssml: FAKE_AUDIO)
+    return tts
+
+
+@benchmark("tts/cached")
+def _(ctx: Context):
+    tts = _patch_tts(ctx)
+    loop = asyncio.new_event_loop()
+    ctx.stack.callback(loop.close)
+    loop.run_until_complete(tts.synthesize_speech("你好"))
+    return lambda: loop.run_until_complete(tts.synthesize_speech("你好"))
+
+
+@benchmark("tts/uncached")
+def _(ctx: Context):
+    tts = _patch_tts(ctx)
+    loop = asyncio.new_event_loop()
+    ctx.stack.callback(loop.close)
+    counter = iter(range(10**9))
+    # A new text every call, so every call misses the cache and writes a file
+    return lambda: loop.run_until_complete(tts.synthesize_speech(f"你好{next(counter)}"))
+
+
+# ============== Runner ==============
+
+def measure(fn: Callable, rounds: int, min_round_time: float) -> dict:
+    """Time `fn`; returns per-call statistics in microseconds."""
+    fn()  # Warm up
+
+    # Calibrate calls per round so each round lasts at least min_round_time
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_time or iterations >= 1 << 20:
+            break
+        iterations *= 2
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - start) / iterations * 1e6)
+
+    return {
+        "iterations": iterations,
+        "rounds": rounds,
+        "min_us": min(samples),
+        "median_us": statistics.median(samples),
+        "mean_us": statistics.fmean(samples),
+        "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """Print median deltas against `baseline`. Returns True if nothing regressed."""
+    ok = True
+    print(f"\nComparison with {baseline.get('commit') or 'baseline'} (threshold {threshold:.0%}):")
+    for name, current in results["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if before is None:
+            print(f"  {name:40s} (new)")
+            continue
+        ratio = current["median_us"] / before["median_us"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            ok = False
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"  {name:40s} {before['median_us']:12.1f} -> {current['median_us']:12.1f} us  ({ratio:5.2f}x){flag}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Toneo benchmark suite")
+    parser.add_argument("--output", type=Path, help="Write JSON results here")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Regression threshold (default 10%%)")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-round-time", type=float, default=0.05, help="Seconds per round")
+    args = parser.parse_args()
+
+    selected = [name for name in BENCHMARKS if args.filter in name]
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+
+    with ExitStack() as stack, tempfile.TemporaryDirectory() as tmp:
+        ctx = Context(Path(tmp), stack)
+        for name in selected:
+            fn = BENCHMARKS[name](ctx)
+            stats = measure(fn, args.rounds, args.min_round_time)
+            results["benchmarks"][name] = stats
+            print(f"  {name:40s} median {stats['median_us']:12.1f} us  (±{stats['stdev_us']:.1f})")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if not compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
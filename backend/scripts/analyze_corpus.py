@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Toneo - Offline Corpus Analysis
+Annotates a large text file (subtitles, textbooks...) with ToneAnalyzer,
+without going through the HTTP API.
+
+The input is read as a stream and split into sentences (the same
+splitter as POST /analyze/stream), grouped into shards of about
+SHARD_CHARS characters and analyzed by a process pool. Every worker loads
+jieba and opens the dictionary once, in its initializer. Results are
+written in input order as shards complete, with at most a few shards per
+worker in flight, so memory does not grow with the corpus.
+
+Output formats:
+    jsonl     One POST /analyze response (text + words) per sentence
+    columnar  One JSON record batch per shard, Arrow-style: flat arrays of
+              words, offsets, pinyin, tones, original tones and sandhi
+              flags, with offset arrays marking where each sentence's
+              words and each word's tones start
+    parquet   One row per word, one row group per shard (needs pyarrow)
+
+Usage (from backend/):
+    python scripts/analyze_corpus.py corpus.txt -o corpus.jsonl
+    python scripts/analyze_corpus.py corpus.txt -o corpus.parquet --format parquet --workers 8
+    cat corpus.txt | python scripts/analyze_corpus.py - --format columnar > batches.ndjson
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.core.config import settings  # noqa: E402
+from app.models.schemas import AnalyzeResponse  # noqa: E402
+from app.services.text_stream import iter_sentences, iter_text_chunks  # noqa: E402
+from app.services.tone_analyzer import ToneAnalyzer  # noqa: E402
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional dependency, only for --format parquet
+    pyarrow = None
+
+
+# Characters of input per task sent to a worker
+SHARD_CHARS = 20_000
+
+# Shards queued or running per worker (bounds memory on huge inputs)
+IN_FLIGHT_PER_WORKER = 2
+
+FORMATS = ("jsonl", "columnar", "parquet")
+
+# Columns of --format parquet (one row per word)
+PARQUET_COLUMNS = (
+    "sentence", "word", "offset", "pinyin", "tones", "original_tones", "has_sandhi", "confidence",
+)
+
+# Set in each worker by _init_worker
+_analyzer: Optional[ToneAnalyzer] = None
+_phrase_sandhi = False
+_format = "jsonl"
+
+
+def parquet_schema():
+    """Schema of --format parquet (one row per word)."""
+    tones = pyarrow.list_(pyarrow.int8())
+    types = (
+        pyarrow.int64(), pyarrow.string(), pyarrow.int32(), pyarrow.string(),
+        tones, tones, pyarrow.bool_(), pyarrow.string(),
+    )
+    return pyarrow.schema(list(zip(PARQUET_COLUMNS, types)))
+
+
+def iter_shards(sentences: Iterable[str], shard_chars: int = SHARD_CHARS) -> Iterator[tuple[int, list[str]]]:
+    """Group sentences into (index of the first sentence, sentences) shards."""
+    shard: list[str] = []
+    size = 0
+    first = 0
+    for sentence in sentences:
+        shard.append(sentence)
+        size += len(sentence)
+        if size >= shard_chars:
+            yield first, shard
+            first += len(shard)
+            shard, size = [], 0
+    if shard:
+        yield first, shard
+
+
+def _init_worker(db_path: Optional[str], phrase_sandhi: bool, fmt: str) -> None:
+    """Load jieba, pypinyin, wordfreq and the dictionary once per worker."""
+    global _analyzer, _phrase_sandhi, _format
+    import jieba
+    from app.prefork import WARM_UP_TEXT
+
+    jieba.initialize()
+    _analyzer = ToneAnalyzer(db_path=db_path)
+    _analyzer.analyze_text(WARM_UP_TEXT, phrase_sandhi=phrase_sandhi)
+    _phrase_sandhi, _format = phrase_sandhi, fmt
+
+
+def _columns(first: int, sentences: list[str], results: list[AnalyzeResponse]) -> dict:
+    """Arrow-style record batch of one shard."""
+    batch = {
+        "first_sentence": first,
+        "sentences": sentences,
+        "word_offsets": [0],
+        "words": [],
+        "offsets": [],
+        "pinyin": [],
+        "tone_offsets": [0],
+        "tones": [],
+        "original_tones": [],
+        "sandhi": [],
+        "confidence": [],
+    }
+    for result in results:
+        for word in result.words:
+            batch["words"].append(word.characters)
+            batch["offsets"].append(word.offset)
+            batch["pinyin"].append(word.pinyin)
+            batch["tones"].extend(word.tones)
+            batch["original_tones"].extend(word.original_tones or word.tones)
+            batch["tone_offsets"].append(len(batch["tones"]))
+            batch["sandhi"].append(word.has_sandhi)
+            batch["confidence"].append(word.confidence.value)
+        batch["word_offsets"].append(len(batch["words"]))
+    return batch
+
+
+def _parquet_rows(first: int, results: list[AnalyzeResponse]) -> dict:
+    """Columns of one shard for parquet_schema()."""
+    rows = {name: [] for name in PARQUET_COLUMNS}
+    for index, result in enumerate(results, start=first):
+        for word in result.words:
+            rows["sentence"].append(index)
+            rows["word"].append(word.characters)
+            rows["offset"].append(word.offset)
+            rows["pinyin"].append(word.pinyin)
+            rows["tones"].append(word.tones)
+            rows["original_tones"].append(word.original_tones or word.tones)
+            rows["has_sandhi"].append(word.has_sandhi)
+            rows["confidence"].append(word.confidence.value)
+    return rows
+
+
+def analyze_shard(shard: tuple[int, list[str]]) -> tuple[object, int, float]:
+    """
+    Analyze one shard in a worker.
+
+    Returns:
+        (output of the shard, characters analyzed, worker CPU seconds)
+    """
+    first, sentences = shard
+    start = time.process_time()
+    results = [_analyzer.analyze_text(s, phrase_sandhi=_phrase_sandhi) for s in sentences]
+    if _format == "jsonl":
+        serialize = AnalyzeResponse.__pydantic_serializer__.to_json
+        output = b"".join(serialize(result) + b"\n" for result in results)
+    elif _format == "columnar":
+        batch = _columns(first, sentences, results)
+        output = json.dumps(batch, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+    else:
+        output = _parquet_rows(first, results)
+    return output, sum(len(s) for s in sentences), time.process_time() - start
+
+
+def analyze_corpus(
+    source: BinaryIO,
+    workers: int,
+    db_path: Optional[str],
+    phrase_sandhi: bool = False,
+    fmt: str = "jsonl",
+    shard_chars: int = SHARD_CHARS,
+) -> Iterator[tuple[object, int, float]]:
+    """
+    Analyze a UTF-8 stream in a process pool.
+
+    Yields:
+        analyze_shard() results, in input order
+    """
+    shards = iter_shards(iter_sentences(iter_text_chunks(source)), shard_chars)
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(db_path, phrase_sandhi, fmt)
+    ) as pool:
+        pending = deque()
+        for shard in shards:
+            pending.append(pool.submit(analyze_shard, shard))
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Annotate a Chinese corpus with tones, offline")
+    parser.add_argument("input", help="UTF-8 text file ('-' = stdin)")
+    parser.add_argument("-o", "--output", type=Path, help="Output file (default: stdout; required for parquet)")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--phrase-sandhi", action="store_true", help="Apply sandhi across word boundaries")
+    parser.add_argument("--shard-chars", type=int, default=SHARD_CHARS, help="Characters per worker task")
+    parser.add_argument("--db", default=str(settings.database_path or ""), help="CC-CEDICT database")
+    args = parser.parse_args(argv)
+
+    if args.format == "parquet":
+        if pyarrow is None:
+            print("--format parquet needs pyarrow (pip install pyarrow)", file=sys.stderr)
+            return 1
+        if args.output is None:
+            print("--format parquet needs --output", file=sys.stderr)
+            return 1
+
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    sink = None
+    writer = None
+    if args.format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(args.output, parquet_schema())
+    else:
+        sink = open(args.output, "wb") if args.output else sys.stdout.buffer
+
+    chars = 0
+    cpu_seconds = 0.0
+    start = time.perf_counter()
+    try:
+        for output, shard_chars, shard_cpu in analyze_corpus(
+            source, args.workers, args.db or None, args.phrase_sandhi, args.format, args.shard_chars
+        ):
+            if writer is not None:
+                writer.write_table(pyarrow.Table.from_pydict(output, schema=parquet_schema()))
+            else:
+                sink.write(output)
+            chars += shard_chars
+            cpu_seconds += shard_cpu
+    finally:
+        if writer is not None:
+            writer.close()
+        elif sink is not sys.stdout.buffer:
+            sink.close()
+        else:
+            sink.flush()
+        if source is not sys.stdin.buffer:
+            source.close()
+    elapsed = time.perf_counter() - start
+
+    # Worker start-up (loading jieba etc.) is included in the wall time only
+    print(
+        f"Analyzed {chars:,} characters in {elapsed:.1f}s with {args.workers} workers: "
+        f"{chars / elapsed:,.0f} chars/s, "
+        f"{chars / cpu_seconds if cpu_seconds else 0:,.0f} chars/s per core (analysis CPU time)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
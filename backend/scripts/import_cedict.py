@@ -4,7 +4,7 @@ Toneo - CC-CEDICT Import Script
 Downloads and imports CC-CEDICT dictionary into SQLite.
 
 Usage:
-    python scripts/import_cedict.py
+    python scripts/import_cedict.py [--force] [--sentences cmn_sentences.tsv]
 
 Data source:
     https://www.mdbg.net/chinese/dictionary?page=cedict
@@ -14,9 +14,23 @@ import sqlite3
 import re
 import gzip
 import csv
+import hashlib
+import heapq
+import os
+import time
+import sys
 import urllib.request
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+
+import jieba
+from wordfreq import zipf_frequency
+from zhon.hanzi import characters as hanzi_chars
+
+# Pinyin keys and drill buckets must be built exactly like the API reads them
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.services.drills import frequency_band, tone_pattern  # noqa: E402
+from app.services.pinyin_utils import fuzzy_pinyin_key  # noqa: E402
 
 
 # CC-CEDICT download URL
@@ -28,6 +42,16 @@ DB_PATH = Path(__file__).parent.parent / "data" / "cedict.db"
 # HSK 3.0 vocabulary (ivankra/hsk30 - clean CSV with pinyin, POS, levels 1-9)
 HSK_DATA_URL = "https://raw.githubusercontent.com/ivankra/hsk30/master/hsk30.csv"
 
+# Mandarin sentences for the examples (Tatoeba per-language export:
+# https://tatoeba.org/en/downloads, License: CC BY 2.0 FR). Optional.
+SENTENCES_PATH = Path(__file__).parent.parent / "data" / "cache" / "cmn_sentences.tsv"
+
+# Example sentences kept per word, and the longest sentence considered
+EXAMPLES_PER_WORD = 5
+MAX_SENTENCE_LENGTH = 30
+# Difficulty of a word outside HSK (levels 1-6, 7 = 7-9)
+NON_HSK_DIFFICULTY = 8
+
 
 def download_cedict(force: bool = False) -> Path:
     """
@@ -157,11 +181,11 @@ def load_hsk_data() -> dict[str, int]:
     return hsk_data
 
 
-def create_database():
+def create_database(db_path: Path = DB_PATH):
     """Create SQLite database with schema."""
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     # Create table
@@ -175,25 +199,281 @@ def create_database():
             definitions TEXT,
             hsk_level INTEGER DEFAULT 0,
             frequency INTEGER DEFAULT 0,
+            pinyin_key TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
 
     # Create indexes
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_simplified ON entries(simplified)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_traditional ON entries(traditional)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_pinyin ON entries(pinyin)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_hsk ON entries(hsk_level)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pinyin_key ON entries(pinyin_key, frequency DESC)")
+
+    # Character-level traditional -> simplified table, used by the analyzer
+    # to segment traditional text (filled by build_traditional_index)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS traditional_chars (
+            traditional TEXT PRIMARY KEY,
+            simplified TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+
+    # Tone drill buckets (tone pattern x HSK level x frequency band), each
+    # numbered 0..size-1 so a word is drawn by primary key (filled by
+    # build_drill_buckets, read by app/services/drills.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS drill_words (
+            pattern TEXT NOT NULL,
+            hsk_level INTEGER NOT NULL,
+            band INTEGER NOT NULL,
+            slot INTEGER NOT NULL,
+            entry_id INTEGER NOT NULL,
+            PRIMARY KEY (pattern, hsk_level, band, slot)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS drill_buckets (
+            pattern TEXT NOT NULL,
+            hsk_level INTEGER NOT NULL,
+            band INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            PRIMARY KEY (pattern, hsk_level, band)
+        ) WITHOUT ROWID
+    """)
+
+    # Example sentences: the sentences used, and each word's best few
+    # (filled by build_example_index, read by app/services/example_sentences.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sentences (
+            id INTEGER PRIMARY KEY,
+            text TEXT NOT NULL,
+            difficulty INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS word_examples (
+            word TEXT NOT NULL,
+            rank INTEGER NOT NULL,
+            sentence_id INTEGER NOT NULL,
+            PRIMARY KEY (word, rank)
+        ) WITHOUT ROWID
+    """)
+
+    # Version stamp read by the API to detect a new dictionary
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
 
     conn.commit()
     return conn
 
 
-def import_cedict(force: bool = False):
+def build_traditional_index(conn: sqlite3.Connection) -> int:
+    """
+    Fill traditional_chars from the single-character entries.
+
+    Characters that are also simplified headwords (著, 乾, 干...) are left
+    out: converting them would corrupt simplified text. When a traditional
+    character has several simplified forms, HSK words win, then frequent ones.
+
+    Returns:
+        Number of characters mapped
+    """
+    conn.execute("DELETE FROM traditional_chars")
+    conn.execute("""
+        INSERT OR IGNORE INTO traditional_chars (traditional, simplified)
+        SELECT traditional, simplified FROM entries
+        WHERE length(simplified) = 1 AND length(traditional) = 1
+          AND traditional != simplified
+          AND traditional NOT IN (SELECT simplified FROM entries)
+        ORDER BY hsk_level = 0, hsk_level, id
+    """)
+    conn.commit()
+    return conn.execute("SELECT COUNT(*) FROM traditional_chars").fetchone()[0]
+
+
+def build_pinyin_index(conn: sqlite3.Connection) -> None:
+    """Fill entries.pinyin_key, the fuzzy pinyin lookup key (see fuzzy_pinyin_key)."""
+    rows = conn.execute("SELECT id, pinyin FROM entries").fetchall()
+    conn.executemany(
+        "UPDATE entries SET pinyin_key = ? WHERE id = ?",
+        [(fuzzy_pinyin_key(pinyin), entry_id) for entry_id, pinyin in rows],
+    )
+    conn.commit()
+
+
+def build_drill_buckets(conn: sqlite3.Connection) -> int:
+    """
+    Fill drill_words/drill_buckets from the all-hanzi entries.
+
+    A word listed several times with the same tones (surname and common
+    noun...) is filed once, under its most frequent entry. Within a bucket,
+    slots follow frequency (most common first).
+
+    Returns:
+        Number of words filed
+    """
+    hanzi_re = re.compile(f"[{hanzi_chars}]+")
+    buckets: dict[tuple[str, int, int], list[int]] = {}
+    seen = set()
+    rows = conn.execute(
+        "SELECT id, simplified, tones, hsk_level, frequency FROM entries ORDER BY frequency DESC, id"
+    )
+    for entry_id, simplified, tones, hsk_level, frequency in rows:
+        if (simplified, tones) in seen or not hanzi_re.fullmatch(simplified):
+            continue
+        if len(tones.split(",")) != len(simplified):
+            continue
+        seen.add((simplified, tones))
+        bucket = (tone_pattern(tones), hsk_level or 0, frequency_band(frequency))
+        buckets.setdefault(bucket, []).append(entry_id)
+
+    conn.execute("DELETE FROM drill_words")
+    conn.execute("DELETE FROM drill_buckets")
+    conn.executemany(
+        "INSERT INTO drill_words (pattern, hsk_level, band, slot, entry_id) VALUES (?, ?, ?, ?, ?)",
+        (
+            (*bucket, slot, entry_id)
+            for bucket, entry_ids in buckets.items()
+            for slot, entry_id in enumerate(entry_ids)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO drill_buckets (pattern, hsk_level, band, size) VALUES (?, ?, ?, ?)",
+        ((*bucket, len(entry_ids)) for bucket, entry_ids in buckets.items()),
+    )
+    conn.commit()
+    return len(seen)
+
+
+def read_tatoeba_sentences(path: Path) -> Iterator[tuple[int, str]]:
+    """
+    (id, text) of the Mandarin sentences of a Tatoeba TSV export.
+
+    Format: id<TAB>lang<TAB>text (per-language exports have lang "cmn"
+    throughout; other languages of the full export are skipped).
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 3 or parts[1] != "cmn" or not parts[0].isdigit():
+                continue
+            yield int(parts[0]), parts[2].strip()
+
+
+def build_example_index(conn: sqlite3.Connection, sentences_path: Path) -> int:
+    """
+    Index example sentences by the dictionary words they contain.
+
+    Sentences are segmented once, like the analyzer does it (traditional
+    characters converted through traditional_chars, so build that first).
+    A sentence's difficulty is the highest HSK level of its words; each
+    word keeps its EXAMPLES_PER_WORD easiest, then shortest, sentences.
+
+    Returns:
+        Number of sentences kept
+    """
+    hanzi_re = re.compile(f"[{hanzi_chars}]+")
+    traditional = dict(conn.execute("SELECT traditional, simplified FROM traditional_chars"))
+    to_simplified = str.maketrans(traditional)
+
+    difficulty_of: dict[str, int] = {}
+    for simplified, hsk_level in conn.execute("SELECT simplified, hsk_level FROM entries"):
+        level = hsk_level or NON_HSK_DIFFICULTY
+        difficulty_of[simplified] = min(level, difficulty_of.get(simplified, level))
+
+    texts: dict[int, tuple[str, int]] = {}
+    seen_texts = set()
+    best: dict[str, list[tuple[int, int, int]]] = {}  # word -> max-heap of (-key)
+    for sentence_id, text in read_tatoeba_sentences(sentences_path):
+        if not text or len(text) > MAX_SENTENCE_LENGTH or text in seen_texts:
+            continue
+        words = {
+            word
+            for run in hanzi_re.findall(text)
+            for word in jieba.cut(run.translate(to_simplified))
+        }
+        known = [word for word in words if word in difficulty_of and len(text) > len(word) + 1]
+        if not known:
+            continue
+        seen_texts.add(text)
+        difficulty = max(difficulty_of.get(word, NON_HSK_DIFFICULTY) for word in words)
+        texts[sentence_id] = (text, difficulty)
+        key = (-difficulty, -len(text), -sentence_id)
+        for word in known:
+            heap = best.setdefault(word, [])
+            if len(heap) < EXAMPLES_PER_WORD:
+                heapq.heappush(heap, key)
+            elif key > heap[0]:
+                heapq.heapreplace(heap, key)
+
+    examples = [
+        (word, rank, -key[2])
+        for word, heap in best.items()
+        for rank, key in enumerate(sorted(heap, reverse=True))
+    ]
+    used = {sentence_id for _, _, sentence_id in examples}
+
+    conn.execute("DELETE FROM word_examples")
+    conn.execute("DELETE FROM sentences")
+    conn.executemany(
+        "INSERT INTO sentences (id, text, difficulty) VALUES (?, ?, ?)",
+        ((sentence_id, *texts[sentence_id]) for sentence_id in sorted(used)),
+    )
+    conn.executemany(
+        "INSERT INTO word_examples (word, rank, sentence_id) VALUES (?, ?, ?)",
+        examples,
+    )
+    conn.commit()
+    return len(used)
+
+
+def build_search_index(conn: sqlite3.Connection) -> bool:
+    """
+    Build the FTS5 index over definitions for English -> Chinese search.
+
+    External-content table: the text stays in `entries`, the index only
+    holds the inverted lists. Porter stemming lets "eating" find "to eat".
+
+    Returns:
+        False if this SQLite build has no FTS5 (search is then unavailable)
+    """
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS definitions_fts USING fts5(
+                definitions,
+                content='entries',
+                content_rowid='id',
+                tokenize='porter unicode61 remove_diacritics 2'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"Warning: FTS5 not available, skipping search index: {e}")
+        return False
+    conn.execute("INSERT INTO definitions_fts(definitions_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO definitions_fts(definitions_fts) VALUES ('optimize')")
+    conn.commit()
+    return True
+
+
+def make_version(cedict_file: Path) -> str:
+    """Build a version stamp from the import time and the source file hash."""
+    digest = hashlib.sha1(cedict_file.read_bytes()).hexdigest()[:8]
+    return f"{time.strftime('%Y%m%d%H%M%S', time.gmtime())}-{digest}"
+
+
+def import_cedict(force: bool = False, sentences_path: Path = SENTENCES_PATH):
     """
     Main import function.
 
     Args:
         force: Re-download and re-import even if data exists
+        sentences_path: Tatoeba TSV for example sentences (skipped if missing)
     """
     print("=" * 60)
     print("Toneo - CC-CEDICT Import")
@@ -214,16 +494,15 @@ def import_cedict(force: bool = False):
     # Load HSK data
     hsk_data = load_hsk_data()
 
-    # Create database
-    print(f"Creating database at {DB_PATH}...")
-    conn = create_database()
+    # Build into a temporary file and swap it in at the end, so a running
+    # API never sees a half-imported dictionary (it hot-reloads on the swap)
+    tmp_path = DB_PATH.with_suffix(".db.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    print(f"Creating database at {tmp_path}...")
+    conn = create_database(tmp_path)
     cursor = conn.cursor()
 
-    # Clear existing data if re-importing
-    if force:
-        cursor.execute("DELETE FROM entries")
-        conn.commit()
-
     # Parse and import
     print("Parsing CC-CEDICT...")
     entries = []
@@ -241,6 +520,9 @@ def import_cedict(force: bool = False):
             # Add HSK level
             hsk_level = hsk_data.get(entry["simplified"], 0)
 
+            # Zipf frequency x 100 (0 = unknown), used to rank search results
+            frequency = round(zipf_frequency(entry["simplified"], "zh") * 100)
+
             entries.append((
                 entry["simplified"],
                 entry["traditional"],
@@ -248,41 +530,65 @@ def import_cedict(force: bool = False):
                 entry["tones"],
                 entry["definitions"],
                 hsk_level,
-                0,  # frequency (placeholder)
+                frequency,
             ))
 
-            # Batch insert every 10000 entries
-            if len(entries) >= 10000:
-                cursor.executemany(
-                    """INSERT INTO entries
-                       (simplified, traditional, pinyin, tones, definitions, hsk_level, frequency)
-                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                    entries
-                )
-                conn.commit()
-                print(f"  Imported {line_count} lines...")
-                entries = []
-
-    # Insert remaining entries
-    if entries:
+    # Most frequent entries first: search ranks only the first matches in
+    # id order for very common terms (see app/services/dictionary_search.py)
+    entries.sort(key=lambda e: -e[6])
+
+    print(f"Importing {len(entries):,} entries from {line_count:,} lines...")
+    for start in range(0, len(entries), 10000):
         cursor.executemany(
             """INSERT INTO entries
                (simplified, traditional, pinyin, tones, definitions, hsk_level, frequency)
                VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            entries
+            entries[start:start + 10000]
         )
-        conn.commit()
+    conn.commit()
 
     # Get final count
     count = cursor.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
     hsk_count = cursor.execute("SELECT COUNT(*) FROM entries WHERE hsk_level > 0").fetchone()[0]
 
+    print("Building fuzzy pinyin index...")
+    build_pinyin_index(conn)
+
+    print("Building traditional character index...")
+    traditional_count = build_traditional_index(conn)
+
+    example_count = 0
+    if sentences_path.exists():
+        print(f"Indexing example sentences from {sentences_path}...")
+        example_count = build_example_index(conn, sentences_path)
+    else:
+        print(f"No sentence corpus at {sentences_path}, skipping example sentences")
+
+    print("Building tone drill buckets...")
+    drill_count = build_drill_buckets(conn)
+
+    print("Building definition search index...")
+    searchable = build_search_index(conn)
+
+    version = make_version(cedict_file)
+    cursor.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (version,)
+    )
+    conn.commit()
     conn.close()
 
+    # Atomic swap (same directory, so rename never crosses filesystems)
+    os.replace(tmp_path, DB_PATH)
+
     print("=" * 60)
     print(f"Import complete!")
     print(f"  Total entries: {count:,}")
     print(f"  With HSK level: {hsk_count:,}")
+    print(f"  Traditional characters: {traditional_count:,}")
+    print(f"  Example sentences: {example_count:,}")
+    print(f"  Tone drill words: {drill_count:,}")
+    print(f"  Definition search: {'yes' if searchable else 'no (SQLite without FTS5)'}")
+    print(f"  Version: {version}")
     print(f"  Database: {DB_PATH}")
     print("=" * 60)
 
@@ -291,4 +597,7 @@ if __name__ == "__main__":
     import sys
 
     force = "--force" in sys.argv
-    import_cedict(force)
+    sentences_path = SENTENCES_PATH
+    if "--sentences" in sys.argv:
+        sentences_path = Path(sys.argv[sys.argv.index("--sentences") + 1])
+    import_cedict(force, sentences_path)
@@ -0,0 +1,100 @@
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+
+SCRIPT = Path(__file__).parent.parent / "scripts" / "analyze_corpus.py"
+
+CORPUS = "你好，我很好。\n我们一起学习中文吧！\n\n一个不好的东西。老师说：“你很好。”\n" * 5
+
+
+@pytest.fixture(scope="module")
+def analyze_corpus():
+    # Registered so the process pool can unpickle analyze_shard by reference
+    spec = importlib.util.spec_from_file_location("analyze_corpus", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["analyze_corpus"] = module
+    spec.loader.exec_module(module)
+    yield module
+    del sys.modules["analyze_corpus"]
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / "corpus.txt"
+    path.write_text(CORPUS, encoding="utf-8")
+    return path
+
+
+def test_iter_shards_keeps_order_and_sentences(analyze_corpus):
+    sentences = ["一二三", "四五", "六七八九", "十"]
+    shards = list(analyze_corpus.iter_shards(sentences, shard_chars=5))
+    assert shards == [(0, ["一二三", "四五"]), (2, ["六七八九", "十"])]
+
+
+def test_jsonl_matches_analyzer_in_input_order(analyze_corpus, corpus, tmp_path, capsys):
+    from app.services.tone_analyzer import ToneAnalyzer
+
+    output = tmp_path / "out.jsonl"
+    assert analyze_corpus.main([str(corpus), "-o", str(output), "--workers", "2", "--db", ""]) == 0
+    assert "chars/s per core" in capsys.readouterr().err
+
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 20
+    analyzer = ToneAnalyzer()
+    for line, sentence in zip(lines, ["你好，我很好。\n", "我们一起学习中文吧！\n\n", "一个不好的东西。", "老师说：“你很好。”"]):
+        record = json.loads(line)
+        assert record["text"] == sentence
+        assert record == json.loads(analyzer.analyze_text(sentence).model_dump_json())
+
+
+def test_columnar_batches(analyze_corpus, corpus, tmp_path):
+    output = tmp_path / "out.ndjson"
+    args = [str(corpus), "-o", str(output), "--format", "columnar", "--workers", "2", "--db", "",
+            "--phrase-sandhi", "--shard-chars", "40"]
+    assert analyze_corpus.main(args) == 0
+
+    batches = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert len(batches) > 1
+    assert [b["first_sentence"] for b in batches] == sorted(b["first_sentence"] for b in batches)
+    assert "".join(s for b in batches for s in b["sentences"]) == CORPUS.replace("”\n", "”")
+
+    batch = batches[0]
+    assert len(batch["word_offsets"]) == len(batch["sentences"]) + 1
+    assert batch["word_offsets"][-1] == len(batch["words"]) == len(batch["sandhi"])
+    assert batch["tone_offsets"][-1] == len(batch["tones"]) == len(batch["original_tones"])
+    # 你好: third-tone sandhi (3-3 -> 2-3)
+    index = batch["words"].index("你好")
+    start, end = batch["tone_offsets"][index], batch["tone_offsets"][index + 1]
+    assert batch["sandhi"][index]
+    assert batch["tones"][start:end] == [2, 3]
+    assert batch["original_tones"][start:end] == [3, 3]
+
+
+def test_parquet_needs_pyarrow_and_output(analyze_corpus, corpus, monkeypatch):
+    monkeypatch.setattr(analyze_corpus, "pyarrow", None)
+    assert analyze_corpus.main([str(corpus), "--format", "parquet"]) == 1
+
+
+def test_parquet_round_trip(analyze_corpus, corpus, tmp_path):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    from app.services.text_stream import iter_sentences
+    from app.services.tone_analyzer import ToneAnalyzer
+
+    output = tmp_path / "out.parquet"
+    args = [str(corpus), "-o", str(output), "--format", "parquet", "--workers", "2", "--db", "",
+            "--shard-chars", "40"]
+    assert analyze_corpus.main(args) == 0
+
+    table = pyarrow_parquet.read_table(output)
+    analyzer = ToneAnalyzer()
+    words = [w for s in iter_sentences([CORPUS]) for w in analyzer.analyze_text(s).words]
+    assert table.num_rows == len(words)
+    assert table.num_columns == len(analyze_corpus.PARQUET_COLUMNS)
+    assert table.schema.equals(analyze_corpus.parquet_schema())
+    assert table.column("word").to_pylist() == [w.characters for w in words]
+    # One row group per shard
+    assert pyarrow_parquet.ParquetFile(output).num_row_groups > 1
@@ -1,8 +1,10 @@
+import json
 import sqlite3
 
 import pytest
 from fastapi.testclient import TestClient
 
+from app.core.config import settings
 from app.main import app
 from app.routers import dictionary as dictionary_router
 from app.routers import tts as tts_router
@@ -15,6 +17,8 @@ def client():
 
 
 class DummyAnalyzer:
+    dictionary_version = "test-1"
+
     def __init__(self, db):
         self._db = db
 
@@ -23,7 +27,8 @@ class DummyAnalyzer:
 
 
 def make_db(entries):
-    db = sqlite3.connect(":memory:")
+    # The app runs in the TestClient portal thread, not the test thread
+    db = sqlite3.connect(":memory:", check_same_thread=False)
     db.row_factory = sqlite3.Row
     db.execute(
         """
@@ -54,17 +59,175 @@ def test_health_endpoint(client):
     assert response.status_code == 200
     payload = response.json()
     assert payload["status"] == "healthy"
+    # Attribution headers only go on CC-CEDICT backed routes
+    assert "X-Data-Source" not in response.headers
 
 
 def test_analyze_returns_words_and_headers(client):
     response = client.post("/api/analyze", json={"text": "你好"})
     assert response.status_code == 200
     assert response.headers.get("X-Data-Source") == "CC-CEDICT"
+    assert response.headers.get("X-Data-License") == "CC BY-SA 4.0"
     payload = response.json()
     assert payload["text"] == "你好"
     assert isinstance(payload["words"], list)
 
 
+def test_analyze_phrase_sandhi_reports_syllable_rule(client):
+    response = client.post("/api/analyze", json={"text": "我不去", "phrase_sandhi": True})
+    assert response.status_code == 200
+    syllables = [s for w in response.json()["words"] for s in w["syllables"]]
+    bu = next(s for s in syllables if s["char"] == "不")
+    assert bu["tone"] == 2
+    assert bu["sandhi_rule"] == "cross_word_bu_sandhi"
+
+
+def test_analyze_columnar_format_matches_word_layout(client):
+    text = "我很好，你呢？"
+    words = client.post("/api/analyze", json={"text": text}).json()["words"]
+    response = client.post("/api/analyze", json={"text": text, "format": "columnar"})
+    assert response.status_code == 200
+    columnar = response.json()
+    assert columnar["text"] == text
+    assert columnar["words"] == [w["characters"] for w in words]
+    assert columnar["pinyin"] == [w["pinyin"] for w in words]
+    assert columnar["tones"] == [w["tones"] for w in words]
+    assert columnar["original_tones"] == [w["original_tones"] for w in words]
+    assert columnar["confidence"] == [w["confidence"] for w in words]
+
+
+def test_analyze_stream_ndjson(client):
+    text = "我很好。你呢？" * 200
+    response = client.post("/api/analyze/stream", content=text.encode("utf-8"))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers.get("X-Data-Source") == "CC-CEDICT"
+    words = [json.loads(line) for line in response.text.splitlines()]
+    assert "".join(w["characters"] for w in words) == text.replace("。", "").replace("？", "")
+    assert words[0]["characters"] == "我"
+    # Offsets point into the whole document, not the sentence
+    for w in words:
+        assert text[w["offset"]:w["offset"] + len(w["characters"])] == w["characters"]
+    assert words[-1]["offset"] == len(text) - 2
+
+
+def test_analyze_stream_sse_with_file_upload(client):
+    response = client.post(
+        "/api/analyze/stream?phrase_sandhi=true",
+        files={"file": ("article.txt", "我不去。".encode("utf-8"), "text/plain")},
+        headers={"Accept": "text/event-stream"},
+    )
+    assert response.status_code == 200
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    assert [e[0] for e in events][-1] == "event: end"
+    words = [json.loads(e[1][len("data: "):]) for e in events if e[0] == "event: word"]
+    bu = next(s for w in words for s in w["syllables"] if s["char"] == "不")
+    assert bu["sandhi_rule"] == "cross_word_bu_sandhi"
+    assert json.loads(events[-1][1][len("data: "):]) == {"words": len(words)}
+
+
+def test_analyze_stream_rejects_empty_and_oversized(client, monkeypatch):
+    assert client.post("/api/analyze/stream", content=b"").status_code == 422
+    monkeypatch.setattr(settings, "stream_max_bytes", 10)
+    response = client.post("/api/analyze/stream", content="你好".encode("utf-8") * 10)
+    assert response.status_code == 413
+
+
+def test_analyze_stream_caps_multipart_while_parsing(client, monkeypatch):
+    from app.routers import analyze as analyze_router
+
+    monkeypatch.setattr(settings, "stream_max_bytes", 100)
+    monkeypatch.setattr(analyze_router, "MULTIPART_OVERHEAD", 1000)
+    parsed = []
+    original = analyze_router.MultiPartParser.parse
+
+    async def tracking_parse(self):
+        parsed.append(True)
+        return await original(self)
+
+    monkeypatch.setattr(analyze_router.MultiPartParser, "parse", tracking_parse)
+
+    # File within the body limit but over the document cap
+    over_cap = client.post("/api/analyze/stream", files={"file": ("a.txt", "你".encode("utf-8") * 50)})
+    assert over_cap.status_code == 413
+    assert parsed
+
+    # Declared length over the limit: rejected before anything is parsed
+    parsed.clear()
+    declared = client.post("/api/analyze/stream", files={"file": ("a.txt", "你".encode("utf-8") * 500)})
+    assert declared.status_code == 413
+    assert not parsed
+
+    # No Content-Length (chunked): aborted while reading the body
+    def chunks():
+        yield b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.txt\"\r\n\r\n"
+        for _ in range(100):
+            yield "你".encode("utf-8") * 10
+        yield b"\r\n--b--\r\n"
+
+    chunked = client.post(
+        "/api/analyze/stream",
+        content=chunks(),
+        headers={"Content-Type": "multipart/form-data; boundary=b"},
+    )
+    assert chunked.status_code == 413
+
+
+def test_incremental_document_edits(client):
+    created = client.post("/api/analyze/documents", json={"text": "我很好。你呢？"})
+    assert created.status_code == 201
+    doc = created.json()
+    words = doc["words"]
+
+    edit = {"revision": 0, "offset": 4, "deleted": 1, "inserted": "您"}
+    diff = client.post(f"/api/analyze/documents/{doc['document_id']}/edits", json=edit)
+    assert diff.status_code == 200
+    diff = diff.json()
+    words[diff["start"]:diff["start"] + diff["deleted"]] = diff["words"]
+    assert "".join(w["characters"] for w in words) == "我很好您呢"
+
+    current = client.get(f"/api/analyze/documents/{doc['document_id']}").json()
+    assert current["revision"] == 1
+    assert current["words"] == words
+
+    stale = client.post(f"/api/analyze/documents/{doc['document_id']}/edits", json=edit)
+    assert stale.status_code == 409
+    out_of_range = {"revision": 1, "offset": 50, "deleted": 0, "inserted": "好"}
+    assert client.post(
+        f"/api/analyze/documents/{doc['document_id']}/edits", json=out_of_range
+    ).status_code == 422
+    assert client.delete(f"/api/analyze/documents/{doc['document_id']}").status_code == 204
+    assert client.get(f"/api/analyze/documents/{doc['document_id']}").status_code == 404
+
+
+def test_document_text_is_capped_by_document_max_chars(client):
+    too_long = "好" * (settings.document_max_chars + 1)
+    assert client.post("/api/analyze/documents", json={"text": too_long}).status_code == 422
+    created = client.post("/api/analyze/documents", json={"text": ""}).json()
+    edit = {"revision": 0, "offset": 0, "deleted": 0, "inserted": too_long}
+    assert client.post(f"/api/analyze/documents/{created['document_id']}/edits", json=edit).status_code == 422
+
+
+def test_document_analysis_is_charged_per_character(client, monkeypatch):
+    from app.core import rate_limit
+    from app.routers import documents as documents_router
+
+    monkeypatch.setattr(rate_limit.limiter, "store", rate_limit.LocalBucketStore())
+    monkeypatch.setattr(documents_router, "DOCUMENT_ANALYZE_CHAR_LIMIT", "10/minute")
+    created = client.post("/api/analyze/documents", json={"text": "我很好。你呢？"}).json()
+
+    # Re-analyzing 你呢？ fits in the 3 characters left, the next edit does not
+    edit = {"revision": 0, "offset": 4, "deleted": 1, "inserted": "您"}
+    url = f"/api/analyze/documents/{created['document_id']}/edits"
+    assert client.post(url, json=edit).status_code == 200
+    edit = {"revision": 1, "offset": 0, "deleted": 0, "inserted": "嗯"}
+    limited = client.post(url, json=edit)
+    assert limited.status_code == 429
+    assert "Retry-After" in limited.headers
+    # Refused before the edit was applied
+    assert client.get(f"/api/analyze/documents/{created['document_id']}").json()["revision"] == 1
+
+
 def test_analyze_rejects_empty_input(client):
     response = client.post("/api/analyze", json={"text": ""})
     assert response.status_code == 422
@@ -105,6 +268,100 @@ def test_dictionary_from_db_entry(client, monkeypatch):
     assert payload["definitions"] == ["China", "Middle Kingdom"]
 
 
+def test_dictionary_examples_and_related(client, monkeypatch, tmp_path):
+    from benchmarks.fixtures import load_importer
+
+    importer = load_importer()
+    conn = importer.create_database(tmp_path / "cedict.db")
+    conn.executemany(
+        "INSERT INTO entries (simplified, traditional, pinyin, tones, definitions, hsk_level) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ("学习", "學習", "xue2 xi2", "2,2", "to learn", 1),
+            ("学生", "學生", "xue2 sheng5", "2,5", "student", 1),
+            ("学", "學", "xue2", "2", "to learn", 1),
+            ("字", "字", "zi4", "4", "character", 1),
+        ],
+    )
+    conn.commit()
+    corpus = tmp_path / "cmn_sentences.tsv"
+    corpus.write_text("1\tcmn\t学生在学习。\n", encoding="utf-8")
+    importer.build_example_index(conn, corpus)
+    conn.close()
+    db = sqlite3.connect(tmp_path / "cedict.db", check_same_thread=False)
+    db.row_factory = sqlite3.Row
+    monkeypatch.setattr(dictionary_router, "get_analyzer", lambda: DummyAnalyzer(db))
+    try:
+        payload = client.get("/api/dictionary/学习").json()
+    finally:
+        db.close()
+
+    assert payload["examples"] == ["学生在学习。"]
+    assert payload["related"] == ["学", "学生"]
+
+
+def test_dictionary_conditional_request_returns_304(client, monkeypatch):
+    db = make_db(entries=[("中国", "中國", "zhong1 guo2", "1,2", "China", 1)])
+    analyzer = DummyAnalyzer(db)
+    monkeypatch.setattr(dictionary_router, "get_analyzer", lambda: analyzer)
+    try:
+        first = client.get("/api/dictionary/中国")
+        etag = first.headers["ETag"]
+        repeat = client.get("/api/dictionary/中国", headers={"If-None-Match": etag})
+        other_word = client.get("/api/dictionary/中", headers={"If-None-Match": etag})
+        analyzer.dictionary_version = "test-2"
+        new_version = client.get("/api/dictionary/中国", headers={"If-None-Match": etag})
+    finally:
+        db.close()
+
+    assert first.status_code == 200
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+    assert repeat.headers["ETag"] == etag
+    assert other_word.status_code == 200
+    assert new_version.status_code == 200
+    assert new_version.headers["ETag"] != etag
+
+
+def test_analyze_etag_depends_on_input_and_options(client):
+    first = client.post("/api/analyze", json={"text": "你好"})
+    etag = first.headers["ETag"]
+    repeat = client.post("/api/analyze", json={"text": "你好"}, headers={"If-None-Match": etag})
+    sandhi = client.post(
+        "/api/analyze", json={"text": "你好", "phrase_sandhi": True}, headers={"If-None-Match": etag}
+    )
+    assert repeat.status_code == 304
+    assert sandhi.status_code == 200
+    assert sandhi.headers["ETag"] != etag
+
+
+def test_large_responses_are_compressed(client):
+    text = "我们一起去学习中文吧。" * 60
+    compressed = client.post("/api/analyze", json={"text": text}, headers={"Accept-Encoding": "gzip"})
+    plain = client.post("/api/analyze", json={"text": text}, headers={"Accept-Encoding": "identity"})
+    small = client.post("/api/analyze", json={"text": "好"}, headers={"Accept-Encoding": "gzip"})
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    assert compressed.json() == plain.json()  # httpx decodes transparently
+    assert compressed.num_bytes_downloaded < len(plain.content) // 5
+    assert "Content-Encoding" not in plain.headers
+    assert "Content-Encoding" not in small.headers
+    # Every representation tells caches it depends on Accept-Encoding
+    for response in (compressed, plain, small):
+        assert "Accept-Encoding" in response.headers["Vary"]
+
+    # The compressed representation's ETag still validates the resource,
+    # and the 304 names the representation the client holds
+    repeat = client.post(
+        "/api/analyze", json={"text": text},
+        headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["ETag"]},
+    )
+    assert repeat.status_code == 304
+    assert repeat.headers["ETag"] == compressed.headers["ETag"]
+    assert "Accept-Encoding" in repeat.headers["Vary"]
+
+
 def test_tts_too_long_returns_400(client):
     response = client.post("/api/tts", json={"text": "a" * 201})
     assert response.status_code == 400
@@ -127,3 +384,253 @@ def test_tts_success_returns_audio(client, monkeypatch):
     assert response.status_code == 200
     assert response.headers.get("content-type") == "audio/mpeg"
     assert response.content == b"audio"
+
+
+def make_search_db(tmp_path, entries):
+    from benchmarks.fixtures import load_importer
+
+    importer = load_importer()
+    conn = importer.create_database(tmp_path / "cedict.db")
+    conn.executemany(
+        "INSERT INTO entries (simplified, traditional, pinyin, tones, definitions, hsk_level, frequency) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        entries,
+    )
+    conn.commit()
+    importer.build_pinyin_index(conn)
+    importer.build_drill_buckets(conn)
+    assert importer.build_search_index(conn)
+    conn.close()
+    db = sqlite3.connect(tmp_path / "cedict.db", check_same_thread=False)
+    db.row_factory = sqlite3.Row
+    return db
+
+
+SEARCH_ENTRIES = [
+    ("食", "食", "shi2", "2", "to eat; food", 0, 450),
+    ("吃", "吃", "chi1", "1", "to eat; to consume", 1, 620),
+    ("吃饭", "吃飯", "chi1 fan4", "1,4", "to have a meal; to eat", 1, 540),
+    ("喝", "喝", "he1", "1", "to drink", 1, 600),
+    ("饭", "飯", "fan4", "4", "cooked rice; meal", 1, 560),
+]
+
+
+def test_dictionary_search_ranks_and_paginates(client, monkeypatch, tmp_path):
+    db = make_search_db(tmp_path, SEARCH_ENTRIES)
+    monkeypatch.setattr(dictionary_router, "get_analyzer", lambda: DummyAnalyzer(db))
+    try:
+        first = client.get("/api/dictionary/search", params={"q": "Eating", "limit": 2})
+        second = client.get("/api/dictionary/search", params={"q": "eat", "limit": 2, "offset": 2})
+        meal = client.get("/api/dictionary/search", params={"q": "\"meal*)("})
+    finally:
+        db.close()
+
+    assert first.status_code == 200
+    payload = first.json()
+    # Stemmed match; the common HSK 1 word outranks the rarer 食
+    assert [r["simplified"] for r in payload["results"]] == ["吃", "吃饭"]
+    assert payload["results"][0]["pinyin"] == "chī"
+    assert payload["results"][0]["frequency"] == 6.2
+    assert payload["next_offset"] == 2
+
+    assert [r["simplified"] for r in second.json()["results"]] == ["食"]
+    assert second.json()["next_offset"] is None
+
+    # FTS5 syntax in the query is matched literally, never interpreted
+    assert meal.status_code == 200
+    assert {r["simplified"] for r in meal.json()["results"]} == {"吃饭", "饭"}
+
+
+FUZZY_ENTRIES = [
+    ("中国", "中國", "zhong1 guo2", "1,2", "China", 1, 700),
+    ("宗", "宗", "zong1", "1", "ancestor", 0, 350),
+    ("绿", "綠", "lu:4", "4", "green", 2, 520),
+    ("路", "路", "lu4", "4", "road", 1, 560),
+    ("你好", "你好", "ni3 hao3", "3,3", "hello", 1, 600),
+    ("上海", "上海", "shang4 hai3", "4,3", "Shanghai", 1, 580),
+    ("山", "山", "shan1", "1", "mountain", 1, 530),
+    ("长安", "長安", "Chang2 an1", "2,1", "Chang'an", 0, 380),
+    ("方案", "方案", "fang1 an4", "1,4", "plan; program", 4, 480),
+]
+
+
+def test_dictionary_fuzzy_pinyin(client, monkeypatch, tmp_path):
+    db = make_search_db(tmp_path, FUZZY_ENTRIES)
+    monkeypatch.setattr(dictionary_router, "get_analyzer", lambda: DummyAnalyzer(db))
+
+    def words(q):
+        response = client.get("/api/dictionary/fuzzy", params={"q": q})
+        assert response.status_code == 200
+        return [r["simplified"] for r in response.json()["results"]]
+
+    try:
+        assert words("zong guo") == ["中国"]
+        assert words("ni3hao") == ["你好"]
+        # Exact spelling first, then the folded confusion
+        assert words("lv") == ["绿", "路"]
+        assert words("lu4") == ["路", "绿"]
+        assert words("san") == ["山"]
+        # Unfinished input matches as a prefix
+        assert words("shangh")[0] == "上海"
+        # -ng/-n folded per syllable, even before a vowel
+        assert words("chan an") == ["长安"]
+        assert words("fan an") == ["方案"]
+        assert words("fangan") == ["方案"]
+        # One typo away
+        assert words("ni hoa") == ["你好"]
+        assert words("zhong guu") == ["中国"]
+        # Nothing within reach
+        assert words("xyzzy") == []
+        result = client.get("/api/dictionary/fuzzy", params={"q": "zong guo"}).json()["results"][0]
+        assert result["distance"] == 0.5
+        assert result["pinyin"] == "zhōng guó"
+    finally:
+        db.close()
+
+
+DRILL_ENTRIES = [
+    ("你好", "你好", "ni3 hao3", "3,3", "hello", 1, 600),
+    ("可以", "可以", "ke3 yi3", "3,3", "can", 2, 640),
+    ("所以", "所以", "suo3 yi3", "3,3", "therefore", 2, 620),
+    ("洗澡", "洗澡", "xi3 zao3", "3,3", "to bathe", 2, 380),
+    ("水果", "水果", "shui3 guo3", "3,3", "fruit", 2, 450),
+    ("中国", "中國", "zhong1 guo2", "1,2", "China", 1, 700),
+]
+
+
+def test_tone_drill(client, monkeypatch, tmp_path):
+    db = make_search_db(tmp_path, DRILL_ENTRIES)
+    monkeypatch.setattr(dictionary_router, "get_analyzer", lambda: DummyAnalyzer(db))
+    try:
+        first = client.get("/api/drills", params={"pattern": "3-3", "hsk": 2, "n": 3})
+        seed = first.json()["seed"]
+        rest = client.get("/api/drills", params={"pattern": "3-3", "hsk": 2, "n": 3, "seed": seed, "offset": 3})
+        common = client.get("/api/drills", params={"pattern": "3-3", "frequency": ["veryCommon", "uncommon"]})
+        bad = client.get("/api/drills", params={"pattern": "33"})
+    finally:
+        db.close()
+
+    assert first.status_code == 200
+    payload = first.json()
+    assert payload["total"] == 4
+    assert payload["next_offset"] == 3
+    assert rest.json()["next_offset"] is None
+    words = [w["simplified"] for w in payload["words"] + rest.json()["words"]]
+    assert sorted(words) == sorted(["可以", "所以", "洗澡", "水果"])
+    assert all(w["tones"] == [3, 3] for w in payload["words"])
+    assert first.headers.get("X-Data-Source") == "CC-CEDICT"
+
+    assert {w["simplified"] for w in common.json()["words"]} == {"你好", "可以", "所以", "洗澡"}
+    assert bad.status_code == 422
+
+
+class MissingModuleDB:
+    """Connection of a SQLite build without FTS5."""
+
+    def execute(self, *args):
+        raise sqlite3.OperationalError("no such module: fts5")
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/dictionary/search", {"q": "eat"}),
+    ("/api/dictionary/fuzzy", {"q": "zhongguo"}),
+    ("/api/drills", {"pattern": "3-3"}),
+])
+@pytest.mark.parametrize("missing", ["index", "fts5"])
+def test_dictionary_features_without_index_are_503(client, monkeypatch, path, params, missing):
+    if missing == "index":
+        # Entries only: imported before the optional indexes existed
+        db = make_db(entries=[("中国", "中國", "zhong1 guo2", "1,2", "China", 1)])
+    else:
+        db = MissingModuleDB()
+    monkeypatch.setattr(dictionary_router, "get_analyzer", lambda: DummyAnalyzer(db))
+    try:
+        response = client.get(path, params=params)
+    finally:
+        db.close()
+    assert response.status_code == 503
+    assert "re-run scripts/import_cedict.py" in response.json()["detail"]
+
+
+VOCAB_ENTRIES = [
+    ("爱", "愛", "ai4", "4", "to love", 1, 600),
+    ("学习", "學習", "xue2 xi2", "2,2", "to learn; to study", 1, 520),
+    ("语法", "語法", "yu3 fa3", "3,3", "grammar", 4, 380),
+    ("你好", "你好", "ni3 hao3", "3,3", "hello", 1, 600),
+    ("了", "了", "le5", "5", "(completed action marker)", 1, 780),
+]
+
+
+def test_vocab_keyset_pages(client, monkeypatch, tmp_path):
+    db = make_search_db(tmp_path, VOCAB_ENTRIES)
+    analyzer = DummyAnalyzer(db)
+    monkeypatch.setattr(dictionary_router, "get_analyzer", lambda: analyzer)
+    try:
+        first = client.get("/api/vocab", params={"hsk": 1, "limit": 3}).json()
+        second = client.get("/api/vocab", params={"hsk": 1, "limit": 3, "after": first["next_cursor"]}).json()
+        invalid = client.get("/api/vocab", params={"hsk": 1, "after": "nope"})
+        analyzer.dictionary_version = "test-2"
+        expired = client.get("/api/vocab", params={"hsk": 1, "after": first["next_cursor"]})
+    finally:
+        db.close()
+
+    assert [r["simplified"] for r in first["results"]] == ["爱", "学习", "你好"]
+    assert first["results"][1]["pinyin"] == "xué xí"
+    assert [r["simplified"] for r in second["results"]] == ["了"]
+    assert second["next_cursor"] is None
+    assert invalid.status_code == 400
+    assert expired.status_code == 409
+
+
+def test_vocab_export_formats(client, monkeypatch, tmp_path):
+    db = make_search_db(tmp_path, VOCAB_ENTRIES)
+    monkeypatch.setattr(dictionary_router, "get_analyzer", lambda: DummyAnalyzer(db))
+    # Several batches per export
+    monkeypatch.setattr(dictionary_router, "EXPORT_BATCH_SIZE", 2)
+    try:
+        csv_response = client.get("/api/vocab/export", params={"hsk": 1})
+        ndjson = client.get("/api/vocab/export", params={"hsk": 1, "format": "ndjson"})
+        anki = client.get("/api/vocab/export", params={"hsk": 4, "format": "anki"})
+    finally:
+        db.close()
+
+    assert csv_response.status_code == 200
+    assert csv_response.headers["content-type"].startswith("text/csv")
+    assert 'filename="hsk1.csv"' in csv_response.headers["content-disposition"]
+    lines = csv_response.text.splitlines()
+    assert lines[0].startswith("simplified,traditional,pinyin")
+    assert [line.split(",")[0] for line in lines[1:]] == ["爱", "学习", "你好", "了"]
+
+    records = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [r["simplified"] for r in records] == ["爱", "学习", "你好", "了"]
+    assert records[1]["definitions"] == ["to learn", "to study"]
+
+    assert anki.text.splitlines()[-1] == "语法\t語法\tyǔ fǎ\tgrammar\tHSK4"
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson", "anki"])
+def test_vocab_export_fails_when_dictionary_changes(client, monkeypatch, tmp_path, fmt):
+    from app.services.vocab import ExportInterrupted
+
+    class ReloadingAnalyzer(DummyAnalyzer):
+        calls = 0
+
+        def _get_db(self):
+            # Handler check, first batch, then the dictionary is replaced
+            self.calls += 1
+            if self.calls > 2:
+                self.dictionary_version = "test-2"
+            return super()._get_db()
+
+    db = make_search_db(tmp_path, VOCAB_ENTRIES)
+    monkeypatch.setattr(dictionary_router, "get_analyzer", lambda: ReloadingAnalyzer(db))
+    monkeypatch.setattr(dictionary_router, "EXPORT_BATCH_SIZE", 2)
+    try:
+        # The response is aborted instead of ending like a complete file
+        with pytest.raises(ExportInterrupted):
+            client.get("/api/vocab/export", params={"hsk": 1, "format": fmt})
+    finally:
+        db.close()
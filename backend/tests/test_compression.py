@@ -0,0 +1,90 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware, choose_encoding
+from app.core.http_cache import etag_matches, make_etag
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate", "gzip"),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("*", "gzip"),
+    ("", None),
+])
+def test_choose_encoding_without_brotli(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding(header) == expected
+
+
+def test_choose_encoding_prefers_brotli_when_available(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("gzip, br;q=0.5") == "gzip"
+
+
+def test_etag_matching():
+    etag = make_etag("dictionary", "v1", "中国")
+    assert etag == make_etag("dictionary", "v1", "中国")
+    assert etag != make_etag("dictionary", "v2", "中国")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag[:-1]}-br"', etag)
+    assert etag_matches(f"W/{etag}", etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f'{{"n": {i}}}\n' for i in range(200)), media_type="application/x-ndjson")
+
+    @app.get("/audio")
+    def audio():
+        return Response(b"\0" * 4096, media_type="audio/mpeg")
+
+    @app.get("/small")
+    def small():
+        return Response(b"{}", media_type="application/json", headers={"Vary": "Origin"})
+
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    return app
+
+
+def test_streaming_response_compressed_incrementally():
+    with TestClient(make_app()) as client:
+        with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            raw = b"".join(response.iter_raw())
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert lines[0] == '{"n": 0}' and len(lines) == 200
+
+
+def test_non_compressible_types_pass_through():
+    with TestClient(make_app()) as client:
+        response = client.get("/audio", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert "Vary" not in response.headers
+    assert len(response.content) == 4096
+
+
+@pytest.mark.parametrize("path, accept_encoding", [
+    ("/stream", "gzip"),
+    ("/stream", "identity"),
+    ("/small", "gzip"),  # Below the size threshold
+])
+def test_compressible_responses_vary_on_accept_encoding(path, accept_encoding):
+    with TestClient(make_app()) as client:
+        response = client.get(path, headers={"Accept-Encoding": accept_encoding})
+    assert "Accept-Encoding" in response.headers["Vary"]
+    if path == "/small":
+        assert response.headers["Vary"] == "Origin, Accept-Encoding"
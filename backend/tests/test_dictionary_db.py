@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from app.services.dictionary_db import DictionaryDB
+
+
+def write_db(path, version, words):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE entries (simplified TEXT)")
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    conn.executemany("INSERT INTO entries VALUES (?)", [(w,) for w in words])
+    conn.execute("INSERT INTO meta VALUES ('version', ?)", (version,))
+    conn.commit()
+    conn.close()
+
+
+def swap_in(db_path, version, words):
+    tmp_path = db_path.with_suffix(".db.tmp")
+    write_db(tmp_path, version, words)
+    os.replace(tmp_path, db_path)
+
+
+def count(conn):
+    return conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+def test_missing_database_returns_none(tmp_path):
+    handle = DictionaryDB(str(tmp_path / "missing.db"))
+    assert handle.connection() is None
+    assert handle.version is None
+
+
+def test_version_read_from_meta(tmp_path):
+    db_path = tmp_path / "cedict.db"
+    write_db(db_path, "v1", ["你好"])
+    handle = DictionaryDB(str(db_path))
+    assert handle.version == "v1"
+    assert count(handle.connection()) == 1
+
+
+def test_swapped_file_is_picked_up_and_old_connection_survives(tmp_path):
+    db_path = tmp_path / "cedict.db"
+    write_db(db_path, "v1", ["你好"])
+    handle = DictionaryDB(str(db_path), check_interval=0)
+    reloads = []
+    handle.on_reload(reloads.append)
+
+    in_flight = handle.connection()
+    swap_in(db_path, "v2", ["你好", "中国"])
+
+    # check_interval=0 only reloads on request
+    assert handle.version == "v1"
+    handle.request_reload()
+    assert handle.version == "v2"
+    assert count(handle.connection()) == 2
+    assert reloads[-1] == "v2"
+
+    # A request that started before the swap still reads the old version
+    assert count(in_flight) == 1
+
+
+def test_reload_reports_whether_version_changed(tmp_path):
+    db_path = tmp_path / "cedict.db"
+    write_db(db_path, "v1", ["你好"])
+    handle = DictionaryDB(str(db_path))
+    handle.connection()
+
+    assert handle.reload() is False
+    swap_in(db_path, "v2", ["中国"])
+    assert handle.reload() is True
+
+
+def test_connections_are_per_thread_and_read_only(tmp_path):
+    db_path = tmp_path / "cedict.db"
+    write_db(db_path, "v1", ["你好"])
+    handle = DictionaryDB(str(db_path))
+
+    main_conn = handle.connection()
+    assert handle.connection() is main_conn
+
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(handle.connection()))
+    worker.start()
+    worker.join()
+    assert seen[0] is not main_conn
+
+    with pytest.raises(sqlite3.OperationalError):
+        main_conn.execute("INSERT INTO entries VALUES ('x')")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_child_opens_its_own_connection(tmp_path):
+    db_path = tmp_path / "cedict.db"
+    write_db(db_path, "v1", ["你好"])
+    handle = DictionaryDB(str(db_path))
+    parent_conn = handle.connection()
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            conn = handle.connection()
+            ok = conn is not None and conn is not parent_conn and count(conn) == 1
+        except BaseException:
+            ok = False
+        os._exit(0 if ok else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert handle.connection() is parent_conn
@@ -0,0 +1,142 @@
+import random
+
+import pytest
+
+from app.services.documents import DocumentNotFound, DocumentStore, RevisionConflict
+from app.services.tone_analyzer import ToneAnalyzer
+
+
+class CountingAnalyzer(ToneAnalyzer):
+    def __init__(self):
+        super().__init__(db_path=None)
+        self.analyzed = []
+        self.version = "v1"
+
+    @property
+    def dictionary_version(self):
+        return self.version
+
+    def analyze_text(self, text, phrase_sandhi=False):
+        self.analyzed.append(text)
+        return super().analyze_text(text, phrase_sandhi=phrase_sandhi)
+
+
+@pytest.fixture(scope="module")
+def base_analyzer():
+    return CountingAnalyzer()
+
+
+@pytest.fixture
+def analyzer(base_analyzer):
+    base_analyzer.analyzed.clear()
+    base_analyzer.version = "v1"
+    return base_analyzer
+
+
+def chars(words):
+    return [w.characters for w in words]
+
+
+def apply_diff(words, diff):
+    tail = [w.model_copy(update={"offset": w.offset + diff.shift}) for w in words[diff.start + diff.deleted:]]
+    return words[:diff.start] + diff.words + tail
+
+
+def assert_offsets(doc):
+    for w in doc.flat_words():
+        assert doc.text[w.offset:w.offset + len(w.characters)] == w.characters
+
+
+def test_edit_reanalyzes_only_touched_sentence(analyzer):
+    store = DocumentStore(analyzer, ttl=60, max_chars=10_000)
+    doc = store.create("我很好。你呢？他们也很好。")
+    before = doc.flat_words()
+    analyzer.analyzed.clear()
+
+    diff = store.edit(doc.id, revision=0, offset=4, deleted=1, inserted="您")
+
+    assert analyzer.analyzed == ["您呢？"]
+    assert diff.revision == 1
+    assert chars(diff.words) == ["您", "呢"]
+    assert [w.offset for w in diff.words] == [4, 5]
+    assert diff.shift == 0
+    assert chars(apply_diff(before, diff)) == chars(doc.flat_words())
+    assert_offsets(doc)
+
+
+def test_edits_are_charged_for_reanalyzed_characters(analyzer):
+    store = DocumentStore(analyzer, ttl=60, max_chars=10_000)
+    charged = []
+    doc = store.create("我很好。你呢？他们也很好。", charge=charged.append)
+    store.edit(doc.id, revision=0, offset=4, deleted=1, inserted="您", charge=charged.append)
+    assert charged == [13, 3]
+
+    def refuse(chars):
+        raise RuntimeError("over budget")
+
+    with pytest.raises(RuntimeError):
+        store.edit(doc.id, revision=1, offset=0, deleted=0, inserted="嗯", charge=refuse)
+    assert doc.revision == 1 and doc.text == "我很好。您呢？他们也很好。"
+
+
+def test_edit_of_evicted_document_keeps_char_total(analyzer):
+    store = DocumentStore(analyzer, ttl=60, max_chars=10_000)
+    doc = store.create("你好。")
+    # Evicted while the edit holds it
+    store.edit(doc.id, revision=0, offset=0, deleted=0, inserted="嗯",
+               charge=lambda chars: store.delete(doc.id))
+    assert len(store) == 0 and store._chars == 0
+
+
+def test_random_edits_match_fresh_analysis(analyzer):
+    rng = random.Random(3)
+    store = DocumentStore(analyzer, ttl=60, max_chars=10_000)
+    doc = store.create("我不去。一个人去银行？你好！")
+    words = doc.flat_words()
+    pieces = ["。", "不", "一", "好", "你好。", "", "去银行", " ", "\n\n"]
+    for _ in range(40):
+        offset = rng.randint(0, len(doc.text))
+        deleted = rng.randint(0, min(3, len(doc.text) - offset))
+        diff = store.edit(doc.id, doc.revision, offset, deleted, rng.choice(pieces))
+        words = apply_diff(words, diff)
+        fresh = store.create(doc.text)
+        assert [w.model_dump() for w in words] == [w.model_dump() for w in fresh.flat_words()]
+        assert_offsets(doc)
+        store.delete(fresh.id)
+
+
+def test_edit_errors(analyzer):
+    store = DocumentStore(analyzer, ttl=60, max_chars=10_000)
+    doc = store.create("你好。")
+    with pytest.raises(RevisionConflict):
+        store.edit(doc.id, revision=5, offset=0, deleted=0, inserted="")
+    with pytest.raises(ValueError):
+        store.edit(doc.id, revision=0, offset=2, deleted=5, inserted="")
+    with pytest.raises(DocumentNotFound):
+        store.edit("missing", revision=0, offset=0, deleted=0, inserted="")
+
+
+def test_dictionary_change_reanalyzes_everything(analyzer):
+    store = DocumentStore(analyzer, ttl=60, max_chars=10_000)
+    doc = store.create("我很好。你呢？")
+    analyzer.version = "v2"
+    diff = store.edit(doc.id, revision=0, offset=0, deleted=0, inserted="")
+    assert diff.start == 0
+    assert diff.deleted == len(diff.words) == len(doc.flat_words())
+
+
+def test_documents_expire_and_are_bounded(analyzer):
+    expired = DocumentStore(analyzer, ttl=0, max_chars=10_000)
+    doc = expired.create("你好。")
+    with pytest.raises(DocumentNotFound):
+        expired.get(doc.id)
+
+    bounded = DocumentStore(analyzer, ttl=60, max_chars=10)
+    first = bounded.create("你好你好。")
+    second = bounded.create("再见再见。")
+    bounded.get(first.id)  # Most recently used survives
+    bounded.create("谢谢谢谢。")
+    assert bounded.get(first.id) is first
+    with pytest.raises(DocumentNotFound):
+        bounded.get(second.id)
+    assert len(bounded) == 2
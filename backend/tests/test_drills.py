@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+from app.services.drills import BAND_IDS, frequency_band, sample_drill, _permutation
+from benchmarks.fixtures import load_importer
+
+
+ENTRIES = [
+    ("你好", "你好", "ni3 hao3", "3,3", "hello", 1, 600),
+    ("可以", "可以", "ke3 yi3", "3,3", "can", 2, 640),
+    ("所以", "所以", "suo3 yi3", "3,3", "therefore", 2, 620),
+    ("洗澡", "洗澡", "xi3 zao3", "3,3", "to bathe", 2, 380),
+    ("水果", "水果", "shui3 guo3", "3,3", "fruit", 2, 0),
+    # Same word and tones twice: filed once
+    ("所以", "所以", "suo3 yi3", "3,3", "so", 2, 100),
+    # Not all hanzi / syllable count mismatch: never drilled
+    ("AA制", "AA制", "A A zhi4", "5,5,4", "to split the bill", 0, 300),
+    ("哪儿", "哪兒", "na3 r5", "3,5", "where", 1, 550),
+]
+
+
+@pytest.fixture
+def db(tmp_path):
+    importer = load_importer()
+    conn = importer.create_database(tmp_path / "cedict.db")
+    conn.executemany(
+        "INSERT INTO entries (simplified, traditional, pinyin, tones, definitions, hsk_level, frequency) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ENTRIES,
+    )
+    conn.commit()
+    assert importer.build_drill_buckets(conn) == 6
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def test_frequency_bands_match_tiers():
+    assert frequency_band(650) == BAND_IDS["veryCommon"]
+    assert frequency_band(400) == BAND_IDS["common"]
+    assert frequency_band(199) == BAND_IDS["rare"]
+    assert frequency_band(0) == BAND_IDS["unknown"]
+
+
+@pytest.mark.parametrize("total", [1, 2, 3, 10, 97, 360, 4096])
+def test_permutation_visits_every_slot_once(total):
+    permutation = _permutation(42, total)
+    assert sorted(permutation[i] for i in range(total)) == list(range(total))
+
+
+def test_permutation_is_keyed_and_not_a_progression():
+    orders = [[_permutation(seed, 360)[i] for i in range(360)] for seed in (1, 2)]
+    assert orders[0] != orders[1]
+    assert orders[0] == [_permutation(1, 360)[i] for i in range(360)]
+    # An arithmetic progression mod total has a single step between neighbours
+    steps = {(b - a) % 360 for a, b in zip(orders[0], orders[0][1:])}
+    assert len(steps) > 100
+
+
+def test_buckets(db):
+    buckets = db.execute("SELECT pattern, hsk_level, band, size FROM drill_buckets ORDER BY 1, 2, 3").fetchall()
+    assert [tuple(b) for b in buckets] == [
+        ("3-3", 1, BAND_IDS["veryCommon"], 1),
+        ("3-3", 2, BAND_IDS["veryCommon"], 2),
+        ("3-3", 2, BAND_IDS["uncommon"], 1),
+        ("3-3", 2, BAND_IDS["unknown"], 1),
+        ("3-5", 1, BAND_IDS["common"], 1),
+    ]
+
+
+def test_drill_pages_through_bucket_without_repeats(db):
+    first = sample_drill(db, "3-3", 2, hsk_level=2, seed=7)
+    second = sample_drill(db, "3-3", 2, hsk_level=2, seed=7, offset=2)
+    words = [r["simplified"] for r in first.rows + second.rows]
+    assert first.total == 4
+    assert sorted(words) == sorted(["可以", "所以", "洗澡", "水果"])
+    # Same seed, same order
+    assert [r["simplified"] for r in sample_drill(db, "3-3", 4, hsk_level=2, seed=7).rows] == words
+
+
+def test_drill_filters(db):
+    rows = sample_drill(db, "3-3", 10, bands=["veryCommon"]).rows
+    assert {r["simplified"] for r in rows} == {"你好", "可以", "所以"}
+    assert sample_drill(db, "3-5", 10, hsk_level=1).rows[0]["simplified"] == "哪儿"
+    empty = sample_drill(db, "4-4", 10)
+    assert empty.rows == [] and empty.total == 0
@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+
+from app.services.example_sentences import get_examples
+from benchmarks.fixtures import load_importer
+
+
+ENTRIES = [
+    ("学习", "學習", "xue2 xi2", "2,2", "to learn", 1, 520),
+    ("我", "我", "wo3", "3", "I; me", 1, 750),
+    ("喜欢", "喜歡", "xi3 huan5", "3,5", "to like", 1, 560),
+    ("中文", "中文", "zhong1 wen2", "1,2", "Chinese language", 1, 480),
+    ("语法", "語法", "yu3 fa3", "3,3", "grammar", 4, 380),
+    ("学", "學", "xue2", "2", "to learn", 1, 600),
+    ("习", "習", "xi2", "2", "to practice", 0, 400),
+    ("说", "說", "shuo1", "1", "to speak", 1, 650),
+]
+
+SENTENCES = [
+    "1\tcmn\t我喜欢学习中文。",
+    "2\tcmn\t我学习中文语法。",  # Harder (HSK 4 word)
+    "3\tcmn\t我学习。",
+    "4\teng\tI study.",  # Other language
+    "5\tcmn\t我喜欢学习中文。",  # Duplicate text
+    "6\tcmn\t我喜歡學習中文，也喜歡說。",  # Traditional
+    "7\tcmn\t学习！",  # Only the word itself
+    "8\tcmn\t" + "我学习中文" * 10,  # Too long
+    "not a sentence line",
+]
+
+
+@pytest.fixture
+def db(tmp_path):
+    importer = load_importer()
+    conn = importer.create_database(tmp_path / "cedict.db")
+    conn.executemany(
+        "INSERT INTO entries (simplified, traditional, pinyin, tones, definitions, hsk_level, frequency) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ENTRIES,
+    )
+    conn.commit()
+    importer.build_traditional_index(conn)
+    corpus = tmp_path / "cmn_sentences.tsv"
+    corpus.write_text("\n".join(SENTENCES) + "\n", encoding="utf-8")
+    assert importer.build_example_index(conn, corpus) == 4
+    yield conn
+    conn.close()
+
+
+def test_examples_easiest_then_shortest(db):
+    assert get_examples(db, "学习") == [
+        "我学习。",
+        "我喜欢学习中文。",
+        "我学习中文语法。",
+        # 也 is not in this dictionary: counts as beyond HSK
+        "我喜歡學習中文，也喜歡說。",
+    ]
+
+
+def test_traditional_sentences_indexed_under_simplified_word(db):
+    assert get_examples(db, "说") == ["我喜歡學習中文，也喜歡說。"]
+
+
+def test_examples_per_word_capped(db, monkeypatch, tmp_path):
+    importer = load_importer()
+    monkeypatch.setattr(importer, "EXAMPLES_PER_WORD", 2)
+    importer.build_example_index(db, tmp_path / "cmn_sentences.tsv")
+    assert get_examples(db, "学习") == ["我学习。", "我喜欢学习中文。"]
+
+
+def test_unknown_word_and_missing_index():
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE entries (simplified TEXT)")
+    assert get_examples(db, "学习") == []
+    db.close()
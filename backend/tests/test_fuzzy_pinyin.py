@@ -0,0 +1,46 @@
+import pytest
+
+from app.services.fuzzy_pinyin import CONFUSION_COST, confusion_distance, one_edit_keys
+from app.services.pinyin_utils import fuzzy_pinyin_key, fuzzy_pinyin_keys, pinyin_tones, plain_pinyin, split_pinyin
+
+
+@pytest.mark.parametrize("spelling", ["zhong1 guo2", "zhōngguó", "zong guo", "ZhongGuo", "zhon guo"])
+def test_spellings_share_fuzzy_key(spelling):
+    assert fuzzy_pinyin_key(spelling) == fuzzy_pinyin_key("zhong1 guo2")
+
+
+@pytest.mark.parametrize("typed, target", [("chan an", "chang2 an1"), ("fan an", "fang1 an4"), ("xin", "xing2")])
+def test_ng_folded_per_syllable(typed, target):
+    assert fuzzy_pinyin_key(typed) == fuzzy_pinyin_key(target)
+
+
+def test_unspaced_pinyin_keeps_every_reading():
+    assert split_pinyin("zhong1guo2") == [["zhong", "guo"]]
+    assert sorted(split_pinyin("fangan")) == [["fan", "gan"], ["fang", "an"]]
+    assert fuzzy_pinyin_key("fang1 an4") in fuzzy_pinyin_keys("fangan")
+
+
+def test_plain_pinyin_normalizes_u_umlaut():
+    assert plain_pinyin("lu:4") == plain_pinyin("lǜ") == plain_pinyin("LV") == "lv"
+    assert fuzzy_pinyin_key("lv") == fuzzy_pinyin_key("lu")
+
+
+def test_pinyin_tones_reads_digits_and_marks():
+    assert pinyin_tones("ni3 hao3") == [3, 3]
+    assert pinyin_tones("nǐ hǎo") == [3, 3]
+    assert pinyin_tones("nihao") == []
+
+
+def test_confusion_distance_weights():
+    assert confusion_distance("zhongguo", "zhongguo") == 0
+    assert confusion_distance("zongguo", "zhongguo") == CONFUSION_COST
+    assert confusion_distance("sangai", "shanghai") == 3 * CONFUSION_COST
+    assert confusion_distance("lu", "lv") == CONFUSION_COST
+    assert confusion_distance("ma", "ba") == 1
+
+
+def test_one_edit_keys():
+    keys = one_edit_keys("nihoa")
+    assert {"nihao", "nihoua", "niho", "nihua"} <= keys
+    assert "nihoa" not in keys
+    assert confusion_distance("nihoa", "nihao") == 1
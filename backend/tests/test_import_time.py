@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Loaded on first use (tone_analyzer.load_nlp, tts._synthesize_azure), never on import
+HEAVY_MODULES = ["jieba", "pypinyin", "wordfreq", "azure.cognitiveservices.speech"]
+
+# Framework imported first, so the budget only covers the app's own import cost
+# (~90ms locally; jieba + pypinyin + wordfreq alone add ~400ms). Wall-clock
+# timing is noisy on shared CI machines, so the budget check is opt-in:
+# TONEO_IMPORT_BUDGET_MS=250 pytest tests/test_import_time.py
+FRAMEWORK = "import fastapi, fastapi.responses, pydantic_settings, starlette.datastructures"
+IMPORT_BUDGET_MS = os.getenv("TONEO_IMPORT_BUDGET_MS")
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+
+
+def test_heavy_modules_not_imported_by_app_main():
+    code = f"import sys, app.main; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    assert run_python(code).stdout.strip() == "[]"
+
+
+@pytest.mark.skipif(not IMPORT_BUDGET_MS, reason="set TONEO_IMPORT_BUDGET_MS to check the import time")
+def test_app_main_import_time_budget():
+    stderr = run_python(f"{FRAMEWORK}; import app.main", "-X", "importtime").stderr
+    # "import time: <self us> | <cumulative us> | <module>"
+    cumulative = {
+        parts[2].strip(): int(parts[1])
+        for parts in (line.split("|") for line in stderr.splitlines())
+        if len(parts) == 3 and parts[1].strip().isdigit()
+    }
+    assert cumulative["app.main"] / 1000 < float(IMPORT_BUDGET_MS)
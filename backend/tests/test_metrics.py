@@ -0,0 +1,48 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def metrics_enabled():
+    previous = metrics.is_enabled()
+    metrics.set_enabled(True)
+    yield
+    metrics.set_enabled(previous)
+
+
+def test_disabled_metrics_use_null_timer():
+    assert metrics.start_timer("analyze") is metrics.NULL_TIMER
+
+
+def test_metrics_endpoint_hidden_when_disabled(client):
+    assert client.get("/metrics").status_code == 404
+
+
+def test_analyze_stages_are_exported(client, metrics_enabled):
+    client.post("/api/analyze", json={"text": "我们学习中文"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    for stage in ("segmentation", "dict_lookup", "frequency", "sandhi", "response_build"):
+        assert f'toneo_stage_seconds_count{{pipeline="analyze",stage="{stage}"}}' in body
+    assert "toneo_dictionary_lookups_total" in body
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(("x",), value)
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="x",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="x",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{stage="x",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="x"} 3' in lines
@@ -0,0 +1,64 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from benchmarks.bench_prefork import read_memory, worker_pids
+from benchmarks.loadtest import free_port
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork") or not Path("/proc/self/smaps_rollup").exists(),
+    reason="needs fork() and Linux /proc",
+)
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def test_read_memory_reports_unique_memory():
+    memory = read_memory(os.getpid())
+    assert 0 < memory["uss_kb"] <= memory["rss_kb"]
+    assert memory["pss_kb"] <= memory["rss_kb"]
+
+
+def test_prefork_workers_serve_and_stop(tmp_path):
+    port = free_port()
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'missing.db'}"}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "app.prefork", "--workers", "2", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while len(worker_pids(proc.pid)) < 2 or not _healthy(port):
+            assert proc.poll() is None, "pre-fork server exited during startup"
+            assert time.monotonic() < deadline, "pre-fork server did not become ready"
+            time.sleep(0.2)
+
+        response = httpx.post(f"http://127.0.0.1:{port}/api/analyze", json={"text": "你好"})
+        assert response.status_code == 200
+        assert response.json()["words"][0]["characters"] == "你好"
+
+        workers = worker_pids(proc.pid)
+        for pid in workers:
+            memory = read_memory(pid)
+            # Warm NLP tables are shared with the parent, not copied
+            assert memory["uss_kb"] < memory["rss_kb"] / 2
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=30) == 0
+
+    for pid in workers:
+        assert not Path(f"/proc/{pid}").exists()
+
+
+def _healthy(port: int) -> bool:
+    try:
+        return httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200
+    except httpx.HTTPError:
+        return False
@@ -0,0 +1,138 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profiling import ProfiledRoute, ProfileStore, ProfilingMiddleware, profile_store
+from app.main import app
+
+
+ADMIN_TOKEN = "test-admin-token"
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", ADMIN_TOKEN)
+    return ADMIN_TOKEN
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def slow_app(store, sample_rate=0.0):
+    test_app = FastAPI()
+    test_app.router.route_class = ProfiledRoute
+
+    @test_app.get("/slow")
+    def slow():
+        # Busy-wait so the sampler sees this frame in the threadpool
+        busy_wait(0.05)
+        return {"ok": True}
+
+    @test_app.get("/other")
+    def other():
+        busy_wait(0.3)
+        return {"ok": True}
+
+    test_app.add_middleware(ProfilingMiddleware, store=store, sample_rate=sample_rate, interval=0.001)
+    return test_app
+
+
+def test_requests_without_trigger_are_not_profiled(admin_token):
+    store = ProfileStore(maxlen=5)
+    with TestClient(slow_app(store)) as client:
+        response = client.get("/slow", headers={"X-Toneo-Profile": "1"})
+    assert response.status_code == 200
+    assert "x-toneo-profile-id" not in response.headers
+    assert store.list() == []
+
+
+def test_admin_header_profiles_request(admin_token, monkeypatch):
+    # Treat this test module as app code so its frames pass the stack filter
+    monkeypatch.setattr("app.core.profiling.APP_DIR", str(Path(__file__).parent))
+    store = ProfileStore(maxlen=5)
+    with TestClient(slow_app(store)) as client:
+        response = client.get(
+            "/slow", headers={"X-Toneo-Profile": "1", "X-Admin-Token": ADMIN_TOKEN}
+        )
+
+    assert response.status_code == 200
+    (record,) = store.list()
+    assert response.headers["x-toneo-profile-id"] == record.id
+    assert record.trigger == "header"
+    assert record.status == 200
+    assert record.samples > 0
+    assert any("slow" in stack for stack in record.stacks)
+
+
+def test_concurrent_requests_are_not_sampled(admin_token, monkeypatch):
+    monkeypatch.setattr("app.core.profiling.APP_DIR", str(Path(__file__).parent))
+    store = ProfileStore(maxlen=5)
+    with TestClient(slow_app(store)) as client:
+        concurrent = threading.Thread(target=client.get, args=("/other",))
+        concurrent.start()
+        time.sleep(0.05)
+        client.get("/slow", headers={"X-Toneo-Profile": "1", "X-Admin-Token": ADMIN_TOKEN})
+        concurrent.join()
+
+    (record,) = store.list()
+    assert any("slow" in stack for stack in record.stacks)
+    assert not any("other" in stack for stack in record.stacks)
+    assert record.concurrent_requests == 1
+
+
+def test_sampled_requests_fill_bounded_buffer():
+    store = ProfileStore(maxlen=2)
+    with TestClient(slow_app(store, sample_rate=1.0)) as client:
+        for _ in range(3):
+            client.get("/slow")
+    records = store.list()
+    assert len(records) == 2
+    assert all(r.trigger == "sample" for r in records)
+
+
+def test_admin_endpoints_require_token(admin_token):
+    with TestClient(app) as client:
+        assert client.get("/api/admin/profiles").status_code == 403
+        assert client.get(
+            "/api/admin/profiles", headers={"X-Admin-Token": "wrong"}
+        ).status_code == 403
+
+
+def test_admin_endpoints_hidden_without_configured_token(monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "")
+    with TestClient(app) as client:
+        response = client.get("/api/admin/profiles", headers={"X-Admin-Token": ""})
+    assert response.status_code == 404
+
+
+def test_admin_can_list_and_download_profiles(admin_token):
+    store = ProfileStore(maxlen=5)
+    with TestClient(slow_app(store, sample_rate=1.0)) as client:
+        client.get("/slow")
+    (record,) = store.list()
+    record.stacks.clear()
+    record.stacks["main (app/main.py:1);slow (tests/x.py:2)"] = 3
+
+    profile_store.add(record)
+    try:
+        headers = {"X-Admin-Token": ADMIN_TOKEN}
+        with TestClient(app) as client:
+            listing = client.get("/api/admin/profiles", headers=headers).json()
+            download = client.get(f"/api/admin/profiles/{record.id}", headers=headers)
+            missing = client.get("/api/admin/profiles/nope", headers=headers)
+    finally:
+        profile_store.clear()
+
+    assert listing["profiles"][0]["id"] == record.id
+    assert listing["profiles"][0]["top_frames"][0]["frame"] == "slow (tests/x.py:2)"
+    assert download.status_code == 200
+    assert "main (app/main.py:1);slow (tests/x.py:2) 3\n" in download.text
+    assert missing.status_code == 404
@@ -0,0 +1,175 @@
+import ipaddress
+import random
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core import rate_limit
+from app.core.rate_limit import (
+    TRUSTED_PROXY_RANGES,
+    Limiter,
+    LocalBucketStore,
+    _ProxyMatcher,
+    parse_rate,
+)
+
+
+def test_parse_rate():
+    assert parse_rate("30/minute") == (30, 0.5)
+    assert parse_rate("10/second") == (10, 10.0)
+    assert parse_rate("7200/hours") == (7200, 2.0)
+
+
+def test_proxy_matcher_agrees_with_network_scan():
+    networks = [ipaddress.ip_network(c) for c in TRUSTED_PROXY_RANGES]
+    matcher = _ProxyMatcher(TRUSTED_PROXY_RANGES)
+    rng = random.Random(0)
+    samples = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(5000)]
+    # Edges of every range, and just outside them
+    for network in networks:
+        first, last = int(network.network_address), int(network.broadcast_address)
+        for value in (first - 1, first, last, last + 1):
+            if 0 <= value < 2 ** network.max_prefixlen:
+                samples.append(str(ipaddress.ip_address(value) if network.version == 4
+                                   else ipaddress.IPv6Address(value)))
+    for ip in samples:
+        addr = ipaddress.ip_address(ip)
+        assert matcher.contains(ip) == any(addr in n for n in networks), ip
+
+
+def test_proxy_matcher_edge_cases():
+    matcher = _ProxyMatcher(TRUSTED_PROXY_RANGES)
+    assert matcher.contains("::1")
+    assert matcher.contains("::ffff:127.0.0.1")
+    assert not matcher.contains("2001:db8::1")
+    assert not matcher.contains("not-an-ip")
+    assert not matcher.contains("testclient")
+
+
+def test_local_bucket_refills(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    store = LocalBucketStore()
+
+    assert [store.take("k", 2, 1.0)[0] for _ in range(3)] == [True, True, False]
+    allowed, retry_after = store.take("k", 2, 1.0)
+    assert not allowed and retry_after == pytest.approx(1.0)
+
+    now[0] += 1.0
+    assert store.take("k", 2, 1.0) == (True, 0.0)
+    assert store.take("other", 2, 1.0)[0]
+
+    # Work-based limits take several tokens at once
+    assert store.take("chars", 10, 1.0, cost=8) == (True, 0.0)
+    allowed, retry_after = store.take("chars", 10, 1.0, cost=3)
+    assert not allowed and retry_after == pytest.approx(1.0)
+
+
+def test_local_bucket_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(LocalBucketStore, "MAX_KEYS", 3)
+    store = LocalBucketStore()
+    for key in "abc":
+        store.take(key, 1, 1.0)
+    store.take("a", 1, 1.0)
+    # All buckets are still active: the least recently used one goes anyway
+    store.take("d", 1, 1.0)
+    assert list(store._buckets) == ["c", "a", "d"]
+
+
+def make_app(limiter):
+    app = FastAPI()
+
+    @app.get("/sync")
+    @limiter.limit("2/minute")
+    def sync_endpoint(request: Request, value: int = 0):
+        return {"value": value}
+
+    @app.get("/async")
+    @limiter.limit("1/minute")
+    async def async_endpoint(request: Request):
+        return {"ok": True}
+
+    return app
+
+
+def test_limiter_decorator_limits_sync_and_async_routes():
+    limiter = Limiter(key_func=lambda request: "client", store=LocalBucketStore())
+    with TestClient(make_app(limiter)) as client:
+        assert client.get("/sync?value=3").json() == {"value": 3}
+        assert client.get("/sync").status_code == 200
+        limited = client.get("/sync")
+        assert limited.status_code == 429
+        assert int(limited.headers["Retry-After"]) >= 1
+        assert "Rate limit exceeded" in limited.json()["detail"]
+
+        # Limits are per route
+        assert client.get("/async").status_code == 200
+        assert client.get("/async").status_code == 429
+
+        limiter.enabled = False
+        assert client.get("/async").status_code == 200
+
+
+@pytest.fixture
+def redis_store(monkeypatch):
+    """RedisBucketStore running TOKEN_BUCKET_LUA on an in-memory fakeredis server."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis needs it for EVAL
+    import redis
+    import redis.asyncio
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, "from_url", lambda url: fakeredis.FakeRedis(server=server))
+    monkeypatch.setattr(
+        redis.asyncio.Redis, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server)
+    )
+    return rate_limit.RedisBucketStore("redis://fake")
+
+
+def test_redis_bucket_refills(redis_store):
+    key = rate_limit.RedisBucketStore.KEY_PREFIX + "k"
+    assert [redis_store.take("k", 2, 1.0)[0] for _ in range(3)] == [True, True, False]
+    allowed, retry_after = redis_store.take("k", 2, 1.0)
+    assert not allowed and 0 < retry_after <= 1.0
+    # Idle buckets expire once they would be full again
+    assert 0 < redis_store._client.pttl(key) <= 2000
+
+    # Backdate the bucket by a second: one token refilled
+    ts = float(redis_store._client.hget(key, "ts"))
+    redis_store._client.hset(key, "ts", ts - 1.0)
+    assert redis_store.take("k", 2, 1.0)[0]
+    assert not redis_store.take("k", 2, 1.0)[0]
+    assert redis_store.take("other", 2, 1.0)[0]
+
+    assert redis_store.take("chars", 10, 1.0, cost=8)[0]
+    allowed, retry_after = redis_store.take("chars", 10, 1.0, cost=3)
+    assert not allowed and 0.9 < retry_after <= 1.0
+
+
+def test_redis_limiter_returns_429_with_retry_after(redis_store):
+    limiter = Limiter(key_func=lambda request: "client", store=redis_store)
+    with TestClient(make_app(limiter)) as client:
+        assert client.get("/sync").status_code == 200
+        assert client.get("/sync").status_code == 200
+        limited = client.get("/sync")
+        assert limited.status_code == 429
+        assert 1 <= int(limited.headers["Retry-After"]) <= 30
+
+        # Async routes go through the asyncio client and the same script
+        assert client.get("/async").status_code == 200
+        limited = client.get("/async")
+        assert limited.status_code == 429
+        assert 1 <= int(limited.headers["Retry-After"]) <= 60
+
+
+def test_redis_store_fails_open_when_unreachable(capsys):
+    pytest.importorskip("redis")
+    # Nothing listens on port 1
+    store = rate_limit.RedisBucketStore("redis://127.0.0.1:1/0")
+    limiter = Limiter(key_func=lambda request: "client", store=store)
+    with TestClient(make_app(limiter)) as client:
+        assert all(client.get("/async").status_code == 200 for _ in range(3))
+    assert [store.take("k", 1, 1.0) for _ in range(3)] == [(True, 0.0)] * 3
+    # Logged once, not per request
+    assert capsys.readouterr().out.count("Rate limit store unavailable") == 1
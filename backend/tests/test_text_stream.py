@@ -0,0 +1,39 @@
+import io
+
+from app.services.text_stream import iter_sentence_spans, iter_sentences, iter_text_chunks
+
+
+def test_sentences_split_across_chunks():
+    chunks = ["我很好。你", "呢？「好」", "的！", "最后"]
+    assert list(iter_sentences(chunks)) == ["我很好。", "你呢？", "「好」的！", "最后"]
+
+
+def test_closing_quote_in_next_chunk_stays_with_sentence():
+    assert list(iter_sentences(["他说：“走吧。", "”然后走了。"])) == ["他说：“走吧。”", "然后走了。"]
+
+
+def test_blank_sentences_dropped():
+    assert list(iter_sentences(["第一句。\n\n  \n第二句"])) == ["第一句。\n\n", "第二句"]
+
+
+def test_long_runs_are_capped():
+    text = "很长的句子，" * 50 + "没有句号" * 100
+    sentences = list(iter_sentences([text[i:i + 7] for i in range(0, len(text), 7)], max_chars=100))
+    assert "".join(sentences) == text
+    assert all(len(s) <= 100 for s in sentences)
+    # Cut after a comma when one is available
+    assert sentences[0].endswith("，")
+
+
+def test_sentence_spans_start_in_whole_text():
+    text = "  第一句。\n\n \n第二句，" + "很长" * 60
+    spans = list(iter_sentence_spans([text[i:i + 5] for i in range(0, len(text), 5)], max_chars=50))
+    assert [s for _, s in spans] == list(iter_sentences([text], max_chars=50))
+    for start, sentence in spans:
+        assert text[start:start + len(sentence)] == sentence
+
+
+def test_decoding_handles_split_multibyte_characters():
+    data = "\ufeff你好，世界。".encode("utf-8")
+    file = io.BytesIO(data)
+    assert "".join(iter_text_chunks(file, chunk_size=1)) == "你好，世界。"
@@ -0,0 +1,158 @@
+import os
+import sqlite3
+
+import pytest
+
+from app.models.schemas import AnalyzeResponse, ConfidenceLevel
+from app.services.tone_analyzer import ToneAnalyzer
+
+
+ENTRIES = [
+    ("行", "行", "xing2", "2", "to walk; to go; OK", 1),
+    ("行", "行", "hang2", "2", "row; line; profession", 0),
+    ("行", "行", "xing2", "2", "surname Xing", 0),
+    ("行走", "行走", "xing2 zou3", "2,3", "to walk", 4),
+    ("银行", "銀行", "yin2 hang2", "2,2", "bank", 2),
+    ("了", "了", "le5", "5", "(completed action marker)", 1),
+    ("了", "了", "liao3", "3", "to finish; to understand", 0),
+    ("了", "瞭", "liao4", "4", "unofficial variant of 瞭", 0),
+    ("的", "的", "di2", "2", "really and truly", 0),
+    ("的", "的", "di4", "4", "aim; clear", 0),
+]
+
+
+def write_entries(db_path, entries):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE entries (simplified TEXT, traditional TEXT, pinyin TEXT, "
+        "tones TEXT, definitions TEXT, hsk_level INTEGER)"
+    )
+    conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)", entries)
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    db_path = tmp_path / "cedict.db"
+    write_entries(db_path, ENTRIES)
+    return ToneAnalyzer(db_path=str(db_path))
+
+
+def test_candidates_collapse_duplicate_readings(analyzer):
+    readings = {c.pinyin: c.definition for c in analyzer._lookup_candidates("行")}
+    assert readings == {"xing2": "to walk; to go; OK", "hang2": "row; line; profession"}
+
+
+def test_request_on_old_dictionary_does_not_fill_new_caches(analyzer, tmp_path):
+    in_flight = analyzer._get_session()
+    new_path = tmp_path / "new.db"
+    write_entries(new_path, [("行", "行", "xing2", "2", "OK", 1)])
+    os.replace(new_path, tmp_path / "cedict.db")
+    assert analyzer.dictionary.reload() is True
+
+    # The old request finishes on the old dictionary...
+    assert len(analyzer._lookup_candidates("行", in_flight)) == 2
+    # ...without its rows being cached for the new version
+    assert analyzer._get_session()[1].candidates == {}
+    assert [c.definition for c in analyzer._lookup_candidates("行")] == ["OK"]
+
+
+def test_neighbour_bigram_fixes_reading(analyzer):
+    candidates = analyzer._lookup_candidates("行")
+    entry, confidence = analyzer._choose_reading("行", candidates, prev_word="银", next_word="")
+    assert entry.pinyin == "hang2"
+    assert confidence == ConfidenceLevel.HIGH
+
+    entry, confidence = analyzer._choose_reading("行", candidates, prev_word="", next_word="走路")
+    assert entry.pinyin == "xing2"
+    assert confidence == ConfidenceLevel.HIGH
+
+
+def test_context_reading_resolves_at_medium_confidence(analyzer):
+    candidates = analyzer._lookup_candidates("了")
+    entry, confidence = analyzer._choose_reading("了", candidates, prev_word="走", next_word="")
+    # Variant-only liao4 is discarded; pypinyin's reading in context decides
+    assert entry.pinyin == "le5"
+    assert confidence == ConfidenceLevel.MEDIUM
+
+
+def test_unresolved_ambiguity_is_low_confidence(analyzer):
+    # pypinyin reads 的 as de5, which is neither dictionary reading here
+    candidates = analyzer._lookup_candidates("的")
+    entry, confidence = analyzer._choose_reading("的", candidates, prev_word="", next_word="")
+    assert entry.pinyin in ("di2", "di4")
+    assert confidence == ConfidenceLevel.LOW
+
+
+def test_single_reading_stays_high_confidence(analyzer):
+    result = analyzer.analyze_text("银行")
+    assert result.words[0].confidence == ConfidenceLevel.HIGH
+    assert result.words[0].tones == [2, 2]
+
+
+@pytest.mark.parametrize("phrase_sandhi", [False, True])
+def test_unvalidated_models_pass_validation(analyzer, phrase_sandhi):
+    # The analyzer skips validation when building models; its output must
+    # still be exactly what validated construction would produce
+    result = analyzer.analyze_text("我也不想一个人去银行。ABC 你好", phrase_sandhi=phrase_sandhi)
+    revalidated = AnalyzeResponse.model_validate(result.model_dump())
+    assert revalidated == result
+    assert revalidated.model_dump_json() == result.model_dump_json()
+
+
+def test_words_map_back_to_input_offsets(analyzer):
+    text = "Hi 你好！我去银行, 3个ABC了"
+    result = analyzer.analyze_text(text)
+    assert result.words
+    for word in result.words:
+        assert text[word.offset:word.offset + len(word.characters)] == word.characters
+    # Only Chinese runs are segmented: no Latin, digits or punctuation in words
+    assert "".join(w.characters for w in result.words) == "你好我去银行个了"
+
+
+TRADITIONAL_ENTRIES = [
+    # simplified, traditional, pinyin, tones, definitions, hsk_level, frequency
+    ("银", "銀", "yin2", "2", "silver", 0, 0),
+    ("行", "行", "xing2", "2", "to walk", 1, 0),
+    ("银行", "銀行", "yin2 hang2", "2,2", "bank", 2, 0),
+    ("说", "說", "shuo1", "1", "to speak", 1, 0),
+    ("话", "話", "hua4", "4", "speech", 1, 0),
+    ("说话", "說話", "shuo1 hua4", "1,4", "to speak", 1, 0),
+    ("干", "乾", "gan1", "1", "dry", 1, 0),
+    ("乾", "乾", "qian2", "2", "surname Qian", 0, 0),
+    ("干净", "乾淨", "gan1 jing4", "1,4", "clean", 2, 0),
+    ("净", "淨", "jing4", "4", "clean", 0, 0),
+]
+
+
+@pytest.fixture
+def traditional_analyzer(tmp_path):
+    from benchmarks.fixtures import load_importer
+
+    importer = load_importer()
+    conn = importer.create_database(tmp_path / "cedict.db")
+    conn.executemany(
+        "INSERT INTO entries (simplified, traditional, pinyin, tones, definitions, hsk_level, frequency) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        TRADITIONAL_ENTRIES,
+    )
+    conn.commit()
+    assert importer.build_traditional_index(conn) == 4  # 銀 說 話 淨 (乾 is also simplified)
+    conn.close()
+    return ToneAnalyzer(db_path=str(tmp_path / "cedict.db"))
+
+
+def test_traditional_text_resolves_through_dictionary(traditional_analyzer):
+    text = "我去銀行說話。乾淨"
+    result = traditional_analyzer.analyze_text(text)
+    by_word = {w.characters: w for w in result.words}
+
+    # Characters stay as typed, readings come from CC-CEDICT
+    assert by_word["銀行"].source.value == "dictionary"
+    assert by_word["銀行"].definition == "bank"
+    assert by_word["說話"].tones == [1, 4]
+    # 乾 is not converted, but the traditional headword still matches
+    assert by_word["乾淨"].definition == "clean"
+    for word in result.words:
+        assert text[word.offset:word.offset + len(word.characters)] == word.characters
@@ -0,0 +1,90 @@
+from hypothesis import given, settings, strategies as st
+
+from app.services.tone_sandhi import (
+    CROSS_WORD_BU,
+    CROSS_WORD_THIRD,
+    _apply_rules_sequentially,
+    apply_phrase_sandhi,
+    apply_tone_sandhi,
+)
+
+
+# Bias towards the characters and tones the rules care about
+chars_strategy = st.sampled_from(["不", "一", "好", "你", "是", "妈"])
+tones_strategy = st.sampled_from([1, 2, 3, 4, 5])
+
+
+@st.composite
+def words(draw):
+    length = draw(st.integers(min_value=0, max_value=8))
+    chars = draw(st.lists(chars_strategy, min_size=length, max_size=length))
+    tones = draw(st.lists(tones_strategy, min_size=length, max_size=length))
+    return chars, tones
+
+
+@settings(max_examples=2000)
+@given(words())
+def test_single_pass_matches_sequential_rules(word):
+    chars, tones = word
+    assert apply_tone_sandhi(chars, tones) == _apply_rules_sequentially(chars, tones)
+
+
+@given(st.lists(st.tuples(chars_strategy, st.integers(min_value=-1, max_value=9)), max_size=6))
+def test_out_of_range_tones_match_sequential_rules(pairs):
+    chars = [c for c, _ in pairs]
+    tones = [t for _, t in pairs]
+    assert apply_tone_sandhi(chars, tones) == _apply_rules_sequentially(chars, tones)
+
+
+@given(words())
+def test_accepts_word_string(word):
+    chars, tones = word
+    assert apply_tone_sandhi("".join(chars), tones) == apply_tone_sandhi(chars, tones)
+
+
+def test_known_words():
+    cases = [
+        ("你好", [3, 3], [2, 3], "third_tone_sandhi"),
+        ("不是", [4, 4], [2, 4], "bu_sandhi"),
+        ("一个", [1, 4], [2, 4], "yi_sandhi"),
+        ("一天", [1, 1], [4, 1], "yi_sandhi"),
+        ("妈妈", [1, 1], [1, 5], "reduplication_sandhi"),
+        ("中国", [1, 2], [1, 2], None),
+    ]
+    for word, tones, expected, rule in cases:
+        result = apply_tone_sandhi(word, tones)
+        assert result.modified_tones == expected
+        assert result.rule_applied == rule
+
+
+def test_input_tones_are_not_mutated():
+    tones = [3, 3, 3]
+    apply_tone_sandhi("展览馆", tones)
+    assert tones == [3, 3, 3]
+
+
+def test_phrase_sandhi_groups_monosyllables_into_feet():
+    # 我 | 也 | 很好 → (我也)(很好): wó yě hén hǎo
+    result = apply_phrase_sandhi(["我", "也", "很好"], [[3], [3], [2, 3]], [0, 0, 0])
+    assert result.modified_tones == [[2], [3], [2, 3]]
+    assert result.syllable_rules[0] == [CROSS_WORD_THIRD]
+    assert result.changed_words == [0]
+
+
+def test_phrase_sandhi_across_feet_uses_next_surface_tone():
+    # 小 | 老虎 → xiǎo láohǔ (老 already became 2 inside its word)
+    result = apply_phrase_sandhi(["小", "老虎"], [[3], [2, 3]], [0, 0])
+    assert result.modified_tones == [[3], [2, 3]]
+    assert result.changed_words == []
+
+
+def test_phrase_sandhi_standalone_bu_before_next_word():
+    result = apply_phrase_sandhi(["我", "不", "去"], [[3], [4], [4]], [0, 0, 0])
+    assert result.modified_tones[1] == [2]
+    assert result.syllable_rules[1] == [CROSS_WORD_BU]
+
+
+def test_phrase_sandhi_stops_at_phrase_boundary():
+    # 好。| 好 - punctuation between them puts them in different phrases
+    result = apply_phrase_sandhi(["好", "好"], [[3], [3]], [0, 1])
+    assert result.modified_tones == [[3], [3]]
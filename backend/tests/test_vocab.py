@@ -0,0 +1,48 @@
+import csv
+import io
+
+import pytest
+
+from app.services.vocab import (
+    CSV_COLUMNS, CursorExpired, InvalidCursor, decode_cursor, encode_cursor, to_anki, to_csv,
+)
+
+
+RECORD = {
+    "simplified": "学习",
+    "traditional": "學習",
+    "pinyin": "xué xí",
+    "pinyin_num": "xue2 xi2",
+    "tones": [2, 2],
+    "definitions": ["to learn", "to study, to\temulate"],
+    "hsk_level": 1,
+    "frequency": 5.2,
+}
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor("v1", 42), "v1") == 42
+
+
+def test_cursor_from_other_version_expired():
+    with pytest.raises(CursorExpired):
+        decode_cursor(encode_cursor("v1", 42), "v2")
+
+
+@pytest.mark.parametrize("cursor", ["42", "abc.def", ".x", "-1.abcd"])
+def test_malformed_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "v1")
+
+
+def test_csv_rows():
+    rows = list(csv.reader(io.StringIO(to_csv([RECORD], header=True))))
+    assert rows[0] == list(CSV_COLUMNS)
+    assert rows[1] == ["学习", "學習", "xué xí", "xue2 xi2", "2 2", "to learn; to study, to\temulate", "1"]
+
+
+def test_anki_notes_have_one_line_per_record():
+    text = to_anki([RECORD], 1, header=True)
+    lines = text.splitlines()
+    assert lines[0] == "#separator:tab"
+    assert lines[-1].split("\t") == ["学习", "學習", "xué xí", "to learn; to study, to emulate", "HSK1"]
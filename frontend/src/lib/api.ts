@@ -1,7 +1,21 @@
 /**
  * Toneo API Client
  */
-import type { AnalyzeResponse, DictionaryEntry } from '@/types/tone';
+import type {
+  AnalyzeResponse,
+  DictionaryEntry,
+  DictionarySearchResponse,
+  DocumentDiffResponse,
+  DocumentEdit,
+  DocumentResponse,
+  DrillResponse,
+  FrequencyTier,
+  FuzzyPinyinResponse,
+  TextEdit,
+  VocabExportFormat,
+  VocabPageResponse,
+} from '@/types/tone';
+import { toCodePointOffset } from './textOffsets';
 
 // Use relative path - Next.js rewrites will proxy to backend
 const API_BASE = '/api';
@@ -112,6 +126,63 @@ export async function analyzeText(text: string): Promise<AnalyzeResponse> {
   }, 'Analysis failed');
 }
 
+/**
+ * Start an incrementally analyzed document (for live typing).
+ */
+export async function createDocument(text: string): Promise<DocumentResponse> {
+  return apiCall(`${API_BASE}/analyze/documents`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ text }),
+  }, 'Analysis failed');
+}
+
+/**
+ * Convert a browser edit (UTF-16 indices) to the API's code point offsets.
+ * `text` is the document text before the edit.
+ */
+export function toDocumentEdit(text: string, edit: TextEdit): DocumentEdit {
+  const offset = toCodePointOffset(text, edit.start);
+  return {
+    revision: edit.revision,
+    offset,
+    deleted: toCodePointOffset(text, edit.end) - offset,
+    inserted: edit.inserted,
+  };
+}
+
+/**
+ * Send one edit; the diff says which words to replace.
+ * `text` is the document text before the edit.
+ * If it fails (document expired, or edit against a stale revision),
+ * recreate the document from the current text.
+ */
+export async function editDocument(
+  documentId: string,
+  text: string,
+  edit: TextEdit
+): Promise<DocumentDiffResponse> {
+  return apiCall(`${API_BASE}/analyze/documents/${encodeURIComponent(documentId)}/edits`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(toDocumentEdit(text, edit)),
+  }, 'Analysis failed');
+}
+
+/**
+ * Apply a document diff to the current word list.
+ */
+export function applyDocumentDiff<T extends { offset: number | null }>(
+  words: T[],
+  diff: { start: number; deleted: number; words: T[]; shift: number }
+): T[] {
+  const tail = words.slice(diff.start + diff.deleted);
+  const shifted = diff.shift
+    ? tail.map((w) => (w.offset === null ? w : { ...w, offset: w.offset + diff.shift }))
+    : tail;
+  return [...words.slice(0, diff.start), ...diff.words, ...shifted];
+}
+
 /**
  * Get available TTS voices.
  */
@@ -144,3 +215,55 @@ export async function lookupWord(word: string): Promise<DictionaryEntry> {
     'Lookup failed'
   );
 }
+
+/**
+ * Find Chinese words by English meaning (pass `next_offset` for the next page).
+ */
+export async function searchDictionary(
+  query: string,
+  offset = 0,
+  limit = 20
+): Promise<DictionarySearchResponse> {
+  const params = new URLSearchParams({ q: query, offset: String(offset), limit: String(limit) });
+  return apiCall(`${API_BASE}/dictionary/search?${params}`, undefined, 'Search failed');
+}
+
+/**
+ * Find words from approximate pinyin ("zong guo", "ni3hao", "lv").
+ */
+export async function fuzzyPinyin(query: string, limit = 10): Promise<FuzzyPinyinResponse> {
+  const params = new URLSearchParams({ q: query, limit: String(limit) });
+  return apiCall(`${API_BASE}/dictionary/fuzzy?${params}`, undefined, 'Search failed');
+}
+
+/**
+ * Random words with a tone pattern ("3-3"), without repeats within a drill.
+ * Pass the returned seed and next_offset to continue the same drill.
+ */
+export async function getDrill(
+  pattern: string,
+  options: { hsk?: number; frequency?: FrequencyTier[]; n?: number; seed?: number; offset?: number } = {}
+): Promise<DrillResponse> {
+  const params = new URLSearchParams({ pattern });
+  for (const key of ['hsk', 'n', 'seed', 'offset'] as const) {
+    if (options[key] !== undefined) params.set(key, String(options[key]));
+  }
+  options.frequency?.forEach((tier) => params.append('frequency', tier));
+  return apiCall(`${API_BASE}/drills?${params}`, undefined, 'Drill failed');
+}
+
+/**
+ * One page of an HSK vocabulary list (pass next_cursor as `after`).
+ */
+export async function getVocabPage(hsk: number, after?: string, limit = 100): Promise<VocabPageResponse> {
+  const params = new URLSearchParams({ hsk: String(hsk), limit: String(limit) });
+  if (after) params.set('after', after);
+  return apiCall(`${API_BASE}/vocab?${params}`, undefined, 'Vocabulary request failed');
+}
+
+/**
+ * Download URL of a whole HSK list (streamed by the server).
+ */
+export function vocabExportUrl(hsk: number, format: VocabExportFormat = 'csv'): string {
+  return `${API_BASE}/vocab/export?${new URLSearchParams({ hsk: String(hsk), format })}`;
+}
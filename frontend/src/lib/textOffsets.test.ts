@@ -0,0 +1,35 @@
+import { describe, expect, it } from 'vitest'
+
+import { toDocumentEdit } from './api'
+import { toCodePointOffset, toUtf16Index } from './textOffsets'
+
+// 𠀀 (U+20000) is one code point but two UTF-16 units
+const text = 'a𠀀b你'
+
+describe('toCodePointOffset', () => {
+  it('counts a surrogate pair as one character', () => {
+    expect([0, 1, 3, 4, 5].map((i) => toCodePointOffset(text, i))).toEqual([0, 1, 2, 3, 4])
+  })
+
+  it('is the identity for BMP-only text', () => {
+    expect(toCodePointOffset('你好世界', 3)).toBe(3)
+  })
+})
+
+describe('toUtf16Index', () => {
+  it('inverts toCodePointOffset', () => {
+    expect([0, 1, 2, 3, 4].map((n) => toUtf16Index(text, n))).toEqual([0, 1, 3, 4, 5])
+  })
+})
+
+describe('toDocumentEdit', () => {
+  it('converts a selection after an astral character', () => {
+    // Replace "b" (UTF-16 3..4) with "不"
+    expect(toDocumentEdit(text, { revision: 2, start: 3, end: 4, inserted: '不' })).toEqual({
+      revision: 2,
+      offset: 2,
+      deleted: 1,
+      inserted: '不',
+    })
+  })
+})
@@ -0,0 +1,44 @@
+/**
+ * Conversions between JavaScript string indices (UTF-16 code units) and
+ * the Unicode code point offsets the backend uses.
+ *
+ * Characters outside the BMP (rare hanzi in CJK Extension B and later,
+ * emoji) take two UTF-16 units but one code point.
+ */
+
+/**
+ * Code point offset of a UTF-16 index in `text`.
+ * An index inside a surrogate pair counts the whole character.
+ */
+export function toCodePointOffset(text: string, utf16Index: number): number {
+  let offset = 0;
+  for (let i = 0; i < utf16Index && i < text.length; i++) {
+    const unit = text.charCodeAt(i);
+    // Low surrogate: second half of a character already counted
+    if (!(isLowSurrogate(unit) && i > 0 && isHighSurrogate(text.charCodeAt(i - 1)))) {
+      offset++;
+    }
+  }
+  return offset;
+}
+
+/**
+ * UTF-16 index of a code point offset in `text` (e.g. a word offset from
+ * the API), for slicing or selecting the word in the browser.
+ */
+export function toUtf16Index(text: string, codePointOffset: number): number {
+  let index = 0;
+  for (let n = 0; n < codePointOffset && index < text.length; n++) {
+    const pair = isHighSurrogate(text.charCodeAt(index)) && isLowSurrogate(text.charCodeAt(index + 1));
+    index += pair ? 2 : 1;
+  }
+  return index;
+}
+
+function isHighSurrogate(unit: number): boolean {
+  return unit >= 0xd800 && unit <= 0xdbff;
+}
+
+function isLowSurrogate(unit: number): boolean {
+  return unit >= 0xdc00 && unit <= 0xdfff;
+}
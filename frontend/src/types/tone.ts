@@ -17,6 +17,7 @@ export interface SyllableInfo {
   pinyin: string;
   pinyin_num: string;
   tone: ToneNumber;
+  sandhi_rule?: string | null;  // Cross-word sandhi (phrase_sandhi requests only)
 }
 
 export interface WordTone {
@@ -28,6 +29,7 @@ export interface WordTone {
   original_tones: ToneNumber[] | null;
   has_sandhi: boolean;
   sandhi_rule: string | null;
+  offset: number | null;  // Start in the analyzed text (code points)
   hsk_level: number;
   frequency: number | null;  // Zipf frequency (0-8 scale, 6+=common)
   source: SourceType;
@@ -40,8 +42,56 @@ export interface AnalyzeResponse {
   words: WordTone[];
 }
 
+// Returned when AnalyzeRequest.format is 'columnar': one array entry per word
+export interface AnalyzeColumnarResponse {
+  text: string;
+  words: string[];
+  offsets: (number | null)[];
+  pinyin: string[];
+  tones: number[][];
+  original_tones: (number[] | null)[];
+  confidence: ConfidenceLevel[];
+}
+
 export interface AnalyzeRequest {
   text: string;
+  phrase_sandhi?: boolean;
+  format?: 'words' | 'columnar';
+}
+
+// Incremental analysis (/api/analyze/documents)
+export interface DocumentResponse {
+  document_id: string;
+  revision: number;
+  words: WordTone[];
+}
+
+// Replace `deleted` words starting at `start` with `words`,
+// then add `shift` to the offsets of the words after them
+export interface DocumentDiffResponse {
+  document_id: string;
+  revision: number;
+  start: number;
+  deleted: number;
+  words: WordTone[];
+  shift: number;
+}
+
+// Offsets count Unicode code points, not UTF-16 units
+export interface DocumentEdit {
+  revision: number;
+  offset: number;
+  deleted: number;
+  inserted: string;
+}
+
+// An edit as the browser sees it: `start`/`end` are UTF-16 indices into
+// the text before the edit (e.g. a textarea's selectionStart/selectionEnd)
+export interface TextEdit {
+  revision: number;
+  start: number;
+  end: number;
+  inserted: string;
 }
 
 export type FrequencyTier = 'unknown' | 'rare' | 'uncommon' | 'common' | 'veryCommon';
@@ -60,6 +110,52 @@ export interface DictionaryEntry {
   related: string[];
 }
 
+export interface DictionarySearchResult {
+  simplified: string;
+  traditional: string | null;
+  pinyin: string;
+  pinyin_num: string;
+  tones: number[];
+  definitions: string[];
+  hsk_level: number;
+  frequency: number | null;
+}
+
+export interface FuzzyPinyinResult extends DictionarySearchResult {
+  distance: number;  // 0 = exact spelling, 0.5 per learner confusion
+}
+
+export interface FuzzyPinyinResponse {
+  query: string;
+  results: FuzzyPinyinResult[];
+}
+
+export interface DrillResponse {
+  pattern: string;  // e.g. "3-3" (5 = neutral tone)
+  hsk_level: number | null;
+  seed: number;
+  offset: number;
+  total: number;
+  words: DictionarySearchResult[];
+  next_offset: number | null;  // null = drill exhausted
+}
+
+export interface VocabPageResponse {
+  hsk_level: number;
+  results: DictionarySearchResult[];
+  next_cursor: string | null;  // pass as `after`; null = last page
+}
+
+export type VocabExportFormat = 'csv' | 'ndjson' | 'anki';
+
+export interface DictionarySearchResponse {
+  query: string;
+  offset: number;
+  limit: number;
+  results: DictionarySearchResult[];
+  next_offset: number | null;  // null on the last page
+}
+
 // Tone metadata
 export const TONE_INFO: Record<ToneNumber, {
   name: string;